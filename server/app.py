@@ -1,29 +1,105 @@
+import time
+from contextlib import contextmanager
+
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
-from flask_talisman import Talisman
+from replica import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
-def create_app():
+# 'api' registers the HTTP routes, 'cli' the flask commands and migrations, 'full' both
+BUILDS = ('full', 'api', 'cli')
+
+class MigrateGroup(click.Group):
+    """``flask db`` that sets up Flask-Migrate, and imports Alembic, only when it runs."""
+
+    def __init__(self, app):
+        super().__init__('db', help='Perform database migrations.')
+        self.app = app
+
+    def _group(self):
+        if 'migrate' not in self.app.extensions:
+            from flask_migrate import Migrate
+            Migrate(self.app, db)
+        from flask_migrate.cli import db as group
+        return group
+
+    def parse_args(self, ctx, args):
+        # Take over the real group's options (-d/--directory, -x) and callback
+        group = self._group()
+        self.params, self.callback = group.params, group.callback
+        return super().parse_args(ctx, args)
+
+    def list_commands(self, ctx):
+        return self._group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._group().get_command(ctx, name)
+
+@contextmanager
+def _phase(timings, name):
+    start = time.perf_counter()
+    yield
+    timings.append((name, time.perf_counter() - start))
+
+def create_app(build=None):
+    timings = []
     app = Flask(__name__)
     app.config.from_object('config.Config')  # Ensure your config is set correctly
-    
-    db.init_app(app)
-    migrate.init_app(app, db)
-    jwt.init_app(app)
-    Talisman(app)  # Enforce HTTPS
-
-    from models import User, Project, Cohort, ProjectMember, Role, Class  # Ensure models are imported
-    
+    build = build or app.config['APP_BUILD']
+    if build not in BUILDS:
+        raise ValueError(f'Unknown build {build!r}; expected one of {", ".join(BUILDS)}')
+    app.extensions['startup_timings'] = timings
+
+    with _phase(timings, 'extensions'):
+        db.init_app(app)
+        jwt.init_app(app)
+    if build != 'api':
+        app.cli.add_command(MigrateGroup(app))
+    if build != 'cli':
+        with _phase(timings, 'talisman'):
+            from flask_talisman import Talisman
+            Talisman(app)  # Enforce HTTPS
+
+    with _phase(timings, 'models'):
+        from models import User, Project, Cohort, ProjectMember, Role, Class  # Ensure models are imported
+        # Version-bump listeners and trigger DDL hooks apply to every build,
+        # not only to the ones that import them through the routes
+        import caching, search, stats, changes
+
     with app.app_context():
-        import cli  # Ensure CLI commands are imported within app context
-        from routes import register_blueprints
-        register_blueprints(app)
-    
+        with _phase(timings, 'pragmas'):
+            import pragmas
+            pragmas.init_app(app)
+        with _phase(timings, 'stats'):
+            stats.init_app(app)
+        with _phase(timings, 'replica'):
+            import replica
+            replica.init_app(app)
+        if build != 'api':
+            with _phase(timings, 'cli'):
+                import cli  # Ensure CLI commands are imported within app context
+        if build != 'cli':
+            with _phase(timings, 'routes'):
+                from routes import register_blueprints
+                register_blueprints(app)
+        with _phase(timings, 'identity'):
+            import identity
+            identity.init_app(app)
+        with _phase(timings, 'serialization'):
+            import serialization
+            serialization.init_app(app)
+        if build != 'cli':
+            with _phase(timings, 'metrics'):
+                import metrics
+                metrics.init_app(app)
+        with _phase(timings, 'querylog'):
+            import querylog
+            querylog.init_app(app)
+
     return app
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+"""ASGI entry point for high-concurrency clients: ``uvicorn asgi:app``.
+
+The collection and detail GETs that polling clients hit run natively on
+SQLAlchemy's asyncio extension (aiosqlite locally), reusing the models and
+the ETag, field and identity helpers of the Flask build. Every other /auth
+and /api request, and the variants the native handlers decline (?include=,
+?stream=, 404s), is served by the Flask app through a WSGI adapter, so both
+builds expose the same API and writes keep the model validation.
+
+Conditional GETs also accept ``?wait=<seconds>``: when If-None-Match still
+matches, the request is parked until the data changes or the wait runs out,
+without holding a thread or a database connection.
+"""
+import asyncio
+import re
+import time
+from urllib.parse import unquote_plus
+
+from a2wsgi import WSGIMiddleware
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response, RedirectResponse
+from werkzeug.http import parse_etags, parse_date, http_date
+
+from app import create_app
+
+flask_app = create_app('api')
+
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from models import User, Project, Cohort, Class, ProjectMember, ClassStats, CohortStats, CollectionVersion
+from caching import make_etag, latest_update
+from identity import (Principal, claims_cache, principal_key, principal_query, remember_claims, versions_query,
+                      identity_versions, cached_principal, remember_principal)
+from pragmas import tune_engine
+from replica import REPLICA_BIND
+from serialization import parse_fields
+from utils import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+def async_url(url):
+    """The asyncio driver URL for a sync SQLAlchemy URL (sqlite -> sqlite+aiosqlite)."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+def _make_engine(config):
+    # Every native handler only reads, so it uses the replica when there is one
+    url = config['ASYNC_DATABASE_URL'] or config['SQLALCHEMY_BINDS'].get(REPLICA_BIND) \
+        or config['SQLALCHEMY_DATABASE_URI']
+    engine = create_async_engine(async_url(url))
+    tune_engine(engine.sync_engine, config['SQLITE_PRAGMAS'])
+    return engine
+
+engine = _make_engine(flask_app.config)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+wsgi = WSGIMiddleware(flask_app)
+
+class Declined(Exception):
+    """Raised by a native handler to hand the request to the Flask app instead."""
+
+def json_response(data, status=200):
+    return Response(flask_app.json.dumps(data), status, media_type='application/json')
+
+def _int_arg(request, name):
+    # Same leniency as request.args.get(name, type=int)
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+async def authenticate(request, session):
+    """Return the request's Principal, or an error response like flask_jwt_extended's."""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return json_response({'msg': 'Missing Authorization Header'}, 401)
+    token = header[7:]
+    claims = claims_cache.get(token)
+    if claims is None:
+        try:
+            with flask_app.app_context():
+                claims = decode_token(token)
+        except ExpiredSignatureError:
+            return json_response({'msg': 'Token has expired'}, 401)
+        except (PyJWTError, JWTExtendedException) as e:
+            return json_response({'msg': str(e)}, 422)
+        remember_claims(token, claims)
+
+    key = principal_key(claims['sub'])
+    versions = identity_versions(await session.execute(versions_query()))
+    principal = cached_principal(key, versions)
+    if principal is None:
+        row = (await session.execute(principal_query(key))).first()
+        if row is not None:
+            principal = Principal(*row)
+            remember_principal(key, principal, versions)
+    await session.close()  # hand the connection back before a possible long-poll
+    if principal is None:
+        return json_response({'msg': 'User not found'}, 401)
+    return principal
+
+async def collection_versions(tables):
+    async with Session() as session:
+        rows = await session.execute(select(CollectionVersion.name, CollectionVersion.version,
+                                            CollectionVersion.updated_at)
+                                     .where(CollectionVersion.name.in_(tables)))
+        versions = {table: (0, None) for table in tables}
+        versions.update((name, (version, updated_at)) for name, version, updated_at in rows)
+        return versions
+
+class VersionWatcher:
+    """Polls collection_version once per LONG_POLL_INTERVAL for all parked long-polls.
+
+    The poller only runs while something is waiting, and wakes every waiter
+    on any change; each one then re-checks its own ETag. Parked requests hold
+    neither a thread nor a database connection.
+    """
+
+    def __init__(self):
+        self.waiters = 0
+        self.changed = None
+        self.task = None
+
+    async def wait(self, timeout):
+        if self.changed is None:
+            self.changed = asyncio.Event()
+        changed = self.changed
+        self.waiters += 1
+        if self.task is None:
+            self.task = asyncio.create_task(self._poll())
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.waiters -= 1
+
+    async def _poll(self):
+        try:
+            seen = None
+            while self.waiters:
+                async with Session() as session:
+                    versions = (await session.execute(select(CollectionVersion.name, CollectionVersion.version))).all()
+                if seen is not None and versions != seen:
+                    self.changed.set()
+                    self.changed = asyncio.Event()
+                seen = versions
+                await asyncio.sleep(flask_app.config['LONG_POLL_INTERVAL'])
+        finally:
+            self.task = None
+
+watcher = VersionWatcher()
+
+async def conditional(request, tables, render):
+    """Async counterpart of caching.conditional, plus ``?wait=`` long-polling on a matching ETag."""
+    # A long-poll must see the ETag of the plain request it revalidates: drop
+    # wait from the raw query, leaving the rest encoded as the client sent it
+    query = '&'.join(part for part in request.url.query.split('&')
+                     if unquote_plus(part.partition('=')[0]) != 'wait')
+    full_path = f'{request.url.path}?{query}'
+    if_none_match = parse_etags(request.headers.get('If-None-Match'))
+    try:
+        wait = min(max(float(request.query_params.get('wait') or 0), 0), flask_app.config['LONG_POLL_MAX_WAIT'])
+    except ValueError:
+        return json_response({'message': 'wait must be a number of seconds'}, 400)
+    deadline = time.monotonic() + wait
+    while True:
+        versions = await collection_versions(tables)
+        etag = make_etag(full_path, tables, versions)
+        last_modified = latest_update(versions)
+        if request.headers.get('If-None-Match'):
+            not_modified = if_none_match.contains(etag)
+        else:
+            since = parse_date(request.headers.get('If-Modified-Since'))
+            not_modified = bool(since and last_modified and last_modified <= since)
+        remaining = deadline - time.monotonic()
+        if not not_modified or remaining <= 0:
+            break
+        await watcher.wait(remaining)
+
+    response = Response(status_code=304) if not_modified else await render()
+    if response.status_code not in (200, 304):
+        return response
+    response.headers['ETag'] = f'"{etag}"'
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+async def list_page(session, request, statement, key, serialize):
+    """Async counterpart of utils.list_response (``?stream=`` is left to the Flask app)."""
+    if request.query_params.get('stream') in ('1', 'true'):
+        raise Declined()
+    limit = _int_arg(request, 'limit')
+    after = _int_arg(request, 'after')
+
+    statement = statement.order_by(key)
+    if after is not None:
+        statement = statement.where(key > after)
+    if limit is None and after is None:
+        return json_response([serialize(row) for row in await session.execute(statement)])
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE)) if limit is not None else DEFAULT_PAGE_SIZE
+    rows = (await session.execute(statement.limit(limit + 1))).all()
+    next_cursor = getattr(rows[limit - 1], key.key) if len(rows) > limit else None
+    return json_response({'items': [serialize(row) for row in rows[:limit]], 'next': next_cursor})
+
+# path -> (model, tables read, role required, default fields)
+COLLECTIONS = {
+    '/api/projects': (Project, ('project',), None, None),
+    '/api/cohorts': (Cohort, ('cohort',), None, None),
+    '/api/classes': (Class, ('class',), None, None),
+    '/api/project_members': (ProjectMember, ('project_member',), None, ('project_id', 'user_id')),
+    '/api/users': (User, ('user',), 2, None),
+}
+STATS = {
+    '/api/stats/classes': (ClassStats, ClassStats.class_id),
+    '/api/stats/cohorts': (CohortStats, CohortStats.cohort_id),
+}
+
+async def get_collection(request, session, path):
+    model, tables, role, default = COLLECTIONS[path]
+    if 'include' in request.query_params:
+        raise Declined()
+    principal = await authenticate(request, session)
+    if isinstance(principal, Response):
+        return principal
+    if role is not None and principal.role_id != role:
+        return json_response({'message': 'Access forbidden: Insufficient role'}, 403)
+    try:
+        fields = parse_fields(request.query_params.get('fields', ''), model.public_fields, default)
+    except ValueError as e:
+        return json_response({'message': str(e)}, 400)
+
+    columns = [model.__table__.c[name] for name in fields]
+    key = model.__table__.c.id
+    statement = select(*columns, key) if 'id' not in fields else select(*columns)
+    serialize = lambda row: dict(zip(fields, row))
+    return await conditional(request, tables,
+                             lambda: list_page(session, request, statement, key, serialize))
+
+async def get_stats(request, session, path):
+    model, key = STATS[path]
+    principal = await authenticate(request, session)
+    if isinstance(principal, Response):
+        return principal
+
+    async def render():
+        return await list_page(session, request, select(model), key,
+                               lambda row: row[0].to_dict())
+    return await conditional(request, ('project', 'project_member', 'class', 'cohort'), render)
+
+async def get_project(request, session, project_id):
+    if 'include' in request.query_params:
+        raise Declined()
+    principal = await authenticate(request, session)
+    if isinstance(principal, Response):
+        return principal
+
+    async def render():
+        project = await session.get(Project, int(project_id))
+        if project is None:
+            raise Declined()  # Flask renders its usual 404
+        return json_response(project.to_dict())
+    return await conditional(request, ('project',), render)
+
+async def test(request, session):
+    return json_response({'message': 'API is working!'})
+
+ROUTES = [
+    (re.compile('/api/test'), test),
+    (re.compile('/api/projects/(?P<project_id>[0-9]+)'), get_project),
+    *[(re.compile(re.escape(path)), lambda request, session, path=path: get_collection(request, session, path))
+      for path in COLLECTIONS],
+    *[(re.compile(re.escape(path)), lambda request, session, path=path: get_stats(request, session, path))
+      for path in STATS],
+]
+
+def _is_secure(scope, request):
+    # Talisman's force_https rule for the Flask build
+    return scope['scheme'] == 'https' or request.headers.get('X-Forwarded-Proto') == 'https'
+
+# Talisman's default response headers, which the Flask build adds to every
+# response; HSTS only goes out over HTTPS
+HSTS_HEADER = (b'strict-transport-security', b'max-age=31556926; includeSubDomains')
+SECURITY_HEADERS = [
+    (b'x-frame-options', b'SAMEORIGIN'),
+    (b'x-content-type-options', b'nosniff'),
+    (b'content-security-policy', b"default-src 'self'; object-src 'none'"),
+    (b'referrer-policy', b'strict-origin-when-cross-origin'),
+    (b'permissions-policy', b'browsing-topics=()'),
+]
+
+def secure_headers(send, secure):
+    """Wrap an ASGI ``send`` so native responses carry the same security headers as Flask ones."""
+    extra = [HSTS_HEADER, *SECURITY_HEADERS] if secure else SECURITY_HEADERS
+
+    async def send_with_headers(message):
+        if message['type'] == 'http.response.start':
+            message = dict(message, headers=[*message.get('headers', []), *extra])
+        await send(message)
+    return send_with_headers
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        for pattern, handler in ROUTES:
+            match = pattern.fullmatch(scope['path'])
+            if match is None:
+                continue
+            request = Request(scope, receive)
+            secure = _is_secure(scope, request)
+            if not secure:
+                response = RedirectResponse(str(request.url.replace(scheme='https')), 302)
+                await response(scope, receive, secure_headers(send, secure))
+                return
+            try:
+                async with Session() as session:
+                    response = await handler(request, session, **match.groupdict())
+            except Declined:
+                break
+            await response(scope, receive, secure_headers(send, secure))
+            return
+
+    await wsgi(scope, receive, send)
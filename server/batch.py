@@ -0,0 +1,166 @@
+import contextlib
+import io
+import re
+import shlex
+import time
+from string import Template
+
+import click
+from flask import current_app
+
+# Commands that make no sense inside a batch
+EXCLUDED_COMMANDS = {'batch', 'serve'}
+
+ASSIGNMENT = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*)$')
+TOKEN_LINE = re.compile(r'^JWT Token: (\S+)$', re.MULTILINE)
+
+class BatchError(Exception):
+    """A batch line that could not be parsed or run."""
+
+def parse_line(line, variables):
+    """Split a script line into ``(target, name, args)``, expanding ``$var`` from earlier logins.
+
+    Returns None for blank lines and ``#`` comments; ``target`` is the
+    variable a ``name = login ...`` line assigns, if any.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    target = None
+    match = ASSIGNMENT.match(line)
+    if match:
+        target, line = match.groups()
+    try:
+        words = [Template(word).substitute(variables) for word in shlex.split(line)]
+    except KeyError as e:
+        raise BatchError(f'Unknown variable ${e.args[0]}')
+    except ValueError as e:
+        raise BatchError(str(e))
+    if not words:
+        raise BatchError('Missing command')
+    return target, words[0], words[1:]
+
+def run_command(name, args):
+    """Run one of the app's CLI commands in this process and return what it printed."""
+    command = current_app.cli.commands.get(name)
+    if command is None or name in EXCLUDED_COMMANDS:
+        raise BatchError(f'Unknown command {name!r}')
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            command.main(args, prog_name=name, standalone_mode=False)
+        except click.exceptions.Exit:
+            pass
+        except click.ClickException as e:
+            raise BatchError(e.format_message())
+    return output.getvalue()
+
+class CommitGroup:
+    """Groups the commits of ``every`` commands into one transaction.
+
+    With ``every`` above 1 the scoped ``session`` is swapped for one joined
+    to an outer transaction on its own connection, so each ``commit()`` a
+    command makes only releases a savepoint. The group commits the outer
+    transaction after every ``every`` commands and when the batch ends; a
+    failing command rolls back every command since the last real commit.
+    With ``every`` of 1 commands commit as they normally do.
+    """
+
+    def __init__(self, session, every):
+        self.session = session
+        self.every = max(every, 1)
+        self.pending = []
+        self.connection = None
+        self.transaction = None
+
+    def __enter__(self):
+        if self.every > 1:
+            self.outer = self.session.registry()
+            self.connection = self.outer.get_bind().connect()
+            self.begin()
+            self.session.registry.set(self.session.session_factory(
+                bind=self.connection, join_transaction_mode='create_savepoint'))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        if self.connection is not None:
+            self.session.close()
+            self.session.registry.set(self.outer)
+            self.transaction.rollback()
+            self.connection.close()
+
+    def begin(self):
+        self.transaction = self.connection.begin()
+        # pysqlite only opens a transaction before DML, so without an explicit
+        # BEGIN the first SAVEPOINT would start (and its release commit) one
+        self.connection.exec_driver_sql('BEGIN')
+
+    def done(self, line_number):
+        self.pending.append(line_number)
+        if len(self.pending) >= self.every:
+            self.commit()
+
+    def commit(self):
+        self.session.commit()
+        if self.transaction is not None:
+            self.transaction.commit()
+            self.begin()
+        self.pending = []
+
+    def rollback(self):
+        """Roll back the open group and return the line numbers it discards."""
+        self.session.rollback()
+        if self.transaction is not None:
+            self.transaction.rollback()
+            self.begin()
+        lost, self.pending = self.pending, []
+        return lost
+
+def run_batch(lines, session, commit_every=1, keep_going=False, echo=click.echo):
+    """Run CLI command lines in this app context with the scoped ``session``.
+
+    Each ``login`` stores its token in ``$TOKEN`` (and in ``$name`` for
+    ``name = login ...``) for later lines. Prints every command's output and
+    timing and returns ``(timings, failures)``, where ``timings`` maps each
+    command name to its durations in seconds.
+    """
+    variables = {}
+    timings = {}
+    failures = 0
+    with CommitGroup(session, commit_every) as group:
+        for number, line in enumerate(lines, 1):
+            start = time.perf_counter()
+            try:
+                parsed = parse_line(line, variables)
+                if parsed is None:
+                    continue
+                target, name, args = parsed
+                output = run_command(name, args)
+                echo(output, nl=False)
+                if name == 'login':
+                    match = TOKEN_LINE.search(output)
+                    if match is None:
+                        raise BatchError('Login failed')
+                    variables['TOKEN'] = match.group(1)
+                    if target:
+                        variables[target] = match.group(1)
+                elif target:
+                    raise BatchError('Only login results can be assigned')
+                group.done(number)
+            except Exception as e:
+                failures += 1
+                lost = group.rollback()
+                echo(f'Line {number}: {e}', err=True)
+                if lost:
+                    echo(f'Rolled back uncommitted lines {", ".join(map(str, lost))}', err=True)
+                if not keep_going:
+                    break
+                continue
+            elapsed = time.perf_counter() - start
+            timings.setdefault(name, []).append(elapsed)
+            echo(f'[{number}] {name}: {elapsed * 1000:.1f} ms', err=True)
+    return timings, failures
@@ -0,0 +1,160 @@
+"""Concurrency benchmark: threaded WSGI server vs the ASGI entry point.
+
+Seeds a throwaway database, starts the Flask app on werkzeug's threaded
+server and asgi.py under uvicorn (each in its own process), and drives
+both with N concurrent clients paging through /api/projects:
+
+    python bench_asgi.py --projects 20000 --concurrency 10,100,1000 --duration 10
+
+A final scenario parks --parked long-polls (?wait=) on the ASGI build and
+measures the other clients' throughput while they wait.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_common import percentile
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def serve(kind, port):
+    """Run one server in this process (the benchmark starts these as subprocesses)."""
+    if kind == 'wsgi':
+        from werkzeug.serving import run_simple
+        from app import create_app
+        app = create_app()
+        app.config['JWT_VERIFY_SUB'] = False  # identities are dicts
+        run_simple('127.0.0.1', port, app, threaded=True)
+    else:
+        import uvicorn
+        import asgi
+        asgi.flask_app.config['JWT_VERIFY_SUB'] = False
+        uvicorn.run(asgi.app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+def start_server(kind):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, __file__, '--serve', kind, '--port', str(port)], cwd=SERVER_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+async def load(base_url, headers, concurrency, duration, num_projects):
+    import httpx
+
+    timings, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker(seed):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f'/api/projects?limit=20&after={rng.randint(0, num_projects)}')
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except Exception:
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    timings.sort()
+    return len(timings) / duration, percentile(timings, 50), percentile(timings, 99), errors
+
+async def load_with_parked(base_url, headers, concurrency, duration, num_projects, parked):
+    """Run load() while ``parked`` long-polls wait on /api/cohorts, which nothing writes to."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=parked, max_keepalive_connections=parked)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=duration + 60) as client:
+        # Open every connection first so the measured window only sees parked requests
+        responses = await asyncio.gather(*(client.get('/api/cohorts') for _ in range(parked)))
+        etag = responses[0].headers['ETag']
+        polls = [asyncio.create_task(client.get(f'/api/cohorts?wait={duration + 5}',
+                                                headers={'If-None-Match': etag}))
+                 for _ in range(parked)]
+        await asyncio.sleep(1)
+        result = await load(base_url, headers, concurrency, duration, num_projects)
+        statuses = {response.status_code for response in await asyncio.gather(*polls)}
+    if statuses != {304}:
+        print(f'  unexpected long-poll statuses: {sorted(statuses)}')
+    return result
+
+def report(label, result):
+    rate, p50, p99, errors = result
+    print(f'  {label:<24} {rate:9.1f} req/s   p50 {p50 * 1000:8.2f} ms   p99 {p99 * 1000:8.2f} ms   errors {errors}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--projects', type=int, default=20000)
+    parser.add_argument('--concurrency', default='10,100,1000', help='Comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+    parser.add_argument('--parked', type=int, default=500, help='Long-polls held open in the last scenario')
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.port)
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from seed import seed_database
+
+    app = create_app()
+    with app.app_context():
+        seed_database(num_users=args.users, num_projects=args.projects)
+        token = create_access_token(identity={'user_id': 2, 'username': 'student', 'role_id': 1})
+        db.engine.dispose()
+    # Both servers sit behind the same TLS-terminating proxy as in production
+    headers = {'Authorization': f'Bearer {token}', 'X-Forwarded-Proto': 'https'}
+
+    try:
+        for kind in ('wsgi', 'asgi'):
+            process, base_url = start_server(kind)
+            try:
+                print(f'\n== {kind}: {args.projects} projects, {args.duration:g}s per run ==')
+                for concurrency in (int(c) for c in args.concurrency.split(',')):
+                    report(f'{concurrency} clients',
+                           asyncio.run(load(base_url, headers, concurrency, args.duration, args.projects)))
+                if kind == 'asgi' and args.parked:
+                    report(f'10 clients + {args.parked} parked',
+                           asyncio.run(load_with_parked(base_url, headers, 10, args.duration, args.projects, args.parked)))
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""Helpers shared by the bench_*.py scripts."""
+
+def percentile(timings, p):
+    """Nearest-rank ``p``th percentile of sorted ``timings``; 0.0 when there are none."""
+    return timings[max(0, min(len(timings) - 1, round(p / 100 * len(timings)) - 1))] if timings else 0.0
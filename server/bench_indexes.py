@@ -0,0 +1,163 @@
+"""Query-plan and latency benchmark for the foreign-key indexes.
+
+Seeds a throwaway SQLite database, then runs the hot paths twice: once with
+the project/project_member indexes dropped and once with them in place.
+
+    python bench_indexes.py --users 20000 --projects 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import text
+
+def user_projects_query(db):
+    # The statement GET /api/users/<id>/projects runs, with the route's defaults
+    from memberships import user_projects_statement
+    from models import Project
+    statement = user_projects_statement(1, 'any', Project.public_fields)
+    return str(statement.compile(db.engine, compile_kwargs={'literal_binds': True})), {}
+
+# label -> (sql, params), or a function of db returning them
+HOT_QUERIES = {
+    'get_user_projects': user_projects_query,
+    'delete_user: reassign projects': (
+        'UPDATE project SET owner_id = 1 WHERE owner_id = :user_id', {'user_id': 1}),
+    'delete_user: drop memberships': (
+        'DELETE FROM project_member WHERE user_id = :user_id', {'user_id': 1}),
+    'membership lookup': (
+        'SELECT id FROM project_member WHERE project_id = :project_id AND user_id = :user_id',
+        {'project_id': 1, 'user_id': 1}),
+    'projects in class': (
+        'SELECT * FROM project WHERE class_id = :class_id', {'class_id': 1}),
+}
+
+def seed(db, num_users, num_projects, num_classes, chunk_size=10000):
+    from models import User, Role, Cohort, Class, Project, ProjectMember
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(0)
+    password_hash = generate_password_hash('password')
+
+    def insert(table, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                db.session.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(table.insert(), batch)
+
+    insert(Role.__table__, [{'id': 1, 'name': 'student'}, {'id': 2, 'name': 'admin'}])
+    insert(Cohort.__table__, [{'id': 1, 'name': 'cohort', 'description': ''}])
+    insert(Class.__table__, ({'id': i, 'name': f'class {i}', 'description': '', 'cohort_id': 1}
+                             for i in range(1, num_classes + 1)))
+    insert(User.__table__, ({
+        'id': i,
+        'username': f'user{i}',
+        'email': 'adminuser1@example.com' if i == 1 else f'user{i}@example.com',
+        'password_hash': password_hash,
+        'role_id': 2 if i == 1 else 1,
+    } for i in range(1, num_users + 1)))
+    insert(Project.__table__, ({
+        'id': i,
+        'name': f'Project {i}',
+        'description': 'Benchmark project description',
+        'owner_id': rng.randint(2, num_users),
+        'github_link': f'https://github.com/bench/project{i}',
+        'class_id': rng.randint(1, num_classes),
+    } for i in range(1, num_projects + 1)))
+    insert(ProjectMember.__table__, ({'project_id': project_id, 'user_id': user_id}
+                                     for project_id in range(1, num_projects + 1)
+                                     for user_id in rng.sample(range(2, num_users + 1), 3)))
+    db.session.commit()
+
+def explain(db):
+    for label, query in HOT_QUERIES.items():
+        sql, params = query(db) if callable(query) else query
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params).all()
+        print(f'  {label}:')
+        for row in plan:
+            print(f'    {row[-1]}')
+
+def timed(label, samples, fn):
+    timings = []
+    for sample in samples:
+        start = time.perf_counter()
+        response = fn(sample)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code < 500, response.get_data(as_text=True)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f'  {label:<32} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms')
+
+def run_routes(client, token, user_ids, project_ids, repeat):
+    headers = {'Authorization': f'Bearer {token}'}
+    base_url = 'https://localhost'
+    readers, deleted = user_ids[:repeat], user_ids[repeat:repeat * 2]
+    timed('GET /api/users/<id>/projects', readers,
+          lambda user_id: client.get(f'/api/users/{user_id}/projects', base_url=base_url, headers=headers))
+    # Memberships go to users deleted below, so no duplicate outlives the
+    # unindexed phase and blocks the unique index
+    timed('POST /api/project_members', list(zip(project_ids[:repeat], deleted)),
+          lambda pair: client.post('/api/project_members', base_url=base_url, headers=headers,
+                                   json={'project_id': pair[0], 'user_id': pair[1]}))
+    timed('DELETE /api/users/<id>', deleted,
+          lambda user_id: client.delete(f'/api/users/{user_id}', base_url=base_url, headers=headers))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--projects', type=int, default=200000)
+    parser.add_argument('--classes', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app, db
+    from models import Project, ProjectMember
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    # Identities are dicts; newer PyJWT releases insist on a string subject
+    app.config['JWT_VERIFY_SUB'] = False
+    indexes = list(Project.__table__.indexes) + list(ProjectMember.__table__.indexes)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            seed(db, args.users, args.projects, args.classes)
+            print(f'Seeded {args.users} users / {args.projects} projects '
+                  f'in {time.perf_counter() - start:.1f}s')
+            token = create_access_token(identity={'user_id': 1, 'role_id': 2})
+            client = app.test_client()
+
+            rng = random.Random(1)
+            user_ids = rng.sample(range(2, args.users + 1), args.repeat * 4)
+            project_ids = [rng.randint(1, args.projects) for _ in range(args.repeat * 2)]
+
+            half = args.repeat * 2
+            phases = (('without indexes', 'drop', user_ids[:half], project_ids[:args.repeat]),
+                      ('with indexes', 'create', user_ids[half:], project_ids[args.repeat:]))
+            for phase, action, users, projects in phases:
+                for index in indexes:
+                    getattr(index, action)(db.engine)
+                db.session.execute(text('ANALYZE'))
+                print(f'\n== {phase} ==')
+                print('Query plans:')
+                explain(db)
+                print('Route latency:')
+                run_routes(client, token, users, projects, args.repeat)
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""Route benchmark at several data scales.
+
+Builds a database per scale with the seed.py generators, then drives every
+auth/api route through the Flask test client with valid JWTs and reports
+p50/p95/p99 latency, SQL statements per request and peak memory:
+
+    python bench_routes.py --scales 1000,100000,1000000 --output after.json
+    python bench_routes.py --scales 1000,100000 --compare after.json
+
+Seeded databases are kept in --db-dir and copied before each run, so
+repeated runs start from identical data.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+
+from bench_common import percentile
+from config import Config
+
+BENCH_PASSWORD = 'benchpassword'
+REASSIGN_ADMIN_EMAIL = Config.REASSIGN_ADMIN_EMAIL
+
+# make(i) -> (url, request kwargs); heavy cases read whole tables and run fewer times
+Case = namedtuple('Case', ['name', 'endpoint', 'method', 'token', 'make', 'heavy'])
+
+def scale_sizes(num_projects):
+    num_classes = max(5, num_projects // 1000)
+    return {
+        'num_projects': num_projects,
+        'num_users': max(1000, num_projects // 10),
+        'num_classes': num_classes,
+        'num_cohorts': max(5, num_classes // 10),
+    }
+
+def build_database(path, sizes):
+    """Seed ``path`` (unless it already exists) and return the seconds spent."""
+    if os.path.exists(path):
+        return 0.0
+    from app import db
+    from models import User
+    from seed import seed_database
+
+    start = time.perf_counter()
+    app = make_app(path + '.tmp')
+    with app.app_context():
+        seed_database(**sizes)
+        # User 1 is the admin the delete routes reassign projects to
+        admin = db.session.get(User, 1)
+        admin.role_id = 2
+        admin.email = REASSIGN_ADMIN_EMAIL
+        admin.set_password(BENCH_PASSWORD)
+        db.session.commit()
+        db.engine.dispose()
+    os.replace(path + '.tmp', path)
+    return time.perf_counter() - start
+
+def make_app(path):
+    # Config reads DATABASE_URL once at import, so point it at each scale's file directly
+    import config
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    from app import create_app
+    app = create_app()
+    # Identities are dicts; newer PyJWT releases insist on a string subject
+    app.config['JWT_VERIFY_SUB'] = False
+    return app
+
+def build_cases(sizes, rng):
+    num_projects, num_users = sizes['num_projects'], sizes['num_users']
+    # Reads and updates use the lower half; deletes consume the upper half
+    project = lambda: rng.randint(1, num_projects // 2)
+    user = lambda: rng.randint(2, num_users // 2)
+    doomed_projects = iter(range(num_projects, num_projects // 2, -1))
+    doomed_users = iter(range(num_users, num_users // 2, -1))
+    # An exhausted pool falls back to an id that does not exist (and shows up as 404s)
+    doomed_project = lambda: next(doomed_projects, 0)
+    doomed_user = lambda: next(doomed_users, 0)
+    run_id = f'{time.time_ns():x}'
+
+    def new_project(i):
+        return {'name': f'Bench project {run_id} {i}', 'description': 'Created by the route benchmark',
+                'github_link': f'https://github.com/bench/{run_id}-{i}', 'class_id': 1}
+
+    get = lambda url: lambda i: (url() if callable(url) else url, {})
+    return [
+        Case('GET /api/test', 'api.test', 'get', None, get('/api/test'), False),
+        Case('POST /auth/login', 'auth.login', 'post', None, lambda i: (
+            '/auth/login', {'json': {'email': REASSIGN_ADMIN_EMAIL, 'password': BENCH_PASSWORD}}), False),
+        Case('GET /auth/cache', 'auth.get_cache_stats', 'get', 'admin', get('/auth/cache'), False),
+        Case('GET /api/projects', 'api.get_projects', 'get', 'student', get('/api/projects'), True),
+        Case('GET /api/projects?limit=100', 'api.get_projects', 'get', 'student',
+             get(lambda: f'/api/projects?limit=100&after={project()}'), False),
+        Case('GET /api/projects?fields=id,name&limit=100', 'api.get_projects', 'get', 'student',
+             get(lambda: f'/api/projects?fields=id,name&limit=100&after={project()}'), False),
+        Case('GET /api/projects?include=owner,members&limit=100', 'api.get_projects', 'get', 'student',
+             get(lambda: f'/api/projects?include=owner,members&limit=100&after={project()}'), False),
+        Case('GET /api/projects/search', 'api.search_projects', 'get', 'student',
+             get(lambda: f"/api/projects/search?q={rng.choice(['project', 'data', 'web', 'app'])}"), False),
+        Case('GET /api/projects/<id>', 'api.get_project', 'get', 'student',
+             get(lambda: f'/api/projects/{project()}?include=owner,class'), False),
+        Case('GET /api/cohorts', 'api.get_cohorts', 'get', 'student', get('/api/cohorts'), False),
+        Case('GET /api/classes', 'api.get_classes', 'get', 'student', get('/api/classes'), False),
+        Case('GET /api/project_members', 'api.get_project_members', 'get', 'student',
+             get('/api/project_members'), True),
+        Case('GET /api/users', 'api.get_users', 'get', 'admin', get('/api/users'), True),
+        Case('GET /api/users/<id>/projects', 'api.get_user_projects', 'get', 'student',
+             get(lambda: f'/api/users/{user()}/projects'), False),
+        Case('GET /api/me/projects?limit=100', 'api.get_my_projects', 'get', 'student',
+             get('/api/me/projects?limit=100'), False),
+        Case('GET /api/changes?since=&limit=100', 'api.get_changes', 'get', 'student',
+             get(lambda: f'/api/changes?since={project()}&limit=100'), False),
+        Case('GET /api/stats/classes', 'api.get_class_stats', 'get', 'student', get('/api/stats/classes'), False),
+        Case('GET /api/stats/cohorts', 'api.get_cohort_stats', 'get', 'student', get('/api/stats/cohorts'), False),
+        Case('GET /api/export/projects?since=', 'api.export', 'get', 'admin',
+             get(lambda: f'/api/export/projects?since={max(0, num_projects - 1000)}'), False),
+        Case('GET /api/export/project_members?format=csv', 'api.export', 'get', 'admin',
+             get('/api/export/project_members?format=csv'), True),
+        Case('POST /auth/register', 'auth.register', 'post', None, lambda i: ('/auth/register', {'json': {
+            'username': f'bench{run_id}{i}', 'email': f'bench{run_id}{i}@example.com', 'password': BENCH_PASSWORD}}),
+             False),
+        Case('POST /api/projects', 'api.create_project', 'post', 'student',
+             lambda i: ('/api/projects', {'json': new_project(i)}), False),
+        Case('POST /api/projects/bulk', 'api.bulk_projects', 'post', 'admin', lambda i: (
+            '/api/projects/bulk', {'json': [new_project(f'{i}-{j}') for j in range(100)]}), False),
+        Case('PUT /api/projects/<id>', 'api.update_project', 'put', 'admin', lambda i: (
+            f'/api/projects/{project()}', {'json': {'description': f'Updated by the route benchmark {i}'}}), False),
+        Case('POST /api/cohorts', 'api.create_cohort', 'post', 'admin', lambda i: (
+            '/api/cohorts', {'json': {'name': f'Bench cohort {run_id} {i}', 'description': 'bench'}}), False),
+        Case('POST /api/classes', 'api.create_class', 'post', 'admin', lambda i: (
+            '/api/classes', {'json': {'name': f'Bench class {run_id} {i}', 'description': 'bench', 'cohort_id': 1}}),
+             False),
+        Case('POST /api/project_members', 'api.create_project_member', 'post', 'admin', lambda i: (
+            '/api/project_members', {'json': {'project_id': project(), 'user_id': user()}}), False),
+        Case('POST /api/project_members/bulk', 'api.bulk_project_members', 'post', 'admin', lambda i: (
+            '/api/project_members/bulk',
+            {'json': [{'project_id': project(), 'user_id': user()} for _ in range(100)]}), False),
+        Case('DELETE /api/projects/<id>', 'api.delete_project', 'delete', 'admin',
+             lambda i: (f'/api/projects/{doomed_project()}', {}), False),
+        Case('DELETE /api/users/<id>', 'api.delete_user', 'delete', 'admin',
+             lambda i: (f'/api/users/{doomed_user()}', {}), False),
+        Case('DELETE /api/users', 'api.delete_user_batch', 'delete', 'admin', lambda i: (
+            '/api/users', {'json': {'ids': [doomed_user() for _ in range(5)]}}), False),
+    ]
+
+def run_case(client, case, headers, repeat, sql_counter):
+    def send(i):
+        url, kwargs = case.make(i)
+        response = getattr(client, case.method)(url, base_url='https://localhost', headers=headers, **kwargs)
+        return response, len(response.get_data())  # drains streamed bodies
+
+    # Warm the identity cache so SQL counts are the steady-state ones
+    send(-1)
+    timings, statuses, sql, size = [], Counter(), 0, 0
+    for i in range(repeat):
+        sql_counter[0] = 0
+        start = time.perf_counter()
+        response, length = send(i)
+        timings.append((time.perf_counter() - start) * 1000)
+        size += length
+        sql += sql_counter[0]
+        statuses[response.status_code] += 1
+
+    # One extra request under tracemalloc; tracing would distort the timings above
+    tracemalloc.start()
+    send(repeat)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'requests': repeat,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'sql_per_request': round(sql / repeat, 2),
+        'bytes_per_request': size // repeat,
+        'peak_memory_kb': peak // 1024,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+def bench_scale(num_projects, args):
+    from sqlalchemy import event
+    from flask_jwt_extended import create_access_token
+    from app import db
+
+    sizes = scale_sizes(num_projects)
+    pristine = os.path.join(args.db_dir, f'bench_{num_projects}.db')
+    print(f'\n== {num_projects} projects / {sizes["num_users"]} users ==')
+    build_seconds = build_database(pristine, sizes)
+    if build_seconds:
+        print(f'Seeded in {build_seconds:.1f}s')
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    shutil.copyfile(pristine, path)
+    app = make_app(path)
+    try:
+        with app.app_context():
+            tokens = {
+                'admin': create_access_token(identity={'user_id': 1, 'username': 'admin', 'role_id': 2}),
+                'student': create_access_token(identity={'user_id': 2, 'username': 'student', 'role_id': 1}),
+            }
+            sql_counter = [0]
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda *_: sql_counter.__setitem__(0, sql_counter[0] + 1))
+            endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != 'static'}
+
+        client = app.test_client()
+        all_cases = build_cases(sizes, random.Random(args.seed))
+        cases = [case for case in all_cases if re.search(args.routes, case.name)]
+        missing = endpoints - {case.endpoint for case in all_cases}
+        if missing:
+            print(f"Routes without a benchmark case: {', '.join(sorted(missing))}")
+
+        results = {}
+        print(f'  {"route":<48} {"p50":>9} {"p95":>9} {"p99":>9} {"sql":>6} {"peak KB":>9}  status')
+        for case in cases:
+            headers = {'Authorization': f'Bearer {tokens[case.token]}'} if case.token else {}
+            repeat = max(3, args.requests // 10) if case.heavy else args.requests
+            result = results[case.name] = run_case(client, case, headers, repeat, sql_counter)
+            statuses = ' '.join(f'{code}x{count}' for code, count in result['statuses'].items())
+            print(f'  {case.name:<48} {result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} {result["p99_ms"]:9.2f} '
+                  f'{result["sql_per_request"]:6.1f} {result["peak_memory_kb"]:9d}  {statuses}')
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        os.remove(path)
+    return {'sizes': sizes, 'routes': results}
+
+def compare(baseline, current, threshold):
+    """Print the routes whose p50/p95 grew by more than ``threshold`` or that issue more SQL."""
+    regressions = 0
+    for scale, result in current['scales'].items():
+        old_routes = baseline['scales'].get(scale, {}).get('routes', {})
+        for name, new in result['routes'].items():
+            old = old_routes.get(name)
+            if not old:
+                continue
+            notes = [f'{key} {old[key]:.2f} -> {new[key]:.2f} ms' for key in ('p50_ms', 'p95_ms')
+                     if old[key] and new[key] > old[key] * (1 + threshold)]
+            if new['sql_per_request'] > old['sql_per_request']:
+                notes.append(f"sql {old['sql_per_request']} -> {new['sql_per_request']}")
+            if notes:
+                regressions += 1
+                print(f'  REGRESSION {scale:>8} {name}: {"; ".join(notes)}')
+    print(f'{regressions} regression(s) against the baseline (threshold {threshold:.0%})')
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='1000,100000,1000000', help='Comma-separated project counts')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per route (a tenth for full-table reads)')
+    parser.add_argument('--routes', default='', help='Only run routes whose name matches this regex')
+    parser.add_argument('--db-dir', default=os.path.join(tempfile.gettempdir(), 'bench_routes'),
+                        help='Where seeded databases are cached')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Latency growth flagged as a regression')
+    args = parser.parse_args()
+    os.makedirs(args.db_dir, exist_ok=True)
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'requests': args.requests,
+        },
+        'scales': {},
+    }
+    for num_projects in (int(scale) for scale in args.scales.split(',')):
+        results['scales'][str(num_projects)] = bench_scale(num_projects, args)
+    # ru_maxrss is KB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['meta']['max_rss_kb'] = max_rss // 1024 if sys.platform == 'darwin' else max_rss
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nResults written to {args.output}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f'\nCompared with {args.compare} ({baseline["meta"].get("revision")}):')
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
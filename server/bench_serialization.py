@@ -0,0 +1,82 @@
+"""Serialization benchmark for the project list.
+
+Compares the ORM + to_dict() path with the column-row path, under the stdlib
+and orjson JSON providers, on a throwaway seeded database:
+
+    python bench_serialization.py --projects 100000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def timed(label, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f'  {label:<44} median {statistics.median(timings):9.1f} ms   {size / 1e6:7.2f} MB')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from models import Project
+    from seed import seed_database
+    from serialization import OrjsonProvider, orjson, row_query, row_serializer
+
+    app = create_app()
+    # Identities are dicts; newer PyJWT releases insist on a string subject
+    app.config['JWT_VERIFY_SUB'] = False
+    providers = [('stdlib', DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider(app)))
+
+    try:
+        with app.app_context():
+            seed_database(num_users=args.users, num_projects=args.projects)
+            token = create_access_token(identity={'user_id': 1, 'role_id': 2})
+            fields = list(Project.public_fields)
+            sparse = ['id', 'name', 'class_id']
+
+            print('\nQuery + serialize + encode:')
+            for name, provider in providers:
+                def orm_path():
+                    db.session.expunge_all()
+                    return len(provider.dumps([project.to_dict() for project in Project.query.order_by(Project.id)]))
+
+                def row_path(fields=fields):
+                    serialize = row_serializer(fields)
+                    return len(provider.dumps([serialize(row) for row in row_query(Project, fields).order_by(Project.id)]))
+
+                timed(f'{name}: ORM instances + to_dict()', orm_path, args.repeat)
+                timed(f'{name}: column rows', row_path, args.repeat)
+                timed(f'{name}: column rows, fields=id,name,class_id', lambda: row_path(sparse), args.repeat)
+
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        print('\nGET /api/projects through the test client:')
+        for name, provider in providers:
+            app.json = provider
+            for query_string in ('', '?fields=id,name,class_id'):
+                timed(f'{name}: /api/projects{query_string}',
+                      lambda: len(client.get(f'/api/projects{query_string}', headers=headers,
+                                             base_url='https://localhost').data),
+                      args.repeat)
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Concurrent read/write benchmark for the SQLite engine profile.
+
+Seeds a throwaway database, then runs reader and writer threads against it
+for a fixed time, once with SQLite's defaults (rollback journal, full sync)
+and once with Config.SQLITE_PRAGMAS:
+
+    python bench_sqlite.py --projects 50000 --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from bench_common import percentile
+
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+def run_profile(url, pragmas, args, num_projects, num_users):
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+    from models import Project, ProjectMember
+    from pragmas import tune_engine
+
+    engine = create_engine(url, pool_size=args.readers + args.writers)
+    tune_engine(engine, pragmas)
+    with engine.connect() as connection:  # switches the journal mode before the threads start
+        journal_mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'read': [], 'write': [], 'errors': 0}
+
+    def reader(seed):
+        rng = random.Random(seed)
+        timings = []
+        with Session(engine) as session:
+            while not stop.is_set():
+                start = time.perf_counter()
+                after = rng.randint(0, num_projects)
+                session.execute(select(Project.id, Project.name, Project.owner_id)
+                                .where(Project.id > after).order_by(Project.id).limit(100)).all()
+                session.execute(select(ProjectMember.user_id)
+                                .where(ProjectMember.project_id == after + 1)).all()
+                session.rollback()  # end the read transaction, as a request would
+                timings.append(time.perf_counter() - start)
+        with lock:
+            stats['read'] += timings
+
+    def writer(seed):
+        rng = random.Random(seed)
+        timings, errors = [], 0
+        with Session(engine) as session:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    session.add(Project(name=f'Benchmark project {seed}-{len(timings)}',
+                                        description='Inserted by the SQLite benchmark',
+                                        owner_id=rng.randint(1, num_users),
+                                        github_link='https://github.com/bench/sqlite',
+                                        class_id=1))
+                    session.commit()
+                    timings.append(time.perf_counter() - start)
+                except OperationalError:  # database is locked
+                    session.rollback()
+                    errors += 1
+        with lock:
+            stats['write'] += timings
+            stats['errors'] += errors
+
+    threads = ([threading.Thread(target=reader, args=(i,)) for i in range(args.readers)] +
+               [threading.Thread(target=writer, args=(1000 + i,)) for i in range(args.writers)])
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    for kind in ('read', 'write'):
+        timings = sorted(stats[kind])
+        print(f'  {kind + "s":<7} {len(timings) / args.duration:9.1f} /s   '
+              f'p50 {percentile(timings, 50) * 1000:8.2f} ms   p99 {percentile(timings, 99) * 1000:8.2f} ms')
+    print(f'  locked  {stats["errors"]:9d}      (journal_mode={journal_mode})')
+    return len(stats['read']), len(stats['write'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--projects', type=int, default=50000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app, db
+    from seed import seed_database
+
+    app = create_app()
+    try:
+        with app.app_context():
+            seed_database(num_users=args.users, num_projects=args.projects)
+            pragmas = app.config['SQLITE_PRAGMAS']
+            db.engine.dispose()
+
+        results = {}
+        for label, profile in (('SQLite defaults', DEFAULT_PRAGMAS), ('tuned (Config.SQLITE_PRAGMAS)', pragmas)):
+            print(f'\n== {label}: {args.readers} readers / {args.writers} writers, {args.duration:g}s ==')
+            results[label] = run_profile(f'sqlite:///{path}', profile, args, args.projects, args.users)
+
+        (base_reads, base_writes), (reads, writes) = results.values()
+        print(f'\nThroughput change: reads x{reads / max(base_reads, 1):.2f}, writes x{writes / max(base_writes, 1):.2f}')
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+from flask import current_app
+from sqlalchemy import insert, update, delete, select
+from app import db
+from models import User, Role, Project, Class, ProjectMember
+from hashing import hash_passwords
+
+PROJECT_FIELDS = ('name', 'description', 'github_link', 'class_id', 'poster_url', 'owner_id')
+REQUIRED_PROJECT_FIELDS = ('name', 'description', 'github_link', 'class_id')
+
+# JSON types of the fields items may carry; checked before anything is hashed or validated
+PROJECT_TYPES = {'id': int, 'name': str, 'description': str, 'github_link': str, 'class_id': int,
+                 'poster_url': str, 'owner_id': int}
+MEMBER_TYPES = {'project_id': int, 'user_id': int}
+USER_TYPES = {'username': str, 'email': str, 'password': str, 'password_hash': str, 'role_id': int}
+
+def _error(index, message):
+    return {'index': index, 'status': 'error', 'error': message}
+
+def check_item(item, types):
+    """Return an error message if ``item`` isn't an object or a field has the wrong JSON type, else None.
+
+    Missing and null fields pass; required fields are checked separately.
+    """
+    if not isinstance(item, dict):
+        return 'Item must be an object'
+    for field, type_ in types.items():
+        value = item.get(field)
+        # bool is an int subclass, but true is not an id
+        if value is not None and (not isinstance(value, type_) or isinstance(value, bool)):
+            return f"{field} must be {'an integer' if type_ is int else 'a string'}"
+    return None
+
+def validate_project(values):
+    """Run the Project @validates hooks over ``values``; return an error message or None."""
+    missing = [field for field in REQUIRED_PROJECT_FIELDS if values.get(field) is None]
+    if missing:
+        return f"Missing required field(s): {', '.join(missing)}"
+    try:
+        Project(**values)
+    except AssertionError as e:
+        return str(e)
+    return None
+
+def _insert(model, rows, key):
+    """Insert ``rows`` with batched multi-row INSERTs and return their new ids, in order.
+
+    RETURNING in parameter order makes SQLite fall back to one INSERT per
+    row, so the ids come back unordered and are matched to the rows on the
+    ``key`` columns. Rows with equal keys are interchangeable.
+    """
+    columns = [getattr(model, name) for name in key]
+    new_ids = {}
+    for new_id, *values in db.session.execute(insert(model).returning(model.id, *columns), rows):
+        new_ids.setdefault(tuple(values), []).append(new_id)
+    return [new_ids[tuple(row[name] for name in key)].pop() for row in rows]
+
+def _existing(model, ids):
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+
+def bulk_save_projects(items, principal):
+    """Create projects (items without ``id``) and update projects (items with ``id``) in one transaction.
+
+    Follows the single-item routes: students own what they create and may
+    only update their own projects; admins may set ``owner_id``. Returns one
+    result per item, in order.
+    """
+    results = [None] * len(items)
+    for index, item in enumerate(items):
+        error = check_item(item, PROJECT_TYPES)
+        if error:
+            results[index] = _error(index, error)
+    valid = [(index, item) for index, item in enumerate(items) if results[index] is None]
+
+    ids = {item['id'] for _, item in valid if item.get('id') is not None}
+    current = {
+        row.id: row._asdict()
+        for row in db.session.execute(
+            select(Project.id, *[getattr(Project, field) for field in PROJECT_FIELDS])
+            .where(Project.id.in_(ids))
+        )
+    } if ids else {}
+    known_classes = _existing(Class, (item.get('class_id') for _, item in valid))
+    is_admin = principal.role_id == 2
+
+    inserts, updates = [], []
+    for index, item in valid:
+        changes = {field: item[field] for field in PROJECT_FIELDS if field in item}
+        if 'owner_id' in changes and not is_admin:
+            changes['owner_id'] = principal.user_id
+
+        project_id = item.get('id')
+        if project_id is not None:
+            existing = current.get(project_id)
+            if existing is None:
+                results[index] = _error(index, 'Project not found')
+                continue
+            if not is_admin and existing['owner_id'] != principal.user_id:
+                results[index] = _error(index, 'Access forbidden: You can only update your own projects')
+                continue
+            values = {field: existing[field] for field in PROJECT_FIELDS}
+            values.update(changes)
+        else:
+            values = {field: None for field in PROJECT_FIELDS}
+            values['owner_id'] = principal.user_id
+            values.update(changes)
+
+        error = validate_project(values)
+        # An update keeps an existing row's class unless it names a new one
+        if error is None and 'class_id' in changes and values['class_id'] not in known_classes:
+            error = 'Class not found'
+        if error:
+            results[index] = _error(index, error)
+            continue
+
+        if project_id is None:
+            inserts.append((index, values))
+            continue
+        changed = {field: value for field, value in values.items() if existing[field] != value}
+        if changed:
+            updates.append((index, dict(changed, id=project_id)))
+        else:
+            results[index] = {'index': index, 'status': 'unchanged', 'id': project_id}
+
+    if inserts:
+        new_ids = _insert(Project, [values for _, values in inserts], PROJECT_FIELDS)
+        for (index, _), project_id in zip(inserts, new_ids):
+            results[index] = {'index': index, 'status': 'created', 'id': project_id}
+    if updates:
+        db.session.execute(update(Project), [values for _, values in updates])
+        for index, values in updates:
+            results[index] = {'index': index, 'status': 'updated', 'id': values['id']}
+    db.session.commit()
+    return results
+
+def bulk_add_project_members(items, principal):
+    """Add memberships in one transaction, skipping ones that already exist.
+
+    Students may only add themselves, as with the single-item route.
+    """
+    results = [None] * len(items)
+    pairs = []
+    for index, item in enumerate(items):
+        error = check_item(item, MEMBER_TYPES)
+        if error:
+            results[index] = _error(index, error)
+            continue
+        project_id = item.get('project_id')
+        user_id = item.get('user_id', principal.user_id)
+        if principal.role_id == 1 and user_id != principal.user_id:
+            results[index] = _error(index, 'Access forbidden: Students can only assign themselves')
+            continue
+        pairs.append((index, project_id, user_id))
+
+    known_projects = _existing(Project, (project_id for _, project_id, _ in pairs))
+    known_users = _existing(User, (user_id for _, _, user_id in pairs))
+    seen = {(project_id, user_id) for project_id, user_id in db.session.execute(
+        select(ProjectMember.project_id, ProjectMember.user_id)
+        .where(ProjectMember.project_id.in_(known_projects))
+        .where(ProjectMember.user_id.in_(known_users))
+    )}
+
+    inserts = []
+    for index, project_id, user_id in pairs:
+        if project_id not in known_projects:
+            results[index] = _error(index, 'Project not found')
+        elif user_id not in known_users:
+            results[index] = _error(index, 'User not found')
+        elif (project_id, user_id) in seen:
+            results[index] = {'index': index, 'status': 'unchanged', 'project_id': project_id, 'user_id': user_id}
+        else:
+            seen.add((project_id, user_id))
+            inserts.append((index, {'project_id': project_id, 'user_id': user_id}))
+
+    if inserts:
+        new_ids = _insert(ProjectMember, [values for _, values in inserts], ('project_id', 'user_id'))
+        for (index, values), member_id in zip(inserts, new_ids):
+            results[index] = dict(values, index=index, status='created', id=member_id)
+    db.session.commit()
+    return results
+
+def bulk_create_users(items):
+    """Create users in one transaction, reporting taken emails and usernames as errors.
+
+    Items need ``username``, ``email`` and either ``password`` (hashed on the
+    worker pool) or an existing ``password_hash``; ``role_id`` defaults to
+    student.
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        error = check_item(item, USER_TYPES)
+        if error:
+            results[index] = _error(index, error)
+            continue
+        missing = [field for field in ('username', 'email') if not item.get(field)]
+        if not item.get('password') and not item.get('password_hash'):
+            missing.append('password')
+        if missing:
+            results[index] = _error(index, f"Missing required field(s): {', '.join(missing)}")
+            continue
+        valid.append((index, item))
+
+    taken_emails = set(db.session.scalars(
+        select(User.email).where(User.email.in_({item['email'] for _, item in valid}))))
+    taken_usernames = set(db.session.scalars(
+        select(User.username).where(User.username.in_({item['username'] for _, item in valid}))))
+    known_roles = _existing(Role, (item.get('role_id') or 1 for _, item in valid))
+
+    inserts = []
+    for index, item in valid:
+        role_id = item.get('role_id') or 1
+        if item['email'] in taken_emails:
+            results[index] = _error(index, 'User already exists')
+        elif item['username'] in taken_usernames:
+            results[index] = _error(index, 'Username already taken')
+        elif role_id not in known_roles:
+            results[index] = _error(index, 'Role not found')
+        else:
+            taken_emails.add(item['email'])
+            taken_usernames.add(item['username'])
+            inserts.append((index, {'username': item['username'], 'email': item['email'],
+                                    'role_id': role_id, 'password_hash': item.get('password_hash')}))
+
+    plain = [(values, items[index]['password']) for index, values in inserts if not values['password_hash']]
+    for (values, _), password_hash in zip(plain, hash_passwords([password for _, password in plain])):
+        values['password_hash'] = password_hash
+
+    if inserts:
+        new_ids = _insert(User, [values for _, values in inserts], ('email',))
+        for (index, _), user_id in zip(inserts, new_ids):
+            results[index] = {'index': index, 'status': 'created', 'id': user_id}
+    db.session.commit()
+    return results
+
+def reassign_admin_id():
+    """Id of the REASSIGN_ADMIN_EMAIL admin that inherits deleted users' projects, or None."""
+    return db.session.scalar(select(User.id).filter_by(email=current_app.config['REASSIGN_ADMIN_EMAIL']))
+
+def delete_users(user_ids, reassign_to):
+    """Delete users with set-based statements in a single transaction.
+
+    Their projects are handed to ``reassign_to`` and their memberships are
+    removed. Returns the ids that existed and were deleted.
+    """
+    user_ids = set(user_ids) - {reassign_to}
+    found = list(db.session.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else []
+    if not found:
+        return []
+
+    db.session.execute(update(Project).where(Project.owner_id.in_(found)).values(owner_id=reassign_to))
+    db.session.execute(delete(ProjectMember).where(ProjectMember.user_id.in_(found)))
+    db.session.execute(delete(User).where(User.id.in_(found)))
+    db.session.commit()
+    return found
@@ -0,0 +1,115 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+from sqlalchemy import event, update, insert
+from sqlalchemy.orm import Session
+
+from app import db
+from models import CollectionVersion
+
+version_table = CollectionVersion.__table__
+
+def bump_versions(connection, tables):
+    """Increment the revision counter of every table in ``tables``."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for name in sorted(tables):
+        result = connection.execute(
+            update(version_table)
+            .where(version_table.c.name == name)
+            .values(version=version_table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(version_table).values(name=name, version=1, updated_at=now))
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_tables(session, flush_context):
+    tables = set()
+    for obj in session.new | session.deleted:
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    tables.discard(version_table.name)
+    if tables:
+        bump_versions(session.connection(), tables)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_statement_table(orm_execute_state):
+    # Bulk writes (query.delete(), update(), table.insert()) bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name and name != version_table.name:
+        bump_versions(orm_execute_state.session.connection(), {name})
+
+def collection_versions(tables):
+    """Return ``{table: (version, updated_at)}``; untouched tables report version 0."""
+    rows = db.session.query(CollectionVersion).filter(CollectionVersion.name.in_(tables))
+    versions = {table: (0, None) for table in tables}
+    versions.update((row.name, (row.version, row.updated_at)) for row in rows)
+    return versions
+
+def make_etag(full_path, tables, versions):
+    """Strong ETag for ``full_path`` at the given table versions."""
+    tag = ';'.join(f'{table}:{versions[table][0]}' for table in sorted(tables))
+    return hashlib.sha1(f'{full_path}|{tag}'.encode()).hexdigest()
+
+def latest_update(versions):
+    """Last-Modified for ``versions``: the newest updated_at, to the second, or None.
+
+    Also None while that second is still running: HTTP dates have no
+    fractions, so a later write in the same second would share the date and
+    If-Modified-Since could not tell the two apart. The ETag still applies.
+    """
+    modified = [updated_at for _, updated_at in versions.values() if updated_at]
+    if not modified:
+        return None
+    latest = max(modified).replace(microsecond=0, tzinfo=timezone.utc)
+    if latest >= datetime.now(timezone.utc).replace(microsecond=0):
+        return None
+    return latest
+
+def conditional(*tables, extra=None, scope=None):
+    """Tag GET responses with a strong ETag built from the versions of ``tables``.
+
+    ``extra`` may return more tables the current request reads (e.g. from
+    query arguments) and ``scope`` what else besides the URL the response
+    depends on (e.g. the caller, for /me routes). ``If-None-Match`` (or,
+    only when the request has none, ``If-Modified-Since``) is answered with
+    a 304 from the version rows alone, before the view loads or serializes
+    anything.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            read_tables = set(tables).union(extra() if extra else ())
+            versions = collection_versions(read_tables)
+            full_path = request.full_path if scope is None else f'{request.full_path}|{scope()}'
+            etag = make_etag(full_path, read_tables, versions)
+            last_modified = latest_update(versions)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since)
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                # Assigning None would stamp the current time instead
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
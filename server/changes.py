@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, event, select, text
+from app import db
+from models import Cohort, Class, Project, ProjectMember, ChangeCounter, ChangeTombstone
+
+# Every insert and update of a synced row takes the next value of the single
+# change_counter row as its change_seq (and stamps updated_at); every delete
+# takes one for a change_tombstone row. Triggers cover every write path
+# (routes, bulk endpoints, CLI, importer) in the same transaction, so a
+# sequence number becomes visible only with the write that took it.
+SYNCED_MODELS = {
+    'cohort': Cohort,
+    'class': Class,
+    'project': Project,
+    'project_member': ProjectMember,
+}
+
+# Same text format SQLAlchemy writes for DateTime columns on SQLite
+NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+NEXT_SEQ = 'UPDATE change_counter SET seq = seq + 1 WHERE id = 1;'
+CURRENT_SEQ = '(SELECT seq FROM change_counter WHERE id = 1)'
+
+def _touch(table):
+    return [NEXT_SEQ, f'UPDATE {table} SET change_seq = {CURRENT_SEQ}, updated_at = {NOW} WHERE id = new.id;']
+
+def _tombstone(table):
+    return [NEXT_SEQ, f"""INSERT INTO change_tombstone (seq, entity, entity_id, deleted_at)
+        VALUES ({CURRENT_SEQ}, '{table}', old.id, {NOW});"""]
+
+def _data_columns(model):
+    # Only writes to these re-sequence a row, so the triggers' own update doesn't
+    return ', '.join(name for name in model.public_fields if name != 'id')
+
+def _trigger(name, event_, table, statements):
+    body = '\n        '.join(statements)
+    return f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {event_} ON {table} BEGIN
+        {body}
+    END"""
+
+TRIGGER_DDL = {}
+for _table, _model in SYNCED_MODELS.items():
+    TRIGGER_DDL.update({
+        f'changes_{_table}_ai': _trigger(f'changes_{_table}_ai', 'INSERT', _table, _touch(_table)),
+        f'changes_{_table}_au': _trigger(f'changes_{_table}_au', f'UPDATE OF {_data_columns(_model)}',
+                                         _table, _touch(_table)),
+        f'changes_{_table}_ad': _trigger(f'changes_{_table}_ad', 'DELETE', _table, _tombstone(_table)),
+    })
+
+COUNTER_INIT = 'INSERT INTO change_counter (id, seq) VALUES (1, 0)'
+
+def sequence_sql(table):
+    """Give the rows of ``table`` without a change_seq sequence numbers above every existing one.
+
+    Numbers are the counter plus the row id: unique and increasing, with gaps.
+    """
+    return [
+        f"""UPDATE {table} SET change_seq = {CURRENT_SEQ} + id, updated_at = COALESCE(updated_at, {NOW})
+            WHERE change_seq IS NULL""",
+        f"""UPDATE change_counter SET seq = MAX(seq, COALESCE((SELECT MAX(change_seq) FROM {table}), 0))
+            WHERE id = 1""",
+    ]
+
+# Mirror the migration for databases built with db.create_all() (seed.py)
+event.listen(ChangeCounter.__table__, 'after_create', DDL(COUNTER_INIT))
+for _ddl in TRIGGER_DDL.values():
+    # DDL() applies %-formatting; keep strftime's %-codes literal
+    event.listen(db.metadata, 'after_create', DDL(_ddl.replace('%', '%%')).execute_if(dialect='sqlite'))
+
+@contextmanager
+def change_sync_deferred(session):
+    """Drop the insert triggers for a bulk load, then sequence the new rows in one pass per table."""
+    if session.get_bind().dialect.name != 'sqlite':
+        yield
+        return
+    for table in SYNCED_MODELS:
+        session.execute(text(f'DROP TRIGGER IF EXISTS changes_{table}_ai'))
+    try:
+        yield
+    finally:
+        for table in SYNCED_MODELS:
+            session.execute(text(TRIGGER_DDL[f'changes_{table}_ai']))
+            for statement in sequence_sql(table):
+                session.execute(text(statement))
+        session.commit()
+
+def current_seq():
+    """The last sequence number handed out."""
+    return db.session.scalar(select(ChangeCounter.seq).where(ChangeCounter.id == 1))
+
+def changes_since(since, limit):
+    """Return up to ``limit`` changes after sequence number ``since``, oldest first, and whether more follow.
+
+    Each table is read through its change_seq index from ``since`` on and
+    cut at ``limit + 1`` rows, so a poll costs O(limit) however large the
+    tables are. Upserts carry the row's public fields; deletes only the id.
+    """
+    changes = []
+    for entity, model in SYNCED_MODELS.items():
+        columns = [model.__table__.c[name] for name in model.public_fields]
+        rows = db.session.execute(
+            select(model.change_seq, model.updated_at, *columns)
+            .where(model.change_seq > since)
+            .order_by(model.change_seq)
+            .limit(limit + 1))
+        for seq, updated_at, *values in rows:
+            data = dict(zip(model.public_fields, values))
+            changes.append({'seq': seq, 'entity': entity, 'op': 'upsert', 'id': data['id'],
+                            'updated_at': updated_at.isoformat(), 'data': data})
+    rows = db.session.execute(
+        select(ChangeTombstone.seq, ChangeTombstone.entity, ChangeTombstone.entity_id, ChangeTombstone.deleted_at)
+        .where(ChangeTombstone.seq > since)
+        .order_by(ChangeTombstone.seq)
+        .limit(limit + 1))
+    for seq, entity, entity_id, deleted_at in rows:
+        changes.append({'seq': seq, 'entity': entity, 'op': 'delete', 'id': entity_id,
+                        'updated_at': deleted_at.isoformat()})
+    changes.sort(key=lambda change: change['seq'])
+    return changes[:limit], len(changes) > limit
@@ -1,9 +1,19 @@
+import os
+import time
 import click
 from flask import current_app as app
-from werkzeug.security import generate_password_hash, check_password_hash
-from models import User, Project, Role, Class, Cohort, ProjectMember  # Added imports
-from app import db
-from flask_jwt_extended import create_access_token, decode_token
+from models import User, Project, Role, Class, Cohort  # Added imports
+from app import db, BUILDS
+from flask_jwt_extended import create_access_token
+from identity import resolve_token
+from bulk import delete_users, reassign_admin_id
+from stats import rebuild_stats
+from replica import use_replica, sync_replica
+from export import EXPORTS, FORMATS, export_stream, export_cursor
+from utils import STREAM_CHUNK_SIZE
+from importer import IMPORTERS, IMPORT_FORMATS, read_records, import_records, load_checkpoint, save_checkpoint
+from batch import run_batch
+from startup import profile_build
 from functools import wraps
 
 def get_role_id_by_name(role_name):
@@ -19,20 +29,15 @@ def role_required(required_role):
         def wrapper(*args, **kwargs):
             token = kwargs.get('token', None)
             if not token:
-                click.echo("Missing token")
-                return
+                raise click.ClickException("Missing token")
             
             try:
-                decoded_token = decode_token(token)
-                user_role_id = decoded_token['sub']['role_id']
-                user_role = Role.query.get(user_role_id).name
-            except Exception as e:
-                click.echo("Invalid token")
-                return
+                user_role = resolve_token(token).role_name
+            except Exception:
+                raise click.ClickException("Invalid token")
 
             if user_role != required_role:
-                click.echo(f"Access forbidden: {user_role} cannot perform this action")
-                return
+                raise click.ClickException(f"Access forbidden: {user_role} cannot perform this action")
 
             return func(*args, **kwargs)
         return wrapper
@@ -45,34 +50,29 @@ def role_required(required_role):
 @click.argument('role_name')
 def register(username, email, password, role_name):
     """Register a new user."""
-    with app.app_context():
-        if User.query.filter_by(email=email).first():
-            click.echo('User already exists')
-            return
+    if User.query.filter_by(email=email).first():
+        raise click.ClickException('User already exists')
         
-        role_id = get_role_id_by_name(role_name)
-        if role_id is None:
-            click.echo(f'Role {role_name} not found')
-            return
+    role_id = get_role_id_by_name(role_name)
+    if role_id is None:
+        raise click.ClickException(f'Role {role_name} not found')
 
-        hashed_password = generate_password_hash(password)
-        new_user = User(username=username, email=email, password_hash=hashed_password, role_id=role_id)
-        db.session.add(new_user)
-        db.session.commit()
-        click.echo(f'User {username} registered successfully')
+    new_user = User(username=username, email=email, role_id=role_id)
+    new_user.set_password(password)
+    db.session.add(new_user)
+    db.session.commit()
+    click.echo(f'User {username} registered successfully')
 
 @app.cli.command('login')
 @click.argument('email')
 @click.argument('password')
 def login(email, password):
     """Login a user."""
-    with app.app_context():
-        user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password_hash, password):
-            token = create_access_token(identity={'id': user.id, 'role_id': user.role_id})
-            click.echo(f"JWT Token: {token}")
-        else:
-            click.echo('Invalid email or password')
+    user = User.query.filter_by(email=email).first()
+    if not user or not user.check_password(password):
+        raise click.ClickException('Invalid email or password')
+    token = create_access_token(identity={'id': user.id, 'role_id': user.role_id})
+    click.echo(f"JWT Token: {token}")
 
 @app.cli.command('create-cohort')
 @click.argument('name')
@@ -81,11 +81,10 @@ def login(email, password):
 @role_required('admin')
 def create_cohort(name, description, token):
     """Create a new cohort."""
-    with app.app_context():
-        new_cohort = Cohort(name=name, description=description)
-        db.session.add(new_cohort)
-        db.session.commit()
-        click.echo(f'Cohort {name} created successfully')
+    new_cohort = Cohort(name=name, description=description)
+    db.session.add(new_cohort)
+    db.session.commit()
+    click.echo(f'Cohort {name} created successfully')
 
 @app.cli.command('create-project')
 @click.argument('name')
@@ -96,25 +95,23 @@ def create_cohort(name, description, token):
 @click.argument('token')
 def create_project(name, description, github_link, owner_email, class_id, token):
     """Create a new project."""
-    with app.app_context():
-        owner = User.query.filter_by(email=owner_email).first()
-        if not owner:
-            click.echo('Owner not found')
-            return
+    owner = User.query.filter_by(email=owner_email).first()
+    if not owner:
+        raise click.ClickException('Owner not found')
 
-        new_project = Project(name=name, description=description, owner_id=owner.id, github_link=github_link, class_id=class_id)
-        db.session.add(new_project)
-        db.session.commit()
-        click.echo(f'Project {name} created successfully')
+    new_project = Project(name=name, description=description, owner_id=owner.id, github_link=github_link, class_id=class_id)
+    db.session.add(new_project)
+    db.session.commit()
+    click.echo(f'Project {name} created successfully')
 
 @app.cli.command('list-projects')
 @click.argument('token')
 def list_projects(token):
     """List all projects."""
-    with app.app_context():
-        projects = Project.query.all()
-        for project in projects:
-            click.echo(f'ID: {project.id}, Name: {project.name}, Description: {project.description}, GitHub: {project.github_link}')
+    use_replica(db.session)
+    projects = Project.query.order_by(Project.id).yield_per(STREAM_CHUNK_SIZE)
+    for project in projects:
+        click.echo(f'ID: {project.id}, Name: {project.name}, Description: {project.description}, GitHub: {project.github_link}')
 
 @app.cli.command('create-class')
 @click.argument('name')
@@ -124,20 +121,19 @@ def list_projects(token):
 @role_required('admin')
 def create_class(name, description, cohort_id, token):
     """Create a new class."""
-    with app.app_context():
-        new_class = Class(name=name, description=description, cohort_id=cohort_id)
-        db.session.add(new_class)
-        db.session.commit()
-        click.echo(f'Class {name} created successfully')
+    new_class = Class(name=name, description=description, cohort_id=cohort_id)
+    db.session.add(new_class)
+    db.session.commit()
+    click.echo(f'Class {name} created successfully')
 
 @app.cli.command('list-classes')
 @click.argument('token')
 def list_classes(token):
     """List all classes."""
-    with app.app_context():
-        classes = Class.query.all()
-        for cls in classes:
-            click.echo(f'ID: {cls.id}, Name: {cls.name}, Description: {cls.description}')
+    use_replica(db.session)
+    classes = Class.query.order_by(Class.id).yield_per(STREAM_CHUNK_SIZE)
+    for cls in classes:
+        click.echo(f'ID: {cls.id}, Name: {cls.name}, Description: {cls.description}')
 
 @app.cli.command('assign-user-to-class')
 @click.argument('user_email')
@@ -146,44 +142,171 @@ def list_classes(token):
 @role_required('admin')
 def assign_user_to_class(user_email, class_id, token):
     """Assign a user to a class."""
-    with app.app_context():
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            click.echo('User not found')
-            return
+    user = User.query.filter_by(email=user_email).first()
+    if not user:
+        raise click.ClickException('User not found')
 
-        class_ = Class.query.get(class_id)
-        if not class_:
-            click.echo('Class not found')
-            return
+    class_ = Class.query.get(class_id)
+    if not class_:
+        raise click.ClickException('Class not found')
 
-        user.class_id = class_id
-        db.session.commit()
-        click.echo(f'User {user.username} assigned to class {class_.name} successfully')
+    user.class_id = class_id
+    db.session.commit()
+    click.echo(f'User {user.username} assigned to class {class_.name} successfully')
 
 @app.cli.command('delete-user')
-@click.argument('user_id')
+@click.argument('user_id', type=int)
 @click.argument('token')
 @role_required('admin')
 def delete_user(user_id, token):
     """Delete a user."""
-    with app.app_context():
-        user = User.query.get_or_404(user_id)
-        
-        # Reassign projects to another user (admin) before deleting the user
-        admin_user = User.query.filter_by(email='adminuser@example.com').first()
-        if not admin_user:
-            click.echo('Admin user not found for reassignment')
-            return
-        
-        for project in user.projects:
-            project.owner_id = admin_user.id
-        
-        db.session.commit()
+    # Reassign projects to another user (admin) before deleting the user
+    admin_id = reassign_admin_id()
+    if not admin_id:
+        raise click.ClickException('Admin user not found for reassignment')
 
-        # Delete associated project members
-        ProjectMember.query.filter_by(user_id=user.id).delete()
-        
-        db.session.delete(user)
-        db.session.commit()
-        click.echo('User deleted successfully')
+    if not delete_users([user_id], admin_id):
+        raise click.ClickException('User not found')
+    click.echo('User deleted successfully')
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the class and cohort statistics tables."""
+    rebuild_stats(db.session)
+    click.echo('Statistics rebuilt successfully')
+
+@app.cli.command('sync-replica')
+def sync_replica_command():
+    """Copy the primary SQLite database onto the replica bind."""
+    try:
+        sync_replica(db)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo('Replica synced successfully')
+
+@app.cli.command('serve')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=int, default=5000, show_default=True)
+@click.option('--workers', type=int, default=None, help='Worker processes (default: SERVER_WORKERS).')
+@click.option('--threads', type=int, default=None, help='Request threads per worker (default: SERVER_THREADS).')
+@click.option('--max-requests', type=int, default=None,
+              help='Recycle a worker after this many requests, 0 to never (default: SERVER_MAX_REQUESTS).')
+@click.option('--max-requests-jitter', type=int, default=None,
+              help='Add up to this many to each worker\'s limit (default: SERVER_MAX_REQUESTS_JITTER).')
+@click.option('--cert', default=None, help='TLS certificate file, when not behind a TLS-terminating proxy.')
+@click.option('--key', default=None, help='TLS key file.')
+def serve(host, port, workers, threads, max_requests, max_requests_jitter, cert, key):
+    """Serve the app on pre-forked worker processes."""
+    import prefork
+    config = app.config
+    prefork.serve(app._get_current_object(), host, port,
+                  workers or config['SERVER_WORKERS'],
+                  threads or config['SERVER_THREADS'],
+                  config['SERVER_MAX_REQUESTS'] if max_requests is None else max_requests,
+                  config['SERVER_MAX_REQUESTS_JITTER'] if max_requests_jitter is None else max_requests_jitter,
+                  config['SERVER_GRACEFUL_TIMEOUT'],
+                  ssl_context=(cert, key) if cert else None)
+
+@app.cli.command('batch')
+@click.argument('script', type=click.File('r'), default='-')
+@click.option('--commit-every', type=int, default=1, show_default=True,
+              help='Commit once per this many commands instead of after each one.')
+@click.option('--keep-going', is_flag=True, help='Continue after a failing line instead of stopping.')
+def batch(script, commit_every, keep_going):
+    """Run CLI commands from SCRIPT (or stdin), one per line, in this process.
+
+    All lines share one app context and database session. Each login stores
+    its token in $TOKEN, and "name = login EMAIL PASSWORD" also in $name, for
+    use in later lines; write a literal $ as $$.
+    """
+    start = time.perf_counter()
+    timings, failures = run_batch(script, db.session, commit_every, keep_going)
+    for name, durations in sorted(timings.items()):
+        click.echo(f'{name:<24} {len(durations):6d} x {sum(durations) / len(durations) * 1000:9.1f} ms', err=True)
+    count = sum(len(durations) for durations in timings.values())
+    click.echo(f'{count} commands succeeded, {failures} failed in {time.perf_counter() - start:.2f}s', err=True)
+    if failures:
+        raise SystemExit(1)
+
+@app.cli.command('startup-profile')
+@click.option('--build', 'builds', type=click.Choice(BUILDS), multiple=True,
+              help='Build to profile; repeatable (default: all).')
+@click.option('--top', type=int, default=10, show_default=True, help='Packages to list by import time.')
+@click.option('--budget-ms', type=float, default=None, help='Fail above this total (default: STARTUP_BUDGET_MS).')
+def startup_profile(builds, top, budget_ms):
+    """Report cold-start import and create_app() times per build."""
+    budget_ms = budget_ms or app.config['STARTUP_BUDGET_MS']
+    over = []
+    for build in builds or BUILDS:
+        result = profile_build(build)
+        total_ms = (result['import'] + result['create_app']) * 1000
+        click.echo(f'== {build}: {total_ms:.1f} ms (import app {result["import"] * 1000:.1f} ms, '
+                   f'create_app {result["create_app"] * 1000:.1f} ms; budget {budget_ms:g} ms) ==')
+        click.echo('  create_app phases:')
+        for name, seconds in sorted(result['phases'], key=lambda phase: -phase[1]):
+            click.echo(f'    {name:<20} {seconds * 1000:8.1f} ms')
+        click.echo('  imports by package (self time):')
+        for name, seconds in result['packages'].most_common(top):
+            click.echo(f'    {name:<20} {seconds * 1000:8.1f} ms')
+        if total_ms > budget_ms:
+            over.append(build)
+    if over:
+        click.echo(f'Over the startup budget: {", ".join(over)}', err=True)
+        raise SystemExit(1)
+
+@app.cli.command('export')
+@click.argument('entity', type=click.Choice(list(EXPORTS)))
+@click.argument('token')
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), default='ndjson', show_default=True)
+@click.option('--since', type=int, default=None,
+              help='Only rows changed after this change sequence number (users: created after this id).')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Output file (default: stdout).')
+@role_required('admin')
+def export(entity, token, fmt, since, compress, output):
+    """Stream a table as NDJSON or CSV."""
+    cursor = export_cursor(entity)
+    for chunk in export_stream(entity, fmt, since, compress, cursor):
+        output.write(chunk)
+    if cursor is not None:
+        click.echo(f'Next --since: {cursor}', err=True)
+
+@app.cli.command('import')
+@click.argument('entity', type=click.Choice(list(IMPORTERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('token')
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format (default: from the file extension).')
+@click.option('--chunk-size', type=int, default=None, help='Records per transaction (default: IMPORT_CHUNK_SIZE).')
+@click.option('--checkpoint', default=None, help='Progress file (default: <path>.checkpoint).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first record.')
+@role_required('admin')
+def import_command(entity, path, token, fmt, chunk_size, checkpoint, restart):
+    """Import users, projects or memberships from a CSV or NDJSON file."""
+    chunk_size = chunk_size or app.config['IMPORT_CHUNK_SIZE']
+    checkpoint = checkpoint or f'{path}.checkpoint'
+    try:
+        start = 0 if restart else load_checkpoint(checkpoint, entity)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if start:
+        click.echo(f'Resuming after record {start}')
+
+    counts = {}
+    def on_chunk(done, results):
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            if result['status'] == 'error':
+                click.echo(f"Record {result['index'] + 1}: {result['error']}", err=True)
+        save_checkpoint(checkpoint, entity, done)
+
+    try:
+        done = import_records(entity, read_records(path, fmt), resolve_token(token), chunk_size, start, on_chunk)
+    except Exception:
+        db.session.rollback()
+        click.echo(f'Import failed; rerun the same command to resume from {checkpoint}', err=True)
+        raise
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    click.echo(f'Imported {done - start} {entity} records ({summary or "nothing to do"})')
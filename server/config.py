@@ -2,6 +2,70 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_secret_key'
+    # Must be SQLite: the statistics tables are kept by SQLite triggers, and
+    # create_app refuses other databases (stats.init_app)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica: GET requests and list-* commands read from it
+    # (replica.py); without it everything uses SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    # Pool sizing for server databases; SQLite files keep SQLAlchemy's defaults
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or '1') == '1',
+    }
+    # Run on every SQLite connection: WAL lets readers proceed while one
+    # writer commits, and NORMAL sync only fsyncs at checkpoints
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL',
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL',
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE') or -64000),  # negative: KiB
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000),
+    }
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your_jwt_secret_key'
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE') or 1024)
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL') or 300)
+    # werkzeug method string; hashes made with other parameters are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    # Processes hashing for /auth (0 hashes inline) and hashes allowed to wait for one
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT') or 32)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+    # Admin who receives the projects of deleted users (DELETE /api/users, flask delete-user)
+    REASSIGN_ADMIN_EMAIL = os.environ.get('REASSIGN_ADMIN_EMAIL') or 'adminuser1@example.com'
+    # Largest array accepted by the /bulk endpoints
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS') or 5000)
+    # Records per transaction for 'flask import'
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE') or 1000)
+    # Per-endpoint Prometheus metrics at /metrics (needs prometheus_client); for
+    # several worker processes also set PROMETHEUS_MULTIPROC_DIR to a shared directory
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or '1') == '1'
+    # Scrapers send it as 'Authorization: Bearer <token>'; /metrics is not served without one
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Development aid: log slow statements with their plan and flag requests
+    # repeating one statement more than N_PLUS_ONE_THRESHOLD times
+    QUERY_DEBUG = os.environ.get('QUERY_DEBUG') == '1'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 100)
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD') or 10)
+    # asgi.py: async driver URL (default: derived from the replica or primary URL)
+    # and the longest a ?wait= long-poll is parked, polling every LONG_POLL_INTERVAL
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    LONG_POLL_MAX_WAIT = float(os.environ.get('LONG_POLL_MAX_WAIT') or 60)
+    LONG_POLL_INTERVAL = float(os.environ.get('LONG_POLL_INTERVAL') or 0.5)
+    # create_app() default: 'full', or 'api'/'cli' to load only the routes or the commands
+    APP_BUILD = os.environ.get('APP_BUILD') or 'full'
+    # flask startup-profile fails when a build's import + create_app() time exceeds this
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS') or 1500)
+    # flask serve: worker processes, request threads per worker, requests before a
+    # worker is recycled (0 = never) plus up to JITTER more, seconds to drain on stop
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS') or os.cpu_count() or 1)
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS') or 4)
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS') or 10000)
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER') or 500)
+    SERVER_GRACEFUL_TIMEOUT = float(os.environ.get('SERVER_GRACEFUL_TIMEOUT') or 30)
+    # 'orjson' (when installed) or 'default' for Flask's stdlib json provider
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'orjson'
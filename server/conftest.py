@@ -0,0 +1,123 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# Config reads the environment at import time: point it at a scratch database,
+# a long enough signing key and a cheap hash method before the app is imported
+_fd, DB_PATH = tempfile.mkstemp(suffix='.db')
+os.close(_fd)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['JWT_SECRET_KEY'] = 'a-signing-key-only-the-test-suite-uses'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db
+from models import User, Role, Cohort, Class, Project, ProjectMember
+import identity
+
+ADMIN_EMAIL = 'adminuser1@example.com'
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    # Tokens carry a dict identity, as the login route issues them
+    app.config.update(TESTING=True, JWT_VERIFY_SUB=False)
+    yield app
+    os.remove(DB_PATH)
+
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """A fresh schema per test with the two roles, an admin and a student."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Role(id=1, name='student'), Role(id=2, name='admin')])
+        db.session.add_all([
+            User(id=1, username='adminuser1', email=ADMIN_EMAIL, password_hash='x', role_id=2),
+            User(id=2, username='student1', email='student1@example.com', password_hash='x', role_id=1),
+        ])
+        db.session.commit()
+    identity.claims_cache.clear()
+    identity.principal_cache.clear()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    # Talisman redirects plain http
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    return client
+
+
+def token_for(app, user_id):
+    """An access token like the one /auth/login issues to ``user_id``."""
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return create_access_token(identity={'user_id': user.id, 'username': user.username, 'role_id': user.role_id})
+
+
+def auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin(app):
+    return auth(token_for(app, 1))
+
+
+@pytest.fixture
+def student(app):
+    return auth(token_for(app, 2))
+
+
+def add_class(name='Class A', cohort_name='Cohort A'):
+    """Add a cohort with one class; return the class id."""
+    cohort = Cohort(name=cohort_name, description='A test cohort')
+    class_ = Class(name=name, description='A test class', cohort=cohort)
+    db.session.add(class_)
+    db.session.commit()
+    return class_.id
+
+
+def add_projects(class_id, owner_id, count, members=()):
+    """Add ``count`` projects, each with the given member ids; return their ids."""
+    projects = [
+        Project(name=f'Project {i:04d}', description='A project long enough to pass validation',
+                github_link=f'https://github.com/test/p{i}', class_id=class_id, owner_id=owner_id)
+        for i in range(count)
+    ]
+    db.session.add_all(projects)
+    db.session.flush()
+    db.session.add_all(ProjectMember(project_id=p.id, user_id=u) for p in projects for u in members)
+    db.session.commit()
+    return [p.id for p in projects]
+
+
+@contextmanager
+def statements(app):
+    """Collect the SQL statements the app sends while the block runs."""
+    sent = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: sent.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        yield sent
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
@@ -0,0 +1,47 @@
+from flask import request
+from sqlalchemy.orm import joinedload, selectinload
+from models import User, Project, ProjectMember, Class
+
+# include name -> (loader options, tables the expansion reads)
+PROJECT_INCLUDES = {
+    'owner': (lambda: [joinedload(Project.owner)], ('user',)),
+    'members': (lambda: [selectinload(Project.project_members).joinedload(ProjectMember.user)],
+                ('project_member', 'user')),
+    'class': (lambda: [joinedload(Project.class_)], ('class',)),
+    'cohort': (lambda: [joinedload(Project.class_).joinedload(Class.cohort)], ('class', 'cohort')),
+}
+
+def requested_includes():
+    """Parse ``?include=a,b`` into a list of names; raises ValueError on unknown names."""
+    names = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in PROJECT_INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include(s): {', '.join(unknown)}")
+    return names
+
+def include_tables():
+    """Extra tables a project response reads, for the ETag of this request."""
+    names = request.args.get('include', '').split(',')
+    return [table for name in names if name.strip() in PROJECT_INCLUDES
+            for table in PROJECT_INCLUDES[name.strip()][1]]
+
+def project_options(includes):
+    """Eager-loading options so expansions cost a fixed number of queries."""
+    return [option for name in includes for option in PROJECT_INCLUDES[name][0]()]
+
+def embedded_user(user):
+    # Emails stay behind the admin-only /api/users
+    return {name: getattr(user, name) for name in User.embed_fields} if user else None
+
+def project_to_dict(project, includes, fields=Project.public_fields):
+    data = {name: getattr(project, name) for name in fields}
+    if 'owner' in includes:
+        data['owner'] = embedded_user(project.owner)
+    if 'members' in includes:
+        data['members'] = [embedded_user(pm.user) for pm in project.project_members if pm.user]
+    if 'class' in includes:
+        data['class'] = project.class_.to_dict() if project.class_ else None
+    if 'cohort' in includes:
+        cohort = project.class_.cohort if project.class_ else None
+        data['cohort'] = cohort.to_dict() if cohort else None
+    return data
@@ -0,0 +1,95 @@
+import csv
+import io
+import zlib
+
+from flask import current_app
+from models import User, Project, Class, ProjectMember
+from serialization import row_query
+from changes import SYNCED_MODELS, current_seq
+
+EXPORTS = {
+    'projects': Project,
+    'users': User,
+    'classes': Class,
+    'project_members': ProjectMember,
+}
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_CHUNK_SIZE = 1000
+
+def export_cursor(entity):
+    """The ``since`` to pass on the next incremental export of ``entity``, or None where ``since`` is an id."""
+    return current_seq() if EXPORTS[entity] in SYNCED_MODELS.values() else None
+
+def export_rows(model, since=None, until=None):
+    """Stream the model's public columns with a server-side cursor.
+
+    A full export runs in id order. For tables in the change feed
+    (changes.py) ``since`` is a change sequence number: rows created or
+    updated after it, up to ``until``, in change order. Deletes are only in
+    /api/changes. Users have no change sequence, so for them ``since`` is an
+    id cursor: only rows created after it.
+    """
+    fields = list(model.public_fields)
+    query = row_query(model, fields)
+    if since is None:
+        query = query.order_by(model.id)
+    elif model in SYNCED_MODELS.values():
+        query = query.filter(model.change_seq > since).order_by(model.change_seq)
+        if until is not None:
+            query = query.filter(model.change_seq <= until)
+    else:
+        query = query.filter(model.id > since).order_by(model.id)
+    return fields, query.execution_options(stream_results=True).yield_per(EXPORT_CHUNK_SIZE)
+
+def _chunks(rows, size=EXPORT_CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def encode_ndjson(fields, rows):
+    dumps = current_app.json.dumps
+    for chunk in _chunks(rows):
+        yield ''.join(dumps(dict(zip(fields, row))) + '\n' for row in chunk).encode()
+
+def encode_csv(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+ENCODERS = {
+    'ndjson': encode_ndjson,
+    'csv': encode_csv,
+}
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_stream(entity, fmt='ndjson', since=None, compress=False, until=None):
+    """Yield the encoded export of ``entity`` as bytes, in constant memory.
+
+    The query is only built once iteration starts, so a streamed response
+    reads through the session of the context it is streamed in.
+    """
+    fields, rows = export_rows(EXPORTS[entity], since, until)
+    chunks = ENCODERS[fmt](fields, rows)
+    yield from gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from threading import BoundedSemaphore, Lock
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashPoolSaturated(Exception):
+    """Raised when the hash queue is full or a hash outlives PASSWORD_HASH_TIMEOUT."""
+
+_lock = Lock()
+_pool = None
+_pool_pid = None
+_slots = None
+_method_prefixes = {}
+
+def _executor():
+    # One pool per process; a forked server worker must not reuse its parent's
+    global _pool, _pool_pid, _slots
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            config = current_app.config
+            _pool = ProcessPoolExecutor(
+                max_workers=config['PASSWORD_HASH_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_pid = os.getpid()
+            _slots = BoundedSemaphore(config['PASSWORD_HASH_WORKERS'] + config['PASSWORD_HASH_QUEUE_LIMIT'])
+        return _pool, _slots
+
+def _run(fn, *args):
+    if current_app.config['PASSWORD_HASH_WORKERS'] <= 0:
+        return fn(*args)
+
+    pool, slots = _executor()
+    if not slots.acquire(blocking=False):
+        raise HashPoolSaturated()
+    try:
+        future = pool.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    # The slot frees when the hash finishes, even if this request stopped waiting
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FuturesTimeout:
+        raise HashPoolSaturated()
+
+def hash_password(password):
+    """Hash ``password`` with PASSWORD_HASH_METHOD on the worker pool."""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+def hash_passwords(passwords):
+    """Hash many passwords on the worker pool for batch jobs; no queue limit or timeout applies."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if current_app.config['PASSWORD_HASH_WORKERS'] <= 0:
+        return [generate_password_hash(password, method) for password in passwords]
+    pool, _ = _executor()
+    return list(pool.map(generate_password_hash, passwords, repeat(method), chunksize=8))
+
+def verify_password(password_hash, password):
+    """Check ``password`` against ``password_hash`` on the worker pool."""
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True when ``password_hash`` was made with other parameters than PASSWORD_HASH_METHOD."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if method not in _method_prefixes:
+        # werkzeug fills in defaults (e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000')
+        _method_prefixes[method] = generate_password_hash('', method).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _method_prefixes[method]
@@ -0,0 +1,153 @@
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from threading import Lock
+
+from flask import g, request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, decode_token
+from sqlalchemy import select
+
+from app import db
+from models import User, Role, CollectionVersion
+
+Principal = namedtuple('Principal', ['user_id', 'username', 'role_id', 'role_name'])
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+# encoded JWT -> verified claims
+claims_cache = TTLCache()
+# identity key -> (Principal, versions of the user and role tables it was read at)
+principal_cache = TTLCache()
+
+# Writes to these bump their collection_version rows (caching.py) from any
+# process, so a cached Principal is only used while both are unchanged
+IDENTITY_TABLES = (User.__table__.name, Role.__table__.name)
+
+def init_app(app):
+    for cache in (claims_cache, principal_cache):
+        cache.maxsize = app.config['IDENTITY_CACHE_SIZE']
+        cache.ttl = app.config['IDENTITY_CACHE_TTL']
+
+def cache_stats():
+    return {'claims': claims_cache.stats(), 'principals': principal_cache.stats()}
+
+def principal_key(identity):
+    """Cache key for a token identity (``user_id``, ``id`` or ``username``)."""
+    user_id = identity.get('user_id', identity.get('id'))
+    return ('id', user_id) if user_id is not None else ('username', identity.get('username'))
+
+def principal_query(key):
+    column = User.id if key[0] == 'id' else User.username
+    return select(User.id, User.username, User.role_id, Role.name).join(User.role).where(column == key[1]).limit(1)
+
+def versions_query():
+    return (select(CollectionVersion.name, CollectionVersion.version)
+            .where(CollectionVersion.name.in_(IDENTITY_TABLES))
+            .order_by(CollectionVersion.name))
+
+def identity_versions(rows):
+    """Hashable versions of the user and role tables from ``versions_query()`` rows."""
+    return tuple(tuple(row) for row in rows)
+
+def cached_principal(key, versions):
+    """The cached Principal for ``key`` if it was read at ``versions``, else None."""
+    entry = principal_cache.get(key)
+    if entry is None or entry[1] != versions:
+        return None
+    return entry[0]
+
+def remember_principal(key, principal, versions):
+    principal_cache.set(key, (principal, versions))
+
+def resolve_principal(identity):
+    """Map a token identity (``user_id``, ``id`` or ``username``) to the current User/Role.
+
+    A cached Principal costs one primary-key read of the user and role
+    versions, which also catches deletes and role changes made by other
+    worker processes.
+    """
+    key = principal_key(identity)
+    # Versions first: a write that lands in between is seen as a change next time
+    versions = identity_versions(db.session.execute(versions_query()))
+    principal = cached_principal(key, versions)
+    if principal is None:
+        row = db.session.execute(principal_query(key)).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        remember_principal(key, principal, versions)
+    return principal
+
+def remember_claims(token, claims):
+    # Never keep verified claims past the token's own expiry
+    expires_in = claims['exp'] - time.time() if 'exp' in claims else None
+    claims_cache.set(token, claims, ttl=expires_in)
+
+def resolve_token(token):
+    """Verify ``token`` (raising on failure) and return its Principal, or None for unknown users."""
+    claims = claims_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        remember_claims(token, claims)
+    return resolve_principal(claims['sub'])
+
+def current_identity():
+    """Resolve the request's principal once and keep it on ``g``."""
+    if 'identity' not in g:
+        header = request.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else None
+        claims = claims_cache.get(token) if token else None
+        if claims is None:
+            # Let flask_jwt_extended verify and report errors as it always has
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if token:
+                remember_claims(token, claims)
+        g.identity = resolve_principal(claims['sub'])
+    return g.identity
+
+def identity_required(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if current_identity() is None:
+            return jsonify({'msg': 'User not found'}), 401
+        return fn(*args, **kwargs)
+    return wrapper
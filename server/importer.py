@@ -0,0 +1,147 @@
+import csv
+import gzip
+import json
+import os
+from itertools import islice
+
+from sqlalchemy import select
+from app import db
+from models import User, Role
+from bulk import bulk_create_users, bulk_save_projects, bulk_add_project_members
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Integer columns; CSV gives strings and both formats may leave them empty
+INT_FIELDS = {'id', 'role_id', 'class_id', 'owner_id', 'project_id', 'user_id'}
+
+class Lookup:
+    """In-memory ``key -> id`` table filled with one IN query per chunk for keys not seen before."""
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.table = {}
+
+    def load(self, keys):
+        missing = {key for key in keys if key is not None and key not in self.table}
+        if missing:
+            self.table.update(dict.fromkeys(missing))
+            self.table.update(db.session.execute(select(self.key, self.value).where(self.key.in_(missing))).all())
+
+    def get(self, key):
+        return self.table.get(key)
+
+def _resolve(chunk, errors, lookup, name, field):
+    # Replace ``name`` (e.g. owner_email) with ``field`` (owner_id) through ``lookup``
+    lookup.load(record.get(name) for record in chunk if isinstance(record, dict))
+    for offset, record in enumerate(chunk):
+        if isinstance(record, dict) and record.get(name) is not None:
+            value = lookup.get(record.pop(name))
+            if value is None:
+                errors[offset] = f'Unknown {name}'
+            else:
+                record[field] = value
+
+def _prepare_users(chunk, errors, lookups):
+    _resolve(chunk, errors, lookups.setdefault('role', Lookup(Role.name, Role.id)), 'role', 'role_id')
+
+def _prepare_projects(chunk, errors, lookups):
+    _resolve(chunk, errors, lookups.setdefault('owner', Lookup(User.email, User.id)), 'owner_email', 'owner_id')
+    for record in chunk:
+        if isinstance(record, dict):
+            record.pop('id', None)  # always create; exported ids belong to the source database
+
+def _prepare_members(chunk, errors, lookups):
+    _resolve(chunk, errors, lookups.setdefault('user', Lookup(User.email, User.id)), 'user_email', 'user_id')
+
+# entity -> (prepare records in place, save a chunk with the bulk helpers)
+IMPORTERS = {
+    'users': (_prepare_users, lambda items, principal: bulk_create_users(items)),
+    'projects': (_prepare_projects, bulk_save_projects),
+    'project_members': (_prepare_members, bulk_add_project_members),
+}
+
+def _coerce(record):
+    if not isinstance(record, dict):
+        return record
+    record = {key: (None if value == '' else value) for key, value in record.items()}
+    for key in INT_FIELDS & record.keys():
+        if isinstance(record[key], str):
+            try:
+                record[key] = int(record[key])
+            except ValueError:
+                return ValueError(f'{key} must be an integer')
+    return record
+
+def read_records(path, fmt=None):
+    """Yield records from a CSV or NDJSON file (optionally .gz); unparsable lines yield a ValueError."""
+    name = path[:-3] if path.endswith('.gz') else path
+    fmt = fmt or ('csv' if name.endswith('.csv') else 'ndjson')
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            yield from (_coerce(row) for row in csv.DictReader(f))
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield _coerce(json.loads(line))
+            except ValueError as e:
+                yield ValueError(f'Invalid JSON: {e}')
+
+def import_records(entity, records, principal, chunk_size, start=0, on_chunk=None):
+    """Save ``records`` in chunks of ``chunk_size``, committing once per chunk.
+
+    The first ``start`` records are skipped (a checkpoint from an earlier
+    run). After each commit ``on_chunk(done, results)`` is called with the
+    number of records handled so far and the chunk's results, whose
+    ``index`` is the record's position in the input.
+    """
+    prepare, save = IMPORTERS[entity]
+    lookups = {}
+    records = islice(records, start, None)
+    done = start
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return done
+        errors = {}
+        prepare(chunk, errors, lookups)
+
+        results = [None] * len(chunk)
+        items, positions = [], []
+        for offset, record in enumerate(chunk):
+            if isinstance(record, Exception):
+                error = str(record)
+            elif not isinstance(record, dict):
+                error = 'Record must be an object'
+            else:
+                error = errors.get(offset)
+            if error:
+                results[offset] = {'index': done + offset, 'status': 'error', 'error': error}
+            else:
+                items.append(record)
+                positions.append(offset)
+        for offset, result in zip(positions, save(items, principal) if items else []):
+            results[offset] = dict(result, index=done + offset)
+
+        done += len(chunk)
+        if on_chunk:
+            on_chunk(done, results)
+
+def load_checkpoint(path, entity):
+    """Records already committed by an earlier run of the same import, or 0."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('entity') != entity:
+        raise ValueError(f"Checkpoint {path} belongs to a {checkpoint.get('entity')} import")
+    return checkpoint['records']
+
+def save_checkpoint(path, entity, records):
+    # Write then rename, so a crash never leaves a truncated checkpoint
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'entity': entity, 'records': records}, f)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,53 @@
+from sqlalchemy import select, union
+
+from app import db
+from models import User, Project, ProjectMember
+
+PROJECT_ROLES = ('owner', 'member', 'any')
+
+def user_project_ids(user_id, role, after=None, limit=None):
+    """Select the ids of the projects ``user_id`` owns (``owner``), belongs to (``member``) or either.
+
+    Each side is a range scan of its index (project.owner_id,
+    project_member(user_id, project_id)) starting after the ``after`` cursor,
+    cut at ``limit`` before the UNION, so a page costs O(limit) whatever the
+    user's project count.
+    """
+    sides = []
+    if role in ('owner', 'any'):
+        sides.append((Project.id, Project.owner_id))
+    if role in ('member', 'any'):
+        sides.append((ProjectMember.project_id, ProjectMember.user_id))
+
+    selects = []
+    for id_column, user_column in sides:
+        side = select(id_column.label('id')).where(user_column == user_id)
+        if after is not None:
+            side = side.where(id_column > after)
+        if limit is not None:
+            # SQLite only allows LIMIT in a UNION member inside a subquery
+            side = select(side.order_by(id_column).limit(limit).subquery().c.id)
+        selects.append(side)
+    return union(*selects) if len(selects) > 1 else selects[0]
+
+def user_projects_statement(user_id, role, fields, after=None, limit=None):
+    """Select ``(user id, project id, *fields)`` rows of a user's projects.
+
+    The user row is outer-joined to the projects, so no rows means there is
+    no such user and a single row of NULL project columns means a user
+    without (more) projects.
+    """
+    ids = user_project_ids(user_id, role, after, limit).subquery()
+    columns = [Project.__table__.c[name] for name in fields]
+    query = (select(User.id, Project.id, *columns)
+             .select_from(User)
+             .outerjoin(Project, Project.id.in_(select(ids.c.id)))
+             .where(User.id == user_id)
+             .order_by(Project.id))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def user_projects(user_id, role, fields, after=None, limit=None):
+    """Fetch the rows of user_projects_statement() in one query."""
+    return db.session.execute(user_projects_statement(user_id, role, fields, after, limit)).all()
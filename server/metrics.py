@@ -0,0 +1,96 @@
+import hmac
+import os
+import time
+
+from flask import g, request, has_request_context, jsonify, current_app, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram, CollectorRegistry, multiprocess
+except ImportError:  # optional; /metrics is not registered without it
+    prometheus_client = None
+
+# Label values are endpoint names, never raw paths, to keep cardinality bounded
+_metrics = None
+
+def _create_metrics():
+    # In multi-process mode (PROMETHEUS_MULTIPROC_DIR set) values live in
+    # per-process files under that directory and /metrics sums them
+    return {
+        'requests': Counter('http_requests_total', 'Requests by endpoint and status',
+                            ['method', 'endpoint', 'status']),
+        'latency': Histogram('http_request_duration_seconds', 'Request latency until the response is returned',
+                             ['method', 'endpoint'],
+                             buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)),
+        'size': Histogram('http_response_size_bytes', 'Response body size (streamed bodies are not counted)',
+                          ['method', 'endpoint'], buckets=(100, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8)),
+        'sql_statements': Histogram('http_request_sql_statements', 'SQL statements executed per request',
+                                    ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500)),
+        'sql_duration': Histogram('http_request_sql_duration_seconds', 'Time spent in SQL per request',
+                                  ['endpoint'],
+                                  buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 5)),
+    }
+
+def init_app(app):
+    global _metrics
+    if not app.config['METRICS_ENABLED']:
+        return
+    if prometheus_client is None:
+        app.logger.warning('METRICS_ENABLED is set but prometheus_client is not installed; /metrics is disabled')
+        return
+    if _metrics is None:
+        _metrics = _create_metrics()
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    # Route names and latencies are not for the public: scraping takes a token
+    if not app.config['METRICS_TOKEN']:
+        app.logger.info('METRICS_TOKEN is not set; /metrics is not served')
+        return
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+def _record_request(response):
+    if 'metrics_start' not in g:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    _metrics['requests'].labels(method, endpoint, str(response.status_code)).inc()
+    _metrics['latency'].labels(method, endpoint).observe(time.perf_counter() - g.metrics_start)
+    if not response.is_streamed:
+        _metrics['size'].labels(method, endpoint).observe(response.calculate_content_length() or 0)
+    _metrics['sql_statements'].labels(endpoint).observe(g.sql_statements)
+    _metrics['sql_duration'].labels(endpoint).observe(g.sql_seconds)
+    return response
+
+def metrics_view():
+    expected = f"Bearer {current_app.config['METRICS_TOKEN']}"
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+        return jsonify({'message': 'Invalid metrics token'}), 401
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(prometheus_client.generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+def mark_process_dead(pid):
+    """Drop a finished worker's live-only values in multi-process mode; call from the server's parent."""
+    if prometheus_client is not None and 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,137 @@
+"""Add change feed
+
+Revision ID: 0b5e8af5d89f
+Revises: 400fb8b8505d
+Create Date: 2026-10-18 20:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b5e8af5d89f'
+down_revision = '400fb8b8505d'
+branch_labels = None
+depends_on = None
+
+# The change feed as of this revision, kept here rather than imported from
+# changes.py so later changes there do not alter what this revision runs
+SYNCED_TABLES = ('cohort', 'class', 'project', 'project_member')
+
+TRIGGERS = {
+    'changes_cohort_ai': """CREATE TRIGGER IF NOT EXISTS changes_cohort_ai AFTER INSERT ON cohort BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE cohort SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_cohort_au': """CREATE TRIGGER IF NOT EXISTS changes_cohort_au AFTER UPDATE OF name, description ON cohort BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE cohort SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_cohort_ad': """CREATE TRIGGER IF NOT EXISTS changes_cohort_ad AFTER DELETE ON cohort BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        INSERT INTO change_tombstone (seq, entity, entity_id, deleted_at)
+        VALUES ((SELECT seq FROM change_counter WHERE id = 1), 'cohort', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+    END""",
+    'changes_class_ai': """CREATE TRIGGER IF NOT EXISTS changes_class_ai AFTER INSERT ON class BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE class SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_class_au': """CREATE TRIGGER IF NOT EXISTS changes_class_au AFTER UPDATE OF name, description, cohort_id ON class BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE class SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_class_ad': """CREATE TRIGGER IF NOT EXISTS changes_class_ad AFTER DELETE ON class BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        INSERT INTO change_tombstone (seq, entity, entity_id, deleted_at)
+        VALUES ((SELECT seq FROM change_counter WHERE id = 1), 'class', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+    END""",
+    'changes_project_ai': """CREATE TRIGGER IF NOT EXISTS changes_project_ai AFTER INSERT ON project BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE project SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_project_au': """CREATE TRIGGER IF NOT EXISTS changes_project_au AFTER UPDATE OF name, description, owner_id, github_link, class_id, poster_url ON project BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE project SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_project_ad': """CREATE TRIGGER IF NOT EXISTS changes_project_ad AFTER DELETE ON project BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        INSERT INTO change_tombstone (seq, entity, entity_id, deleted_at)
+        VALUES ((SELECT seq FROM change_counter WHERE id = 1), 'project', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+    END""",
+    'changes_project_member_ai': """CREATE TRIGGER IF NOT EXISTS changes_project_member_ai AFTER INSERT ON project_member BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE project_member SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_project_member_au': """CREATE TRIGGER IF NOT EXISTS changes_project_member_au AFTER UPDATE OF project_id, user_id ON project_member BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        UPDATE project_member SET change_seq = (SELECT seq FROM change_counter WHERE id = 1), updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') WHERE id = new.id;
+    END""",
+    'changes_project_member_ad': """CREATE TRIGGER IF NOT EXISTS changes_project_member_ad AFTER DELETE ON project_member BEGIN
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        INSERT INTO change_tombstone (seq, entity, entity_id, deleted_at)
+        VALUES ((SELECT seq FROM change_counter WHERE id = 1), 'project_member', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+    END""",
+}
+
+COUNTER_INIT = 'INSERT INTO change_counter (id, seq) VALUES (1, 0)'
+
+
+def sequence_sql(table):
+    # Number the rows without a change_seq above every existing one
+    return [
+        f"""UPDATE {table} SET change_seq = (SELECT seq FROM change_counter WHERE id = 1) + id,
+                updated_at = COALESCE(updated_at, strftime('%Y-%m-%d %H:%M:%f000', 'now'))
+            WHERE change_seq IS NULL""",
+        f"""UPDATE change_counter SET seq = MAX(seq, COALESCE((SELECT MAX(change_seq) FROM {table}), 0))
+            WHERE id = 1""",
+    ]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('change_counter',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('change_tombstone',
+    sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('entity', sa.String(length=40), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('change_seq', sa.Integer(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_change_seq'), table, ['change_seq'], unique=False)
+    # ### end Alembic commands ###
+
+    op.execute(COUNTER_INIT)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # Number the rows that already exist, then keep numbering through triggers
+    for table in SYNCED_TABLES:
+        for statement in sequence_sql(table):
+            op.execute(statement)
+    for statement in TRIGGERS.values():
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for name in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    # Plain ALTER TABLE DROP COLUMN (SQLite 3.35+): a batch copy of the table
+    # would trip over the stats and search triggers that reference it
+    for table in reversed(SYNCED_TABLES):
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+
+    op.drop_table('change_tombstone')
+    op.drop_table('change_counter')
+    # ### end Alembic commands ###
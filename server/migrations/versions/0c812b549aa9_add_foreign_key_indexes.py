@@ -0,0 +1,42 @@
+"""Add foreign key indexes
+
+Revision ID: 0c812b549aa9
+Revises: 771d8bade00f
+Create Date: 2026-10-18 09:12:40.113027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c812b549aa9'
+down_revision = '771d8bade00f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate memberships so the unique index can be built
+    op.execute(
+        'DELETE FROM project_member WHERE id NOT IN '
+        '(SELECT MIN(id) FROM project_member GROUP BY project_id, user_id)'
+    )
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_project_class_id'), ['class_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_project_owner_id'), ['owner_id'], unique=False)
+
+    with op.batch_alter_table('project_member', schema=None) as batch_op:
+        batch_op.create_index('ix_project_member_project_id_user_id', ['project_id', 'user_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_project_member_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('project_member', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_project_member_user_id'))
+        batch_op.drop_index('ix_project_member_project_id_user_id')
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_project_owner_id'))
+        batch_op.drop_index(batch_op.f('ix_project_class_id'))
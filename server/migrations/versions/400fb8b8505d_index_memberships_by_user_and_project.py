@@ -0,0 +1,30 @@
+"""Index memberships by user and project
+
+Revision ID: 400fb8b8505d
+Revises: 7a4922b51461
+Create Date: 2026-10-18 18:05:12.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '400fb8b8505d'
+down_revision = '7a4922b51461'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (user_id, project_id) replaces the user_id index: it serves the same
+    # lookups and lists a user's projects in id order without touching the table
+    with op.batch_alter_table('project_member', schema=None) as batch_op:
+        batch_op.create_index('ix_project_member_user_id_project_id', ['user_id', 'project_id'], unique=True)
+        batch_op.drop_index('ix_project_member_user_id')
+
+
+def downgrade():
+    with op.batch_alter_table('project_member', schema=None) as batch_op:
+        batch_op.create_index('ix_project_member_user_id', ['user_id'], unique=False)
+        batch_op.drop_index('ix_project_member_user_id_project_id')
@@ -0,0 +1,33 @@
+"""Widen user.password_hash
+
+Revision ID: 6db51fe86927
+Revises: 80970e18d853
+Create Date: 2026-10-18 13:02:44.630195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6db51fe86927'
+down_revision = '80970e18d853'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt hashes are ~160 characters, longer than the old limit of 120
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=120),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=120),
+               existing_nullable=False)
@@ -0,0 +1,288 @@
+"""Add class and cohort statistics
+
+Revision ID: 7a4922b51461
+Revises: 6db51fe86927
+Create Date: 2026-10-18 14:40:08.771362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4922b51461'
+down_revision = '6db51fe86927'
+branch_labels = None
+depends_on = None
+
+# The statistics triggers and rebuild queries as of this revision, kept here
+# rather than imported from stats.py so later changes there do not alter it
+TRIGGERS = {
+    'stats_project_ai': """CREATE TRIGGER IF NOT EXISTS stats_project_ai AFTER INSERT ON project BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT new.class_id, 1, 1 * (SELECT COUNT(*) FROM project_member WHERE project_id = new.id), 0 WHERE new.class_id IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT new.class_id, new.owner_id, 1 WHERE new.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT new.class_id, user_id, 1 FROM project_member WHERE project_id = new.id AND new.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), 1, 1 * (SELECT COUNT(*) FROM project_member WHERE project_id = new.id), 0 WHERE (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), new.owner_id, 1 WHERE (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), user_id, 1 FROM project_member WHERE project_id = new.id AND (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_project_ad': """CREATE TRIGGER IF NOT EXISTS stats_project_ad AFTER DELETE ON project BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT old.class_id, -1, -1 * (SELECT COUNT(*) FROM project_member WHERE project_id = old.id), 0 WHERE old.class_id IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT old.class_id, old.owner_id, -1 WHERE old.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT old.class_id, user_id, -1 FROM project_member WHERE project_id = old.id AND old.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), -1, -1 * (SELECT COUNT(*) FROM project_member WHERE project_id = old.id), 0 WHERE (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), old.owner_id, -1 WHERE (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), user_id, -1 FROM project_member WHERE project_id = old.id AND (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_project_au': """CREATE TRIGGER IF NOT EXISTS stats_project_au AFTER UPDATE OF class_id, owner_id ON project WHEN old.class_id IS NOT new.class_id OR old.owner_id IS NOT new.owner_id BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT old.class_id, -1, -1 * (SELECT COUNT(*) FROM project_member WHERE project_id = old.id), 0 WHERE old.class_id IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT old.class_id, old.owner_id, -1 WHERE old.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT old.class_id, user_id, -1 FROM project_member WHERE project_id = old.id AND old.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), -1, -1 * (SELECT COUNT(*) FROM project_member WHERE project_id = old.id), 0 WHERE (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), old.owner_id, -1 WHERE (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = old.class_id), user_id, -1 FROM project_member WHERE project_id = old.id AND (SELECT cohort_id FROM class WHERE id = old.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT new.class_id, 1, 1 * (SELECT COUNT(*) FROM project_member WHERE project_id = new.id), 0 WHERE new.class_id IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT new.class_id, new.owner_id, 1 WHERE new.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT new.class_id, user_id, 1 FROM project_member WHERE project_id = new.id AND new.class_id IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), 1, 1 * (SELECT COUNT(*) FROM project_member WHERE project_id = new.id), 0 WHERE (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), new.owner_id, 1 WHERE (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = new.class_id), user_id, 1 FROM project_member WHERE project_id = new.id AND (SELECT cohort_id FROM class WHERE id = new.class_id) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_member_ai': """CREATE TRIGGER IF NOT EXISTS stats_member_ai AFTER INSERT ON project_member BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT (SELECT class_id FROM project WHERE id = new.project_id), 0, 1, 0 WHERE (SELECT class_id FROM project WHERE id = new.project_id) IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT (SELECT class_id FROM project WHERE id = new.project_id), new.user_id, 1 WHERE (SELECT class_id FROM project WHERE id = new.project_id) IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)), 0, 1, 0 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)), new.user_id, 1 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_member_ad': """CREATE TRIGGER IF NOT EXISTS stats_member_ad AFTER DELETE ON project_member BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT (SELECT class_id FROM project WHERE id = old.project_id), 0, -1, 0 WHERE (SELECT class_id FROM project WHERE id = old.project_id) IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT (SELECT class_id FROM project WHERE id = old.project_id), old.user_id, -1 WHERE (SELECT class_id FROM project WHERE id = old.project_id) IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)), 0, -1, 0 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)), old.user_id, -1 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_member_au': """CREATE TRIGGER IF NOT EXISTS stats_member_au AFTER UPDATE OF project_id, user_id ON project_member BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT (SELECT class_id FROM project WHERE id = old.project_id), 0, -1, 0 WHERE (SELECT class_id FROM project WHERE id = old.project_id) IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT (SELECT class_id FROM project WHERE id = old.project_id), old.user_id, -1 WHERE (SELECT class_id FROM project WHERE id = old.project_id) IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)), 0, -1, 0 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)), old.user_id, -1 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = old.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        SELECT (SELECT class_id FROM project WHERE id = new.project_id), 0, 1, 0 WHERE (SELECT class_id FROM project WHERE id = new.project_id) IS NOT NULL
+        ON CONFLICT (class_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO class_contributor (class_id, user_id, refs) SELECT (SELECT class_id FROM project WHERE id = new.project_id), new.user_id, 1 WHERE (SELECT class_id FROM project WHERE id = new.project_id) IS NOT NULL
+        ON CONFLICT (class_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)), 0, 1, 0 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)), new.user_id, 1 WHERE (SELECT cohort_id FROM class WHERE id = (SELECT class_id FROM project WHERE id = new.project_id)) IS NOT NULL
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_class_au': """CREATE TRIGGER IF NOT EXISTS stats_class_au AFTER UPDATE OF cohort_id ON class WHEN old.cohort_id IS NOT new.cohort_id BEGIN
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+            SELECT old.cohort_id, -1 * project_count, -1 * member_count, 0
+            FROM class_stats WHERE class_id = new.id
+            ON CONFLICT (cohort_id) DO UPDATE SET
+                project_count = project_count + excluded.project_count,
+                member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT old.cohort_id, user_id, -1 * refs FROM class_contributor WHERE class_id = new.id
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+            SELECT new.cohort_id, 1 * project_count, 1 * member_count, 0
+            FROM class_stats WHERE class_id = new.id
+            ON CONFLICT (cohort_id) DO UPDATE SET
+                project_count = project_count + excluded.project_count,
+                member_count = member_count + excluded.member_count;
+        INSERT INTO cohort_contributor (cohort_id, user_id, refs) SELECT new.cohort_id, user_id, 1 * refs FROM class_contributor WHERE class_id = new.id
+        ON CONFLICT (cohort_id, user_id) DO UPDATE SET refs = refs + excluded.refs;
+    END""",
+    'stats_class_contributor_ai': """CREATE TRIGGER IF NOT EXISTS stats_class_contributor_ai AFTER INSERT ON class_contributor WHEN new.refs > 0 BEGIN
+        UPDATE class_stats SET contributor_count = contributor_count + 1 WHERE class_id = new.class_id;
+    END""",
+    'stats_class_contributor_on': """CREATE TRIGGER IF NOT EXISTS stats_class_contributor_on AFTER UPDATE OF refs ON class_contributor WHEN old.refs <= 0 AND new.refs > 0 BEGIN
+        UPDATE class_stats SET contributor_count = contributor_count + 1 WHERE class_id = new.class_id;
+    END""",
+    'stats_class_contributor_off': """CREATE TRIGGER IF NOT EXISTS stats_class_contributor_off AFTER UPDATE OF refs ON class_contributor WHEN old.refs > 0 AND new.refs <= 0 BEGIN
+        UPDATE class_stats SET contributor_count = contributor_count - 1 WHERE class_id = new.class_id;
+        DELETE FROM class_contributor WHERE class_id = new.class_id AND user_id = new.user_id;
+    END""",
+    'stats_class_contributor_ad': """CREATE TRIGGER IF NOT EXISTS stats_class_contributor_ad AFTER DELETE ON class_contributor WHEN old.refs > 0 BEGIN
+        UPDATE class_stats SET contributor_count = contributor_count - 1 WHERE class_id = old.class_id;
+    END""",
+    'stats_cohort_contributor_ai': """CREATE TRIGGER IF NOT EXISTS stats_cohort_contributor_ai AFTER INSERT ON cohort_contributor WHEN new.refs > 0 BEGIN
+        UPDATE cohort_stats SET contributor_count = contributor_count + 1 WHERE cohort_id = new.cohort_id;
+    END""",
+    'stats_cohort_contributor_on': """CREATE TRIGGER IF NOT EXISTS stats_cohort_contributor_on AFTER UPDATE OF refs ON cohort_contributor WHEN old.refs <= 0 AND new.refs > 0 BEGIN
+        UPDATE cohort_stats SET contributor_count = contributor_count + 1 WHERE cohort_id = new.cohort_id;
+    END""",
+    'stats_cohort_contributor_off': """CREATE TRIGGER IF NOT EXISTS stats_cohort_contributor_off AFTER UPDATE OF refs ON cohort_contributor WHEN old.refs > 0 AND new.refs <= 0 BEGIN
+        UPDATE cohort_stats SET contributor_count = contributor_count - 1 WHERE cohort_id = new.cohort_id;
+        DELETE FROM cohort_contributor WHERE cohort_id = new.cohort_id AND user_id = new.user_id;
+    END""",
+    'stats_cohort_contributor_ad': """CREATE TRIGGER IF NOT EXISTS stats_cohort_contributor_ad AFTER DELETE ON cohort_contributor WHEN old.refs > 0 BEGIN
+        UPDATE cohort_stats SET contributor_count = contributor_count - 1 WHERE cohort_id = old.cohort_id;
+    END""",
+}
+
+REBUILD_SQL = [
+    'DELETE FROM class_contributor',
+    'DELETE FROM cohort_contributor',
+    'DELETE FROM class_stats',
+    'DELETE FROM cohort_stats',
+    """INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+       SELECT project.class_id, COUNT(*), COALESCE(SUM(members.n), 0), 0
+       FROM project
+       LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM project_member GROUP BY project_id) AS members
+           ON members.project_id = project.id
+       GROUP BY project.class_id""",
+    """INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+       SELECT class.cohort_id, SUM(class_stats.project_count), SUM(class_stats.member_count), 0
+       FROM class_stats JOIN class ON class.id = class_stats.class_id
+       GROUP BY class.cohort_id""",
+    """INSERT INTO class_contributor (class_id, user_id, refs)
+       SELECT class_id, user_id, COUNT(*) FROM (
+           SELECT class_id, owner_id AS user_id FROM project
+           UNION ALL
+           SELECT project.class_id, project_member.user_id
+           FROM project_member JOIN project ON project.id = project_member.project_id
+       ) AS contributions
+       GROUP BY class_id, user_id""",
+    """INSERT INTO cohort_contributor (cohort_id, user_id, refs)
+       SELECT class.cohort_id, class_contributor.user_id, SUM(class_contributor.refs)
+       FROM class_contributor JOIN class ON class.id = class_contributor.class_id
+       GROUP BY class.cohort_id, class_contributor.user_id""",
+]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('class_contributor',
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('refs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('class_id', 'user_id')
+    )
+    op.create_table('cohort_contributor',
+    sa.Column('cohort_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('refs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('cohort_id', 'user_id')
+    )
+    op.create_table('class_stats',
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('project_count', sa.Integer(), nullable=False),
+    sa.Column('member_count', sa.Integer(), nullable=False),
+    sa.Column('contributor_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['class.id'], ),
+    sa.PrimaryKeyConstraint('class_id')
+    )
+    op.create_table('cohort_stats',
+    sa.Column('cohort_id', sa.Integer(), nullable=False),
+    sa.Column('project_count', sa.Integer(), nullable=False),
+    sa.Column('member_count', sa.Integer(), nullable=False),
+    sa.Column('contributor_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cohort_id'], ['cohort.id'], ),
+    sa.PrimaryKeyConstraint('cohort_id')
+    )
+    # ### end Alembic commands ###
+
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in TRIGGERS.values():
+        op.execute(statement)
+    # Summarize the rows that already exist
+    for statement in REBUILD_SQL:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for name in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('cohort_stats')
+    op.drop_table('class_stats')
+    op.drop_table('cohort_contributor')
+    op.drop_table('class_contributor')
+    # ### end Alembic commands ###
@@ -0,0 +1,60 @@
+"""Add project full-text search
+
+Revision ID: 802a95136a38
+Revises: 0c812b549aa9
+Create Date: 2026-10-18 10:03:17.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '802a95136a38'
+down_revision = '0c812b549aa9'
+branch_labels = None
+depends_on = None
+
+# The search index as of this revision, kept here rather than imported from
+# search.py so later changes there do not alter what this revision runs
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5(
+        name, description,
+        content='project', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_ai AFTER INSERT ON project BEGIN
+        INSERT INTO project_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_ad AFTER DELETE ON project BEGIN
+        INSERT INTO project_fts(project_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_au AFTER UPDATE OF name, description ON project BEGIN
+        INSERT INTO project_fts(project_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO project_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+]
+FTS_TRIGGERS = ('project_fts_ai', 'project_fts_ad', 'project_fts_au')
+FTS_REBUILD = "INSERT INTO project_fts(project_fts) VALUES ('rebuild')"
+FTS_DROP = "DROP TABLE IF EXISTS project_fts"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    # Index the projects that already exist
+    op.execute(FTS_REBUILD)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in FTS_TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute(FTS_DROP)
@@ -0,0 +1,86 @@
+"""List empty classes and cohorts in stats
+
+Revision ID: 82299cee72cd
+Revises: 0b5e8af5d89f
+Create Date: 2026-10-18 21:04:37.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '82299cee72cd'
+down_revision = '0b5e8af5d89f'
+branch_labels = None
+depends_on = None
+
+# Give new classes and cohorts a zero row and drop it with them
+TRIGGERS = {
+    'stats_class_ai': """CREATE TRIGGER IF NOT EXISTS stats_class_ai AFTER INSERT ON class BEGIN
+        INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+        VALUES (new.id, 0, 0, 0) ON CONFLICT (class_id) DO NOTHING;
+    END""",
+    'stats_class_ad': """CREATE TRIGGER IF NOT EXISTS stats_class_ad AFTER DELETE ON class BEGIN
+        DELETE FROM class_contributor WHERE class_id = old.id;
+        DELETE FROM class_stats WHERE class_id = old.id;
+    END""",
+    'stats_cohort_ai': """CREATE TRIGGER IF NOT EXISTS stats_cohort_ai AFTER INSERT ON cohort BEGIN
+        INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+        VALUES (new.id, 0, 0, 0) ON CONFLICT (cohort_id) DO NOTHING;
+    END""",
+    'stats_cohort_ad': """CREATE TRIGGER IF NOT EXISTS stats_cohort_ad AFTER DELETE ON cohort BEGIN
+        DELETE FROM cohort_contributor WHERE cohort_id = old.id;
+        DELETE FROM cohort_stats WHERE cohort_id = old.id;
+    END""",
+}
+
+# Outer joins from class and cohort give empty ones a row of zeros
+REBUILD_SQL = [
+    'DELETE FROM class_contributor',
+    'DELETE FROM cohort_contributor',
+    'DELETE FROM class_stats',
+    'DELETE FROM cohort_stats',
+    """INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+       SELECT class.id, COUNT(project.id), COALESCE(SUM(members.n), 0), 0
+       FROM class
+       LEFT JOIN project ON project.class_id = class.id
+       LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM project_member GROUP BY project_id) AS members
+           ON members.project_id = project.id
+       GROUP BY class.id""",
+    """INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+       SELECT cohort.id, COALESCE(SUM(class_stats.project_count), 0), COALESCE(SUM(class_stats.member_count), 0), 0
+       FROM cohort
+       LEFT JOIN class ON class.cohort_id = cohort.id
+       LEFT JOIN class_stats ON class_stats.class_id = class.id
+       GROUP BY cohort.id""",
+    """INSERT INTO class_contributor (class_id, user_id, refs)
+       SELECT class_id, user_id, COUNT(*) FROM (
+           SELECT class_id, owner_id AS user_id FROM project
+           UNION ALL
+           SELECT project.class_id, project_member.user_id
+           FROM project_member JOIN project ON project.id = project_member.project_id
+       ) AS contributions
+       GROUP BY class_id, user_id""",
+    """INSERT INTO cohort_contributor (cohort_id, user_id, refs)
+       SELECT class.cohort_id, class_contributor.user_id, SUM(class_contributor.refs)
+       FROM class_contributor JOIN class ON class.id = class_contributor.class_id
+       GROUP BY class.cohort_id, class_contributor.user_id""",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in TRIGGERS.values():
+        op.execute(statement)
+    # Add zero rows for the classes and cohorts that have no projects yet
+    for statement in REBUILD_SQL:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for name in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
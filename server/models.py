@@ -1,20 +1,26 @@
 from app import db
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, DateTime
 from sqlalchemy.orm import relationship, validates
+from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     id = Column(Integer, primary_key=True)
     username = Column(String(80), unique=True, nullable=False)
-    password_hash = Column(String(120), nullable=False)
+    password_hash = Column(String(255), nullable=False)
     email = Column(String(120), unique=True, nullable=False)
     role_id = Column(Integer, ForeignKey('role.id'), nullable=False)
     role = relationship('Role', back_populates='users')
     projects = relationship('Project', back_populates='owner')
     project_memberships = relationship('ProjectMember', back_populates='user')
 
+    # Columns clients may select with ?fields=
+    public_fields = ('id', 'username', 'email', 'role_id')
+    # What any caller may see of a user embedded in another resource (?include=)
+    embed_fields = ('id', 'username')
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -44,6 +50,12 @@ class Cohort(db.Model):
     description = Column(String(200))
     classes = relationship('Class', back_populates='cohort')
 
+    # Stamped by the change-feed triggers (see changes.py)
+    updated_at = Column(DateTime)
+    change_seq = Column(Integer, index=True)
+
+    public_fields = ('id', 'name', 'description')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -59,6 +71,12 @@ class Class(db.Model):
     cohort = relationship('Cohort', back_populates='classes')
     projects = relationship('Project', back_populates='class_')
 
+    # Stamped by the change-feed triggers (see changes.py)
+    updated_at = Column(DateTime)
+    change_seq = Column(Integer, index=True)
+
+    public_fields = ('id', 'name', 'description', 'cohort_id')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -71,13 +89,19 @@ class Project(db.Model):
     id = Column(Integer, primary_key=True)
     name = Column(String(120), nullable=False)
     description = Column(String(500))
-    owner_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    owner_id = Column(Integer, ForeignKey('user.id'), nullable=False, index=True)
     github_link = Column(String(200))
     poster_url = Column(String(200))  # New column for poster URL
     owner = relationship('User', back_populates='projects')
-    class_id = Column(Integer, ForeignKey('class.id'), nullable=False)
+    class_id = Column(Integer, ForeignKey('class.id'), nullable=False, index=True)
     class_ = relationship('Class', back_populates='projects')
-    project_members = relationship('ProjectMember', back_populates='project')
+    project_members = relationship('ProjectMember', back_populates='project', cascade='all, delete-orphan')
+
+    # Stamped by the change-feed triggers (see changes.py)
+    updated_at = Column(DateTime)
+    change_seq = Column(Integer, index=True)
+
+    public_fields = ('id', 'name', 'description', 'owner_id', 'github_link', 'class_id', 'poster_url')
     
     @validates('name')
     def validate_name(self, key, name):
@@ -109,15 +133,94 @@ class Project(db.Model):
         }
 
 class ProjectMember(db.Model):
+    # The unique (project_id, user_id) index also serves lookups by project_id, and
+    # (user_id, project_id) serves lookups by user_id and a user's projects in id order
+    __table_args__ = (
+        Index('ix_project_member_project_id_user_id', 'project_id', 'user_id', unique=True),
+        Index('ix_project_member_user_id_project_id', 'user_id', 'project_id', unique=True),
+    )
+
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('project.id'), nullable=False)
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     project = relationship('Project', back_populates='project_members')
     user = relationship('User', back_populates='project_memberships')
 
+    # Stamped by the change-feed triggers (see changes.py)
+    updated_at = Column(DateTime)
+    change_seq = Column(Integer, index=True)
+
+    public_fields = ('id', 'project_id', 'user_id')
+
     def to_dict(self):
         return {
             'id': self.id,
             'project_id': self.project_id,
             'user_id': self.user_id
         }
+
+class CollectionVersion(db.Model):
+    # Revision counter per table, bumped on every write to it (see caching.py)
+    name = Column(String(80), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat()
+        }
+
+# Summary tables for /api/stats, maintained by triggers (see stats.py)
+class ClassStats(db.Model):
+    class_id = Column(Integer, ForeignKey('class.id'), primary_key=True)
+    project_count = Column(Integer, nullable=False, default=0)
+    member_count = Column(Integer, nullable=False, default=0)
+    contributor_count = Column(Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'class_id': self.class_id,
+            'project_count': self.project_count,
+            'member_count': self.member_count,
+            'contributor_count': self.contributor_count
+        }
+
+class CohortStats(db.Model):
+    cohort_id = Column(Integer, ForeignKey('cohort.id'), primary_key=True)
+    project_count = Column(Integer, nullable=False, default=0)
+    member_count = Column(Integer, nullable=False, default=0)
+    contributor_count = Column(Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'cohort_id': self.cohort_id,
+            'project_count': self.project_count,
+            'member_count': self.member_count,
+            'contributor_count': self.contributor_count
+        }
+
+# How many projects (as owner or member) each user contributes to a class/cohort
+class ClassContributor(db.Model):
+    class_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    refs = Column(Integer, nullable=False)
+
+class CohortContributor(db.Model):
+    cohort_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    refs = Column(Integer, nullable=False)
+
+# Change feed for /api/changes, maintained by triggers (see changes.py)
+class ChangeCounter(db.Model):
+    # A single row (id 1) holding the last sequence number handed out
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
+
+class ChangeTombstone(db.Model):
+    # One row per deleted cohort, class, project or membership
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    entity = Column(String(40), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import event
+from app import db
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+def tune_engine(engine, pragmas):
+    """Run ``pragmas`` on every new connection of a SQLite ``engine``; other dialects are left alone."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    event.listen(engine, 'connect', lambda dbapi_connection, record: apply_pragmas(dbapi_connection, pragmas))
+
+def init_app(app):
+    # Before anything connects, so every pooled connection is tuned
+    for engine in db.engines.values():
+        tune_engine(engine, app.config['SQLITE_PRAGMAS'])
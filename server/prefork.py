@@ -0,0 +1,157 @@
+"""Pre-forking server for production: ``flask serve``.
+
+The parent builds the app once (the Flask CLI already ran create_app()),
+binds the listening socket and forks SERVER_WORKERS workers that share the
+loaded code and data copy-on-write. Each worker serves SERVER_THREADS
+requests at a time on werkzeug's WSGI server and opens its own database
+pool. A worker exits gracefully after SERVER_MAX_REQUESTS requests (plus a
+random jitter so they don't all restart at once) and the parent forks a
+replacement; SIGTERM or SIGINT drains every worker and stops.
+"""
+import gc
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+import metrics
+from app import db
+
+class PooledWSGIServer(BaseWSGIServer):
+    """werkzeug server that handles requests on a fixed pool of ``threads``.
+
+    Accepting blocks while every thread is busy, leaving new connections in
+    the shared backlog for an idle sibling worker.
+    """
+    multithread = True
+
+    def __init__(self, host, port, app, threads, **kwargs):
+        self.executor = None
+        super().__init__(host, port, app, **kwargs)
+        self.slots = threading.BoundedSemaphore(threads)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='request')
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)  # let in-flight requests finish
+        super().server_close()
+
+def _worker(app, sock, host, port, threads, max_requests, ssl_context):
+    # Pooled connections were opened by the parent; drop them without closing
+    # the parent's sockets, so this process builds its own pool
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    server = PooledWSGIServer(host, port, app, threads, ssl_context=ssl_context, fd=sock.fileno())
+    stopping = threading.Event()
+
+    def stop(*args):
+        if not stopping.is_set():
+            stopping.set()
+            threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    served = 0
+    lock = threading.Lock()
+    wsgi_app = app.wsgi_app
+
+    def counting_app(environ, start_response):
+        nonlocal served
+        with lock:
+            served += 1
+            if max_requests and served >= max_requests:
+                stop()
+        return wsgi_app(environ, start_response)
+
+    server.app = counting_app
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def serve(app, host, port, workers, threads, max_requests, max_requests_jitter, graceful_timeout, ssl_context=None):
+    """Run ``app`` on ``workers`` forked processes until SIGTERM or SIGINT."""
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.set_inheritable(True)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # Objects loaded so far are shared with the workers; keep the collector
+    # from touching (and so copying) their pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        limit = max_requests + random.randint(0, max_requests_jitter) if max_requests else 0
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                _worker(app, sock, host, port, threads, limit, ssl_context)
+            except BaseException:
+                app.logger.exception('Worker %s crashed', os.getpid())
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if not stopping:
+            stopping = True
+            app.logger.info('Stopping %d workers', len(children))
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    app.logger.info('Serving on %s:%d with %d workers x %d threads', host, port, workers, threads)
+    for _ in range(workers):
+        spawn()
+
+    kill_at = None
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping:
+                kill_at = kill_at or time.monotonic() + graceful_timeout
+                if time.monotonic() > kill_at:
+                    for pid in children:
+                        os.kill(pid, signal.SIGKILL)
+            time.sleep(0.1)
+            continue
+        started = children.pop(pid, None)
+        if started is None:
+            continue
+        metrics.mark_process_dead(pid)
+        if not stopping:
+            if os.waitstatus_to_exitcode(status) != 0 and time.monotonic() - started < 1:
+                time.sleep(1)  # don't spin on a worker that dies at startup
+            spawn()
+    sock.close()
@@ -0,0 +1,91 @@
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Development aid, enabled with QUERY_DEBUG: logs statements slower than
+# SLOW_QUERY_THRESHOLD_MS with their parameters and plan, and flags requests
+# that run one statement shape more than N_PLUS_ONE_THRESHOLD times
+
+_settings = {}
+_logger = None
+_server_dir = os.path.dirname(os.path.abspath(__file__))
+
+def init_app(app):
+    global _logger
+    if not app.config['QUERY_DEBUG']:
+        return
+    _settings.update(
+        slow_seconds=app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000,
+        repeat_limit=app.config['N_PLUS_ONE_THRESHOLD'],
+    )
+    if _logger is None:
+        _logger = app.logger.getChild('sql')
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.teardown_request(_check_request)
+
+def _call_site():
+    # Innermost frame in this app's own modules, skipping this one
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_server_dir) and filename != __file__:
+            return f'{os.path.relpath(filename, _server_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+def _shape(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+def _explain(conn, statement, parameters):
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    # A raw DBAPI cursor, so the EXPLAIN itself does not come back through these hooks
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return '\n'.join(f'    {row[-1]}' for row in cursor.fetchall())
+    except Exception as e:
+        return f'    (EXPLAIN failed: {e})'
+    finally:
+        cursor.close()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('querylog_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['querylog_start'].pop()
+    site = None
+    if has_request_context() and 'query_shapes' in g:
+        site = _call_site()
+        g.query_shapes[(_shape(statement), site)] += 1
+
+    if elapsed >= _settings['slow_seconds'] and not (context is not None and context.isddl):
+        site = site or _call_site()
+        route = f' [{request.method} {request.endpoint}]' if has_request_context() else ''
+        if executemany:
+            parameters = f'{len(parameters)} rows, first {parameters[0]!r}' if parameters else parameters
+            plan = '    (executemany; not explained)'
+        else:
+            parameters, plan = repr(parameters), _explain(conn, statement, parameters)
+        _logger.warning('Slow query (%.1f ms) at %s%s:\n    %s\n    parameters: %s\n%s',
+                        elapsed * 1000, site, route, _shape(statement), parameters, plan)
+
+def _start_request():
+    g.query_shapes = Counter()
+
+def _check_request(exc):
+    shapes = g.pop('query_shapes', None)
+    if not shapes:
+        return
+    for (statement, site), count in shapes.most_common():
+        if count <= _settings['repeat_limit']:
+            break
+        _logger.warning('Possible N+1: %s %s (%s) ran the same statement %d times from %s:\n    %s',
+                        request.method, request.path, request.endpoint, count, site, statement)
@@ -0,0 +1,68 @@
+import sqlite3
+
+from flask import request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.elements import TextClause
+
+REPLICA_BIND = 'replica'
+
+def _is_read(clause):
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() in ('SELECT', 'WITH')
+    return getattr(clause, 'is_select', False)
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the ``replica`` bind once :func:`use_replica` is called.
+
+    Flushes, DML and raw connections always use the primary, and after the
+    first write the session reads from the primary too, so a request sees
+    its own writes. Without a replica bind everything uses the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is not None:
+            return self.bind  # joined to an outer transaction (flask batch --commit-every)
+        if bind is None and clause is not None:
+            if self._flushing or not _is_read(clause):
+                self.info['wrote'] = True
+            elif self.info.get('use_replica') and not self.info.get('wrote'):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        elif self._flushing:
+            self.info['wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def use_replica(session):
+    """Route this session's reads to the replica until it writes."""
+    session.info['use_replica'] = True
+
+def init_app(app):
+    db = app.extensions['sqlalchemy']
+
+    @app.before_request
+    def route_reads():
+        if request.method in ('GET', 'HEAD'):
+            use_replica(db.session)
+
+def sync_replica(db):
+    """Copy the primary SQLite database over the replica file with SQLite's online backup API.
+
+    Stands in for real replication when both binds are local SQLite files.
+    """
+    primary, replica = db.engines[None], db.engines.get(REPLICA_BIND)
+    if replica is None:
+        raise RuntimeError('No replica bind configured (set REPLICA_DATABASE_URL)')
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise RuntimeError('Only SQLite files can be synced this way; use the database\'s own replication')
+
+    replica.dispose()  # drop pooled readers before the file is overwritten
+    source = primary.raw_connection()
+    try:
+        target = sqlite3.connect(replica.url.database, uri=replica.url.query.get('uri') == 'true')
+        try:
+            source.driver_connection.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
@@ -1,31 +1,37 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import IntegrityError
 from app import db
 from models import User, Project, Cohort, Class, ProjectMember
-from functools import wraps
+from utils import list_response, role_required, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from search import find_projects
+from stats import STATS_FIELDS, stats_query
+from caching import conditional
+from identity import identity_required, current_identity, cache_stats
+from hashing import hash_password, verify_password, needs_rehash, HashPoolSaturated
+from bulk import bulk_save_projects, bulk_add_project_members, delete_users, reassign_admin_id
+from expand import requested_includes, include_tables, project_options, project_to_dict
+from serialization import requested_fields, row_query, row_serializer
+from export import EXPORTS, FORMATS, export_stream, export_cursor
+from memberships import PROJECT_ROLES, user_projects
+from changes import changes_since
 
 # Define Blueprints
 auth_bp = Blueprint('auth', __name__)
 api_bp = Blueprint('api', __name__)
 
-def role_required(role):
-    def decorator(fn):
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            identity = get_jwt_identity()
-            user_role = identity['role_id']
-            if user_role != role:
-                return jsonify({'message': 'Access forbidden: Insufficient role'}), 403
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
-
 # Basic Test Route
 @api_bp.route('/test', methods=['GET'])
 def test():
     return jsonify({'message': 'API is working!'}), 200
 
+# Password hashing is saturated: shed load instead of queueing without bound
+@auth_bp.errorhandler(HashPoolSaturated)
+def hash_pool_saturated(error):
+    response = jsonify({'message': 'Server busy, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # Registration Route
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -38,7 +44,7 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({'message': 'User already exists'}), 400
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
     new_user = User(username=username, email=email, password_hash=hashed_password, role_id=role_id)
     db.session.add(new_user)
     db.session.commit()
@@ -54,35 +60,86 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not verify_password(user.password_hash, password):
         return jsonify({'message': 'Invalid credentials'}), 401
 
-    access_token = create_access_token(identity={'username': user.username, 'role_id': user.role_id})
+    # Transparently move legacy hashes to the configured parameters; when the
+    # pool is busy the login still succeeds and a later one upgrades the hash
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = hash_password(password)
+            db.session.commit()
+        except HashPoolSaturated:
+            pass
+
+    access_token = create_access_token(identity={'user_id': user.id, 'username': user.username, 'role_id': user.role_id})
     return jsonify(access_token=access_token), 200
 
+# Identity Cache Statistics (Admin only)
+@auth_bp.route('/cache', methods=['GET'])
+@identity_required
+@role_required(2)  # Admin role
+def get_cache_stats():
+    return jsonify(cache_stats()), 200
+
 # Get all Projects
 @api_bp.route('/projects', methods=['GET'])
-@jwt_required()
+@identity_required
+@conditional('project', extra=include_tables)
 def get_projects():
-    projects = Project.query.all()
-    return jsonify([project.to_dict() for project in projects]), 200
+    try:
+        includes = requested_includes()
+        fields = requested_fields(Project.public_fields)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    if includes:
+        query = Project.query.options(*project_options(includes))
+        return list_response(query, Project.id, lambda project: project_to_dict(project, includes, fields))
+    return list_response(row_query(Project, fields), Project.id, row_serializer(fields))
+
+# Full-text Search over Projects
+@api_bp.route('/projects/search', methods=['GET'])
+@identity_required
+@conditional('project')
+def search_projects():
+    q = request.args.get('q', '')
+    if not q.strip():
+        return jsonify({'message': 'Query parameter q is required'}), 400
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+
+    results = find_projects(q, limit + 1, offset)
+    return jsonify({
+        'items': [
+            dict(project.to_dict(), rank=rank, highlights=highlights)
+            for project, rank, highlights in results[:limit]
+        ],
+        'next': offset + limit if len(results) > limit else None
+    }), 200
 
 # Get a Single Project
 @api_bp.route('/projects/<int:project_id>', methods=['GET'])
-@jwt_required()
+@identity_required
+@conditional('project', extra=include_tables)
 def get_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    return jsonify(project.to_dict()), 200
+    try:
+        includes = requested_includes()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    project = Project.query.options(*project_options(includes)).get_or_404(project_id)
+    return jsonify(project_to_dict(project, includes)), 200
 
 # Create a New Project
 @api_bp.route('/projects', methods=['POST'])
-@jwt_required()
+@identity_required
 def create_project():
     data = request.get_json()
     name = data.get('name')
     description = data.get('description')
     github_link = data.get('github_link')
-    owner_id = get_jwt_identity()['user_id']
+    owner_id = current_identity().user_id
     class_id = data.get('class_id')  # Include class_id in the request data
 
     new_project = Project(
@@ -96,13 +153,26 @@ def create_project():
     db.session.commit()
     return jsonify(new_project.to_dict()), 201
 
+# Create or Update Projects in Bulk
+@api_bp.route('/projects/bulk', methods=['POST'])
+@identity_required
+def bulk_projects():
+    items = request.get_json()
+    if not isinstance(items, list):
+        return jsonify({'message': 'Expected a JSON array of projects'}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'message': f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    results = bulk_save_projects(items, current_identity())
+    return jsonify({'results': results}), 200
+
 # Update a Project (Student can update only their own projects, Admin can update any project)
 @api_bp.route('/projects/<int:project_id>', methods=['PUT'])
-@jwt_required()
+@identity_required
 def update_project(project_id):
     project = Project.query.get_or_404(project_id)
-    user_id = get_jwt_identity()['user_id']
-    role_id = get_jwt_identity()['role_id']
+    user_id = current_identity().user_id
+    role_id = current_identity().role_id
 
     if role_id == 1 and project.owner_id != user_id:  # Student role
         return jsonify({'message': 'Access forbidden: You can only update your own projects'}), 403
@@ -117,7 +187,7 @@ def update_project(project_id):
 
 # Delete a Project (Admin only)
 @api_bp.route('/projects/<int:project_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 @role_required(2)  # Admin role
 def delete_project(project_id):
     project = Project.query.get_or_404(project_id)
@@ -127,18 +197,18 @@ def delete_project(project_id):
 
 # Get all Cohorts
 @api_bp.route('/cohorts', methods=['GET'])
-@jwt_required()
+@identity_required
+@conditional('cohort')
 def get_cohorts():
-    cohorts = Cohort.query.all()
-    return jsonify([{
-        'id': cohort.id,
-        'name': cohort.name,
-        'description': cohort.description
-    } for cohort in cohorts]), 200
+    try:
+        fields = requested_fields(Cohort.public_fields)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return list_response(row_query(Cohort, fields), Cohort.id, row_serializer(fields))
 
 # Create a New Cohort (Admin only)
 @api_bp.route('/cohorts', methods=['POST'])
-@jwt_required()
+@identity_required
 @role_required(2)  # Admin role
 def create_cohort():
     data = request.get_json()
@@ -155,14 +225,18 @@ def create_cohort():
 
 # Get all Classes
 @api_bp.route('/classes', methods=['GET'])
-@jwt_required()
+@identity_required
+@conditional('class')
 def get_classes():
-    classes = Class.query.all()
-    return jsonify([cls.to_dict() for cls in classes]), 200
+    try:
+        fields = requested_fields(Class.public_fields)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return list_response(row_query(Class, fields), Class.id, row_serializer(fields))
 
 # Create a New Class (Admin only)
 @api_bp.route('/classes', methods=['POST'])
-@jwt_required()
+@identity_required
 @role_required(2)  # Admin role
 def create_class():
     data = request.get_json()
@@ -181,22 +255,23 @@ def create_class():
 
 # Get all Project Members
 @api_bp.route('/project_members', methods=['GET'])
-@jwt_required()
+@identity_required
+@conditional('project_member')
 def get_project_members():
-    project_members = ProjectMember.query.all()
-    return jsonify([{
-        'project_id': pm.project_id,
-        'user_id': pm.user_id
-    } for pm in project_members]), 200
+    try:
+        fields = requested_fields(ProjectMember.public_fields, default=('project_id', 'user_id'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return list_response(row_query(ProjectMember, fields), ProjectMember.id, row_serializer(fields))
 
 # Create a Project Member (Student can assign themselves, Admin can assign any user)
 @api_bp.route('/project_members', methods=['POST'])
-@jwt_required()
+@identity_required
 def create_project_member():
     data = request.get_json()
     project_id = data.get('project_id')
-    user_id = get_jwt_identity()['user_id']
-    role_id = get_jwt_identity()['role_id']
+    user_id = current_identity().user_id
+    role_id = current_identity().role_id
     
     if role_id == 1:  # Student role
         if data.get('user_id') != user_id:
@@ -209,50 +284,183 @@ def create_project_member():
         user_id=user_id
     )
     db.session.add(new_project_member)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # Only the unique (project_id, user_id) index means a duplicate; a
+        # missing project_id or user_id violates NOT NULL instead
+        existing = ProjectMember.query.filter_by(project_id=project_id, user_id=user_id).first()
+        if existing:
+            return jsonify({'message': 'User is already a member of this project'}), 400
+        return jsonify({'message': 'project_id and user_id are required'}), 400
     return jsonify({
         'project_id': new_project_member.project_id,
         'user_id': new_project_member.user_id
     }), 201
 
+# Add Project Members in Bulk (Student can assign themselves, Admin can assign any user)
+@api_bp.route('/project_members/bulk', methods=['POST'])
+@identity_required
+def bulk_project_members():
+    items = request.get_json()
+    if not isinstance(items, list):
+        return jsonify({'message': 'Expected a JSON array of project members'}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'message': f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    results = bulk_add_project_members(items, current_identity())
+    return jsonify({'results': results}), 200
+
 # Get all Users (Admin only)
 @api_bp.route('/users', methods=['GET'])
-@jwt_required()
+@identity_required
 @role_required(2)  # Admin role
+@conditional('user')
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    try:
+        fields = requested_fields(User.public_fields)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return list_response(row_query(User, fields), User.id, row_serializer(fields))
 
 # Delete a User (Admin only)
 @api_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 @role_required(2)  # Admin role
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-
     # Reassign user's projects to another user (admin) before deleting the user
-    admin_user = User.query.filter_by(email='adminuser1@example.com').first()
-    if not admin_user:
+    admin_id = reassign_admin_id()
+    if not admin_id:
         return jsonify({'message': 'Admin user not found for reassignment'}), 404
+    if user_id == admin_id:
+        return jsonify({'message': 'Cannot delete the admin user used for reassignment'}), 400
 
-    for project in user.projects:
-        project.owner_id = admin_user.id
-
-    db.session.commit()
+    if not delete_users([user_id], admin_id):
+        return jsonify({'message': 'User not found'}), 404
+    return jsonify({'message': 'User deleted successfully'}), 200
 
-    # Delete user's project memberships
-    ProjectMember.query.filter_by(user_id=user_id).delete()
+# Delete many Users at once (Admin only)
+@api_bp.route('/users', methods=['DELETE'])
+@identity_required
+@role_required(2)  # Admin role
+def delete_user_batch():
+    data = request.get_json(silent=True) or {}
+    user_ids = data.get('ids')
+    if not isinstance(user_ids, list) or not all(isinstance(i, int) for i in user_ids):
+        return jsonify({'message': 'Expected {"ids": [<user id>, ...]}'}), 400
+    if len(user_ids) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'message': f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    admin_id = reassign_admin_id()
+    if not admin_id:
+        return jsonify({'message': 'Admin user not found for reassignment'}), 404
 
-    db.session.delete(user)
-    db.session.commit()
-    return jsonify({'message': 'User deleted successfully'}), 200
+    deleted = delete_users(user_ids, admin_id)
+    return jsonify({
+        'deleted': sorted(deleted),
+        'not_deleted': sorted(set(user_ids) - set(deleted))
+    }), 200
+
+def user_projects_response(user_id):
+    role = request.args.get('role', 'any')
+    if role not in PROJECT_ROLES:
+        return jsonify({'message': f'role must be one of {", ".join(PROJECT_ROLES)}'}), 400
+    try:
+        fields = requested_fields(Project.public_fields)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    limit = request.args.get('limit', type=int)
+    after = request.args.get('after', type=int)
+    paged = limit is not None or after is not None
+    if paged:
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+    rows = user_projects(user_id, role, fields, after, limit + 1 if paged else None)
+    if not rows:
+        return jsonify({'message': 'User not found'}), 404
+    rows = [row for row in rows if row[1] is not None]
+    items = [dict(zip(fields, row[2:])) for row in rows[:limit]]
+    if not paged:
+        return jsonify(items), 200
+    return jsonify({
+        'items': items,
+        'next': rows[limit - 1][1] if len(rows) > limit else None
+    }), 200
 
-# Get Projects for a Specific User
+# Get Projects a User Owns and/or Belongs to (?role=owner|member|any)
 @api_bp.route('/users/<int:user_id>/projects', methods=['GET'])
+@identity_required
+@conditional('project', 'project_member', 'user')
 def get_user_projects(user_id):
-    user = User.query.get_or_404(user_id)
-    projects = Project.query.filter_by(owner_id=user_id).all()
-    return jsonify([project.to_dict() for project in projects]), 200
+    return user_projects_response(user_id)
+
+# Get the Current User's Projects (?role=owner|member|any)
+@api_bp.route('/me/projects', methods=['GET'])
+@identity_required
+@conditional('project', 'project_member', 'user', scope=lambda: current_identity().user_id)
+def get_my_projects():
+    return user_projects_response(current_identity().user_id)
+
+# Changes to Cohorts, Classes, Projects and Memberships after a Sequence Number
+@api_bp.route('/changes', methods=['GET'])
+@identity_required
+@conditional('cohort', 'class', 'project', 'project_member')
+def get_changes():
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'message': 'since must be a non-negative integer sequence number'}), 400
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    items, more = changes_since(int(since), limit)
+    # Pass next back as since; an empty page keeps the client's cursor
+    return jsonify({
+        'items': items,
+        'next': items[-1]['seq'] if items else int(since),
+        'more': more
+    }), 200
+
+# Project, Member and Contributor Counts per Class
+@api_bp.route('/stats/classes', methods=['GET'])
+@identity_required
+@conditional('project', 'project_member', 'class', 'cohort')
+def get_class_stats():
+    query, key = stats_query('class')
+    return list_response(query, key, row_serializer(STATS_FIELDS['class']))
+
+# Project, Member and Contributor Counts per Cohort
+@api_bp.route('/stats/cohorts', methods=['GET'])
+@identity_required
+@conditional('project', 'project_member', 'class', 'cohort')
+def get_cohort_stats():
+    query, key = stats_query('cohort')
+    return list_response(query, key, row_serializer(STATS_FIELDS['cohort']))
+
+# Stream a Full or Incremental Export (users are Admin only)
+@api_bp.route('/export/<entity>', methods=['GET'])
+@identity_required
+def export(entity):
+    if entity not in EXPORTS:
+        return jsonify({'message': f"Unknown export: {entity}"}), 404
+    if entity == 'users' and current_identity().role_id != 2:
+        return jsonify({'message': 'Access forbidden: Insufficient role'}), 403
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'message': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    since = request.args.get('since')
+    if since is not None and not since.isdigit():
+        return jsonify({'message': 'since must be a non-negative integer'}), 400
+    compress = request.args.get('gzip') in ('1', 'true')
+
+    # Rows changed while the export streams wait for the next one
+    cursor = export_cursor(entity)
+    filename = f'{entity}.{fmt}' + ('.gz' if compress else '')
+    stream = export_stream(entity, fmt, int(since) if since else None, compress, cursor)
+    response = Response(stream_with_context(stream),
+                        mimetype='application/gzip' if compress else FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if cursor is not None:
+        response.headers['X-Export-Since'] = str(cursor)
+    return response
 
 # Register Blueprints
 def register_blueprints(app):
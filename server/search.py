@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, event, text
+from app import db
+from models import Project
+
+# External-content FTS5 index over project.name and project.description,
+# kept in sync by triggers so every write path (routes, CLI, seed) is covered.
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5(
+        name, description,
+        content='project', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_ai AFTER INSERT ON project BEGIN
+        INSERT INTO project_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_ad AFTER DELETE ON project BEGIN
+        INSERT INTO project_fts(project_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS project_fts_au AFTER UPDATE OF name, description ON project BEGIN
+        INSERT INTO project_fts(project_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO project_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+]
+FTS_TRIGGERS = ('project_fts_ai', 'project_fts_ad', 'project_fts_au')
+FTS_REBUILD = "INSERT INTO project_fts(project_fts) VALUES ('rebuild')"
+FTS_DROP = "DROP TABLE IF EXISTS project_fts"
+
+# Mirror the migration for databases built with db.create_all() (seed.py)
+for statement in FTS_DDL:
+    event.listen(Project.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Project.__table__, 'after_drop', DDL(FTS_DROP).execute_if(dialect='sqlite'))
+
+@contextmanager
+def fts_sync_deferred(session):
+    """Drop the sync triggers for a bulk load, then restore them and rebuild the index once."""
+    if session.get_bind().dialect.name != 'sqlite':
+        yield
+        return
+    for trigger in FTS_TRIGGERS:
+        session.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    try:
+        yield
+    finally:
+        for statement in FTS_DDL[1:]:
+            session.execute(text(statement))
+        session.execute(text(FTS_REBUILD))
+        session.commit()
+
+SEARCH_SQL = text("""
+    SELECT rowid AS id,
+           bm25(project_fts) AS rank,
+           highlight(project_fts, 0, '<mark>', '</mark>') AS name,
+           snippet(project_fts, 1, '<mark>', '</mark>', '...', 16) AS description
+    FROM project_fts
+    WHERE project_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+def match_query(q):
+    """Turn free text into an FTS5 query: every term must match, the last one as a prefix."""
+    terms = ['"%s"' % term.replace('"', '""') for term in q.split()]
+    if not terms:
+        return None
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def find_projects(q, limit, offset=0):
+    """Return ``(project, rank, highlights)`` tuples for a page of bm25-ranked matches."""
+    query = match_query(q)
+    if query is None:
+        return []
+
+    hits = db.session.execute(SEARCH_SQL, {'query': query, 'limit': limit, 'offset': offset}).all()
+    projects = {
+        project.id: project
+        for project in Project.query.filter(Project.id.in_([hit.id for hit in hits]))
+    }
+    return [
+        (projects[hit.id], hit.rank, {'name': hit.name, 'description': hit.description})
+        for hit in hits if hit.id in projects
+    ]
@@ -0,0 +1,55 @@
+from flask import request
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+from app import db
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib provider
+    orjson = None
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson. Keys are emitted in insertion order."""
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option)
+        return self._app.response_class(body, mimetype='application/json')
+
+def init_app(app):
+    if app.config['JSON_PROVIDER'] == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+
+def requested_fields(allowed, default=None):
+    """Columns named by ``?fields=a,b``, else ``default`` (all of ``allowed``).
+
+    Raises ValueError on names outside ``allowed``.
+    """
+    return parse_fields(request.args.get('fields', ''), allowed, default)
+
+def parse_fields(value, allowed, default=None):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        return list(default or allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+def row_query(model, fields, key='id'):
+    """Select only ``fields`` (plus the paging ``key``) as plain rows, skipping the ORM instances."""
+    columns = [model.__table__.c[name] for name in fields]
+    if key not in fields:
+        columns.append(model.__table__.c[key])
+    return db.session.query(*columns)
+
+def row_serializer(fields):
+    # The requested columns come first in every row; a trailing paging key is dropped
+    return lambda row: dict(zip(fields, row))
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter so nothing is imported yet
+PROFILE_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported,
+                  'phases': application.extensions['startup_timings']}))
+'''
+
+def import_times(stderr):
+    """Sum ``python -X importtime`` self times (in seconds) per top-level package."""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us) / 1e6
+    return totals
+
+def profile_build(build):
+    """Import the app and run create_app(build) in a new interpreter, returning its timings.
+
+    The result has the seconds spent importing ``app`` and in create_app(),
+    the per-phase create_app() timings and the import times per package.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT, build],
+                             cwd=SERVER_DIR, capture_output=True, text=True)
+    if process.returncode:
+        raise RuntimeError(f'create_app({build!r}) failed:\n{process.stderr[-2000:]}')
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['packages'] = import_times(process.stderr)
+    return result
@@ -0,0 +1,192 @@
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, event, text
+from app import db
+from models import ClassStats, CohortStats
+from serialization import row_query
+
+# Project and membership counts per class and cohort are kept in class_stats /
+# cohort_stats by triggers, so every write path (routes, bulk endpoints, CLI,
+# seed) updates them in the same transaction. Distinct contributors are
+# tracked through per-user reference counts in class_contributor /
+# cohort_contributor; a row exists while the user owns or is a member of at
+# least one project in that class or cohort.
+
+def _scopes(class_id):
+    return (('class', class_id), ('cohort', f'(SELECT cohort_id FROM class WHERE id = {class_id})'))
+
+def _add_stats(scope, key, projects, members):
+    return f"""INSERT INTO {scope}_stats ({scope}_id, project_count, member_count, contributor_count)
+        SELECT {key}, {projects}, {members}, 0 WHERE {key} IS NOT NULL
+        ON CONFLICT ({scope}_id) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            member_count = member_count + excluded.member_count;"""
+
+def _add_refs(scope, select):
+    return f"""INSERT INTO {scope}_contributor ({scope}_id, user_id, refs) {select}
+        ON CONFLICT ({scope}_id, user_id) DO UPDATE SET refs = refs + excluded.refs;"""
+
+def _project(row, sign):
+    # A project counts once, plus its members, and gives its owner and members one reference each
+    statements = []
+    for scope, key in _scopes(f'{row}.class_id'):
+        statements += [
+            _add_stats(scope, key, sign, f'{sign} * (SELECT COUNT(*) FROM project_member WHERE project_id = {row}.id)'),
+            _add_refs(scope, f'SELECT {key}, {row}.owner_id, {sign} WHERE {key} IS NOT NULL'),
+            _add_refs(scope, f'SELECT {key}, user_id, {sign} FROM project_member '
+                             f'WHERE project_id = {row}.id AND {key} IS NOT NULL'),
+        ]
+    return statements
+
+def _member(row, sign):
+    statements = []
+    for scope, key in _scopes(f'(SELECT class_id FROM project WHERE id = {row}.project_id)'):
+        statements += [
+            _add_stats(scope, key, 0, sign),
+            _add_refs(scope, f'SELECT {key}, {row}.user_id, {sign} WHERE {key} IS NOT NULL'),
+        ]
+    return statements
+
+def _class_cohort(cohort_id, sign):
+    return [
+        f"""INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+            SELECT {cohort_id}, {sign} * project_count, {sign} * member_count, 0
+            FROM class_stats WHERE class_id = new.id
+            ON CONFLICT (cohort_id) DO UPDATE SET
+                project_count = project_count + excluded.project_count,
+                member_count = member_count + excluded.member_count;""",
+        _add_refs('cohort', f'SELECT {cohort_id}, user_id, {sign} * refs FROM class_contributor WHERE class_id = new.id'),
+    ]
+
+def _zero_row(scope):
+    # Every class and cohort has a stats row, so empty ones are listed with zero counts
+    return f"""INSERT INTO {scope}_stats ({scope}_id, project_count, member_count, contributor_count)
+        VALUES (new.id, 0, 0, 0) ON CONFLICT ({scope}_id) DO NOTHING;"""
+
+def _drop_rows(scope):
+    return [f'DELETE FROM {scope}_contributor WHERE {scope}_id = old.id;',
+            f'DELETE FROM {scope}_stats WHERE {scope}_id = old.id;']
+
+def _trigger(name, event_, table, statements, when=None):
+    when = f' WHEN {when}' if when else ''
+    body = '\n        '.join(statements)
+    return f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {event_} ON {table}{when} BEGIN
+        {body}
+    END"""
+
+# Write triggers on the base tables; dropped during bulk loads
+SOURCE_TRIGGERS = {
+    'stats_project_ai': ('INSERT', 'project', _project('new', 1), None),
+    'stats_project_ad': ('DELETE', 'project', _project('old', -1), None),
+    'stats_project_au': ('UPDATE OF class_id, owner_id', 'project', _project('old', -1) + _project('new', 1),
+                         'old.class_id IS NOT new.class_id OR old.owner_id IS NOT new.owner_id'),
+    'stats_member_ai': ('INSERT', 'project_member', _member('new', 1), None),
+    'stats_member_ad': ('DELETE', 'project_member', _member('old', -1), None),
+    'stats_member_au': ('UPDATE OF project_id, user_id', 'project_member', _member('old', -1) + _member('new', 1), None),
+    'stats_class_au': ('UPDATE OF cohort_id', 'class', _class_cohort('old.cohort_id', -1) + _class_cohort('new.cohort_id', 1),
+                       'old.cohort_id IS NOT new.cohort_id'),
+    'stats_class_ai': ('INSERT', 'class', [_zero_row('class')], None),
+    'stats_class_ad': ('DELETE', 'class', _drop_rows('class'), None),
+    'stats_cohort_ai': ('INSERT', 'cohort', [_zero_row('cohort')], None),
+    'stats_cohort_ad': ('DELETE', 'cohort', _drop_rows('cohort'), None),
+}
+
+# contributor_count follows the number of contributor rows with refs > 0
+CONTRIBUTOR_TRIGGERS = {}
+for _scope in ('class', 'cohort'):
+    _count = f'UPDATE {_scope}_stats SET contributor_count = contributor_count {{}} 1 WHERE {_scope}_id = {{}}.{_scope}_id;'
+    CONTRIBUTOR_TRIGGERS.update({
+        f'stats_{_scope}_contributor_ai': ('INSERT', f'{_scope}_contributor', [_count.format('+', 'new')], 'new.refs > 0'),
+        f'stats_{_scope}_contributor_on': ('UPDATE OF refs', f'{_scope}_contributor', [_count.format('+', 'new')],
+                                           'old.refs <= 0 AND new.refs > 0'),
+        f'stats_{_scope}_contributor_off': ('UPDATE OF refs', f'{_scope}_contributor', [
+            _count.format('-', 'new'),
+            f'DELETE FROM {_scope}_contributor WHERE {_scope}_id = new.{_scope}_id AND user_id = new.user_id;',
+        ], 'old.refs > 0 AND new.refs <= 0'),
+        f'stats_{_scope}_contributor_ad': ('DELETE', f'{_scope}_contributor', [_count.format('-', 'old')], 'old.refs > 0'),
+    })
+
+TRIGGER_DDL = {
+    name: _trigger(name, event_, table, statements, when)
+    for name, (event_, table, statements, when) in {**SOURCE_TRIGGERS, **CONTRIBUTOR_TRIGGERS}.items()
+}
+
+REBUILD_SQL = [
+    'DELETE FROM class_contributor',
+    'DELETE FROM cohort_contributor',
+    'DELETE FROM class_stats',
+    'DELETE FROM cohort_stats',
+    # Outer joins from class and cohort give empty ones a row of zeros
+    """INSERT INTO class_stats (class_id, project_count, member_count, contributor_count)
+       SELECT class.id, COUNT(project.id), COALESCE(SUM(members.n), 0), 0
+       FROM class
+       LEFT JOIN project ON project.class_id = class.id
+       LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM project_member GROUP BY project_id) AS members
+           ON members.project_id = project.id
+       GROUP BY class.id""",
+    """INSERT INTO cohort_stats (cohort_id, project_count, member_count, contributor_count)
+       SELECT cohort.id, COALESCE(SUM(class_stats.project_count), 0), COALESCE(SUM(class_stats.member_count), 0), 0
+       FROM cohort
+       LEFT JOIN class ON class.cohort_id = cohort.id
+       LEFT JOIN class_stats ON class_stats.class_id = class.id
+       GROUP BY cohort.id""",
+    # contributor_count is filled in by the contributor triggers
+    """INSERT INTO class_contributor (class_id, user_id, refs)
+       SELECT class_id, user_id, COUNT(*) FROM (
+           SELECT class_id, owner_id AS user_id FROM project
+           UNION ALL
+           SELECT project.class_id, project_member.user_id
+           FROM project_member JOIN project ON project.id = project_member.project_id
+       ) AS contributions
+       GROUP BY class_id, user_id""",
+    """INSERT INTO cohort_contributor (cohort_id, user_id, refs)
+       SELECT class.cohort_id, class_contributor.user_id, SUM(class_contributor.refs)
+       FROM class_contributor JOIN class ON class.id = class_contributor.class_id
+       GROUP BY class.cohort_id, class_contributor.user_id""",
+]
+
+# Mirror the migration for databases built with db.create_all() (seed.py)
+for _ddl in TRIGGER_DDL.values():
+    event.listen(db.metadata, 'after_create', DDL(_ddl).execute_if(dialect='sqlite'))
+
+def init_app(app):
+    """Refuse to start on a database without the stats triggers.
+
+    /api/stats reads only the summary tables, which nothing but the SQLite
+    triggers keeps current; on another database they would go stale silently.
+    """
+    dialect = db.engine.dialect.name
+    if dialect != 'sqlite':
+        raise RuntimeError(f'SQLALCHEMY_DATABASE_URI must be a SQLite database: the statistics '
+                           f'tables are maintained by SQLite triggers, not available on {dialect}')
+
+def rebuild_stats(session):
+    """Recompute every summary row from the base tables with GROUP BY queries."""
+    for statement in REBUILD_SQL:
+        session.execute(text(statement))
+    session.commit()
+
+@contextmanager
+def stats_sync_deferred(session):
+    """Drop the per-row stats triggers for a bulk load, then restore them and rebuild once."""
+    if session.get_bind().dialect.name != 'sqlite':
+        yield
+        return
+    for name in SOURCE_TRIGGERS:
+        session.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+    try:
+        yield
+    finally:
+        for name in SOURCE_TRIGGERS:
+            session.execute(text(TRIGGER_DDL[name]))
+        rebuild_stats(session)
+
+STATS_FIELDS = {
+    'class': ('class_id', 'project_count', 'member_count', 'contributor_count'),
+    'cohort': ('cohort_id', 'project_count', 'member_count', 'contributor_count'),
+}
+
+def stats_query(scope):
+    """``(query, key)`` for the rows of /api/stats/<scope>, in STATS_FIELDS order."""
+    model = ClassStats if scope == 'class' else CohortStats
+    return row_query(model, STATS_FIELDS[scope], key=f'{scope}_id'), getattr(model, f'{scope}_id')
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('aiosqlite')
+httpx = pytest.importorskip('httpx')
+
+from conftest import add_class, add_projects
+
+
+@pytest.fixture
+def run(app, monkeypatch):
+    """Run a coroutine with an httpx client for the ASGI app on a fresh event loop."""
+    # Imported after the test app, which the CLI commands are registered on
+    import asgi
+    # The watcher and pooled aiosqlite connections belong to one loop
+    monkeypatch.setattr(asgi, 'watcher', asgi.VersionWatcher())
+    monkeypatch.setitem(asgi.flask_app.config, 'LONG_POLL_INTERVAL', 0.02)
+    monkeypatch.setitem(asgi.flask_app.config, 'JWT_VERIFY_SUB', False)
+
+    def run(test):
+        async def main():
+            transport = httpx.ASGITransport(app=asgi.app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url='https://testserver') as client:
+                    return await test(client)
+            finally:
+                await asgi.engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def projects(app):
+    with app.app_context():
+        return add_projects(add_class(), 2, 5, members=[1])
+
+
+SECURITY_HEADERS = ('Strict-Transport-Security', 'X-Frame-Options', 'X-Content-Type-Options',
+                    'Content-Security-Policy', 'Referrer-Policy', 'Permissions-Policy')
+
+PATHS = [
+    '/api/test',
+    '/api/projects',
+    '/api/projects?limit=2',
+    '/api/projects?limit=2&after={first}',
+    '/api/projects?fields=id,name',
+    '/api/projects?fields=password_hash',
+    '/api/projects?include=owner,members',
+    '/api/projects?stream=1',
+    '/api/projects/{first}',
+    '/api/projects/9999',
+    '/api/cohorts',
+    '/api/classes',
+    '/api/project_members',
+    '/api/users',
+    '/api/stats/classes',
+    '/api/stats/cohorts',
+]
+
+
+@pytest.mark.parametrize('path', PATHS)
+@pytest.mark.parametrize('role', ['admin', 'student'])
+def test_both_builds_answer_alike(client, run, projects, path, role, request):
+    headers = request.getfixturevalue(role)
+    path = path.format(first=projects[0])
+    expected = client.get(path, headers=headers)
+    r = run(lambda asgi_client: asgi_client.get(path, headers=headers))
+    assert r.status_code == expected.status_code
+    assert r.headers.get('Content-Type') == expected.headers.get('Content-Type')
+    if expected.is_json:
+        assert r.json() == expected.get_json()
+    else:
+        assert r.content == expected.get_data()
+    assert r.headers.get('ETag') == expected.headers.get('ETag')
+    for header in SECURITY_HEADERS:
+        assert r.headers.get(header) == expected.headers[header]
+
+
+def test_missing_token_is_rejected_alike(client, run):
+    expected = client.get('/api/projects')
+    r = run(lambda asgi_client: asgi_client.get('/api/projects'))
+    assert (r.status_code, r.json()) == (expected.status_code, expected.get_json())
+
+
+def test_plain_http_is_redirected(run):
+    r = run(lambda asgi_client: asgi_client.get('http://testserver/api/projects'))
+    assert r.status_code == 302
+    assert r.headers['Location'] == 'https://testserver/api/projects'
+    assert r.headers['X-Frame-Options'] == 'SAMEORIGIN'
+    assert 'Strict-Transport-Security' not in r.headers
+
+
+def test_long_poll_returns_when_the_collection_changes(run, admin):
+    async def test(asgi_client):
+        etag = (await asgi_client.get('/api/cohorts', headers=admin)).headers['ETag']
+        poll = asyncio.create_task(
+            asgi_client.get('/api/cohorts?wait=5', headers=dict(admin, **{'If-None-Match': etag})))
+        await asyncio.sleep(0.1)
+        assert not poll.done()
+        r = await asgi_client.post('/api/cohorts', json={'name': 'New', 'description': 'Fresh'}, headers=admin)
+        assert r.status_code == 201
+        return await asyncio.wait_for(poll, 2)
+
+    r = run(test)
+    assert r.status_code == 200
+    assert [c['name'] for c in r.json()] == ['New']
+
+
+def test_long_poll_times_out_with_304(run, admin):
+    async def test(asgi_client):
+        etag = (await asgi_client.get('/api/cohorts', headers=admin)).headers['ETag']
+        started = time.monotonic()
+        r = await asgi_client.get('/api/cohorts?wait=0.2', headers=dict(admin, **{'If-None-Match': etag}))
+        return r, time.monotonic() - started
+
+    r, elapsed = run(test)
+    assert r.status_code == 304
+    assert elapsed >= 0.2
+
+
+def test_long_poll_keeps_the_query_encoding(client, run, admin):
+    etag = client.get('/api/cohorts?fields=id,name', headers=admin).headers['ETag']
+
+    async def test(asgi_client):
+        started = time.monotonic()
+        r = await asgi_client.get('/api/cohorts?fields=id,name&wait=0.2',
+                                  headers=dict(admin, **{'If-None-Match': etag}))
+        return r, time.monotonic() - started
+
+    r, elapsed = run(test)
+    assert r.status_code == 304
+    assert r.headers['ETag'] == etag
+    assert elapsed >= 0.2
+
+
+def test_wait_must_be_a_number(run, admin):
+    r = run(lambda asgi_client: asgi_client.get('/api/cohorts?wait=soon', headers=admin))
+    assert r.status_code == 400
+    assert r.json() == {'message': 'wait must be a number of seconds'}
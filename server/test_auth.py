@@ -0,0 +1,100 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+from models import User
+import hashing
+
+CREDENTIALS = {'email': 'student1@example.com', 'password': 'studentpassword'}
+
+
+@pytest.fixture
+def hash_pool(app, monkeypatch):
+    """Hash on a one-process pool with no queue; yield its slot semaphore."""
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_QUEUE_LIMIT', 0)
+    with app.app_context():
+        pool, slots = hashing._executor()
+    yield slots
+    pool.shutdown()
+    # The next test that hashes on a pool starts a new one
+    hashing._pool = None
+
+
+def set_password_hash(app, password_hash):
+    with app.app_context():
+        db.session.get(User, 2).password_hash = password_hash
+        db.session.commit()
+
+
+def stored_hash(app):
+    with app.app_context():
+        return db.session.get(User, 2).password_hash
+
+
+def test_register_then_login(client):
+    r = client.post('/auth/register', json={'username': 'new', 'email': 'new@example.com', 'password': 'pw'})
+    assert r.status_code == 201
+    r = client.post('/auth/login', json={'email': 'new@example.com', 'password': 'pw'})
+    assert r.status_code == 200
+    assert r.get_json()['access_token']
+
+
+def test_wrong_password_is_rejected(app, client):
+    set_password_hash(app, generate_password_hash('other', 'pbkdf2:sha256:1000'))
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 401
+
+
+def test_login_upgrades_a_legacy_hash(app, client):
+    set_password_hash(app, generate_password_hash(CREDENTIALS['password'], 'pbkdf2:sha256:600'))
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+
+    upgraded = stored_hash(app)
+    assert upgraded.startswith('pbkdf2:sha256:1000$')
+    # Logging in again leaves the upgraded hash alone
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) == upgraded
+
+
+def test_current_hash_is_kept(app, client):
+    current = generate_password_hash(CREDENTIALS['password'], 'pbkdf2:sha256:1000')
+    set_password_hash(app, current)
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) == current
+
+
+def test_login_hashes_on_the_pool(app, client, hash_pool):
+    set_password_hash(app, generate_password_hash(CREDENTIALS['password'], 'pbkdf2:sha256:600'))
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app).startswith('pbkdf2:sha256:1000$')
+
+
+def test_saturated_pool_answers_503(app, client, hash_pool):
+    set_password_hash(app, generate_password_hash(CREDENTIALS['password'], 'pbkdf2:sha256:1000'))
+    # Take the only slot, as a hash in progress would
+    assert hash_pool.acquire(blocking=False)
+    try:
+        r = client.post('/auth/login', json=CREDENTIALS)
+        assert r.status_code == 503
+        assert r.headers['Retry-After'] == '1'
+        r = client.post('/auth/register', json={'username': 'new', 'email': 'new@example.com', 'password': 'pw'})
+        assert r.status_code == 503
+    finally:
+        hash_pool.release()
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+
+
+def test_busy_pool_postpones_the_upgrade(app, client, monkeypatch):
+    legacy = generate_password_hash(CREDENTIALS['password'], 'pbkdf2:sha256:600')
+    set_password_hash(app, legacy)
+    hash_password = hashing.hash_password
+
+    def saturated(password):
+        raise hashing.HashPoolSaturated()
+    monkeypatch.setattr('routes.hash_password', saturated)
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) == legacy
+
+    monkeypatch.setattr('routes.hash_password', hash_password)
+    assert client.post('/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app).startswith('pbkdf2:sha256:1000$')
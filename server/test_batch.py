@@ -0,0 +1,88 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+from models import User, Cohort
+from batch import BatchError, parse_line
+
+
+@pytest.fixture
+def run(app, tmp_path):
+    """Run a batch script through the CLI as the admin."""
+    with app.app_context():
+        db.session.get(User, 1).password_hash = generate_password_hash('adminpassword', 'pbkdf2:sha256:1000')
+        db.session.commit()
+
+    def run(*lines, options=()):
+        script = tmp_path / 'script.txt'
+        script.write_text('admin = login adminuser1@example.com adminpassword\n' + '\n'.join(lines) + '\n')
+        return app.test_cli_runner().invoke(args=['batch', str(script), *options])
+    return run
+
+
+def cohorts(app):
+    with app.app_context():
+        return sorted(name for name, in db.session.query(Cohort.name))
+
+
+def test_lines_share_the_login(app, run):
+    result = run('# cohorts', '', 'create-cohort A "First cohort" $admin', 'create-cohort B "Second cohort" $TOKEN')
+    assert result.exit_code == 0
+    assert 'Cohort A created successfully' in result.output
+    assert '[4] create-cohort: ' in result.output
+    assert '3 commands succeeded, 0 failed' in result.output
+    assert cohorts(app) == ['A', 'B']
+
+
+def test_a_failure_rolls_back_the_open_group(app, run):
+    result = run('create-cohort A one $admin', 'create-cohort B two $admin', 'create-cohort C three $admin',
+                 'no-such-command', 'create-cohort D four $admin', options=['--commit-every', '3'])
+    assert result.exit_code == 1
+    assert "Line 5: Unknown command 'no-such-command'" in result.output
+    assert 'Rolled back uncommitted lines 4' in result.output
+    assert '4 commands succeeded, 1 failed' in result.output
+    # The login and A, B were committed as one group; C was still open
+    assert cohorts(app) == ['A', 'B']
+
+
+def test_commands_commit_one_by_one_by_default(app, run):
+    result = run('create-cohort A one $admin', 'create-cohort B two $nobody', 'create-cohort C three $admin')
+    assert result.exit_code == 1
+    assert 'Line 3: Unknown variable $nobody' in result.output
+    assert 'Rolled back' not in result.output
+    assert cohorts(app) == ['A']
+
+
+def test_keep_going_runs_the_remaining_lines(app, run):
+    result = run('create-cohort A one $admin', 'create-cohort B two $nobody', 'create-cohort C three $admin',
+                 options=['--commit-every', '10', '--keep-going'])
+    assert result.exit_code == 1
+    assert 'Rolled back uncommitted lines 1, 2' in result.output
+    assert '3 commands succeeded, 1 failed' in result.output
+    assert cohorts(app) == ['C']
+
+
+def test_commands_that_refuse_count_as_failures(app, run):
+    result = run('create-cohort A one not-a-token', 'register dup adminuser1@example.com pw admin',
+                 'create-cohort B two $admin', options=['--keep-going'])
+    assert result.exit_code == 1
+    assert 'Line 2: Invalid token' in result.output
+    assert 'Line 3: User already exists' in result.output
+    assert '2 commands succeeded, 2 failed' in result.output
+    assert cohorts(app) == ['B']
+
+
+def test_the_last_group_commits_at_the_end(app, run):
+    result = run('create-cohort A one $admin', 'create-cohort B two $admin', options=['--commit-every', '10'])
+    assert result.exit_code == 0
+    # Nothing failed, so the open group commits when the script ends
+    assert cohorts(app) == ['A', 'B']
+
+
+def test_parse_line():
+    assert parse_line('  # comment', {}) is None
+    assert parse_line('', {}) is None
+    assert parse_line('me = login a@example.com "pass word"', {}) == ('me', 'login', ['a@example.com', 'pass word'])
+    assert parse_line('list-projects $me $$me', {'me': 't0k'}) == (None, 'list-projects', ['t0k', '$me'])
+    with pytest.raises(BatchError, match='Unknown variable'):
+        parse_line('list-projects $you', {})
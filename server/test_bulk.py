@@ -0,0 +1,131 @@
+from sqlalchemy import select
+
+from app import db
+from models import Project, ProjectMember
+from conftest import add_class, add_projects, statements
+
+
+def project(class_id, **fields):
+    item = {'name': 'A new project', 'description': 'A description long enough to pass',
+            'github_link': 'https://github.com/test/new', 'class_id': class_id}
+    item.update(fields)
+    return item
+
+
+def test_valid_and_invalid_items_get_one_result_each(app, client, student):
+    with app.app_context():
+        class_id = add_class()
+    items = [
+        project(class_id),
+        project(class_id, name='short'),
+        project(class_id, github_link=None),
+        project(class_id + 100),
+        dict(project(class_id), class_id='1'),
+        project(class_id, name=['A list of names']),
+        dict(project(class_id), class_id=True),
+        'not an object',
+        project(class_id, name='Another project'),
+    ]
+    r = client.post('/api/projects/bulk', json=items, headers=student)
+    assert r.status_code == 200
+    results = r.get_json()['results']
+    assert [result['index'] for result in results] == list(range(len(items)))
+    assert [result['status'] for result in results] == ['created'] + ['error'] * 7 + ['created']
+    assert [result['error'] for result in results[1:8]] == [
+        'Project name must be at least 7 characters long',
+        'Missing required field(s): github_link',
+        'Class not found',
+        'class_id must be an integer',
+        'name must be a string',
+        'class_id must be an integer',
+        'Item must be an object',
+    ]
+
+    with app.app_context():
+        names = {id_: name for id_, name in db.session.execute(select(Project.id, Project.name))}
+        assert names == {results[0]['id']: 'A new project', results[8]['id']: 'Another project'}
+        assert {p.owner_id for p in Project.query} == {2}
+
+
+def test_creates_are_one_insert(app, client, admin):
+    with app.app_context():
+        class_id = add_class()
+    items = [project(class_id, name=f'Project number {i}') for i in range(50)]
+    with statements(app) as sent:
+        r = client.post('/api/projects/bulk', json=items, headers=admin)
+    assert len([s for s in sent if s.startswith('INSERT INTO project ')]) == 1
+
+    # Ids come back matched to their items however the database ordered them
+    results = r.get_json()['results']
+    with app.app_context():
+        names = {id_: name for id_, name in db.session.execute(select(Project.id, Project.name))}
+    assert [names[result['id']] for result in results] == [item['name'] for item in items]
+
+
+def test_partial_update_keeps_the_rest_of_the_row(app, client, student):
+    with app.app_context():
+        class_id = add_class()
+        own, = add_projects(class_id, 2, 1)
+        other, = add_projects(class_id, 1, 1)
+    items = [
+        {'id': own, 'name': 'Renamed project'},
+        {'id': own, 'description': 'A description long enough to pass'},
+        {'id': other, 'name': 'Not my project'},
+        {'id': 9999, 'name': 'Nobody has this'},
+        {'id': own, 'class_id': 9999},
+    ]
+    results = client.post('/api/projects/bulk', json=items, headers=student).get_json()['results']
+    assert [result['status'] for result in results] == ['updated', 'updated', 'error', 'error', 'error']
+    assert [result['error'] for result in results[2:]] == [
+        'Access forbidden: You can only update your own projects', 'Project not found', 'Class not found']
+
+    with app.app_context():
+        updated = db.session.get(Project, own)
+        assert (updated.name, updated.class_id) == ('Renamed project', class_id)
+        assert updated.description == 'A description long enough to pass'
+
+
+def test_unchanged_update_writes_nothing(app, client, admin):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1)
+    r = client.post('/api/projects/bulk', json=[{'id': project_id, 'name': 'Project 0000'}], headers=admin)
+    assert r.get_json()['results'] == [{'index': 0, 'status': 'unchanged', 'id': project_id}]
+
+
+def test_students_cannot_set_an_owner(app, client, student):
+    with app.app_context():
+        class_id = add_class()
+    result, = client.post('/api/projects/bulk', json=[project(class_id, owner_id=1)],
+                          headers=student).get_json()['results']
+    with app.app_context():
+        assert db.session.get(Project, result['id']).owner_id == 2
+
+
+def test_request_shape_is_checked(client, admin, app, monkeypatch):
+    assert client.post('/api/projects/bulk', json={'name': 'x'}, headers=admin).status_code == 400
+    monkeypatch.setitem(app.config, 'BULK_MAX_ITEMS', 2)
+    assert client.post('/api/projects/bulk', json=[{}] * 3, headers=admin).status_code == 413
+
+
+def test_members_partial_success(app, client, student):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1, members=[1])
+    items = [
+        {'project_id': project_id},
+        {'project_id': project_id, 'user_id': 2},
+        {'project_id': project_id, 'user_id': 1},
+        {'project_id': 9999},
+        {'project_id': str(project_id)},
+        [project_id],
+    ]
+    results = client.post('/api/project_members/bulk', json=items, headers=student).get_json()['results']
+    assert [result['status'] for result in results] == ['created', 'unchanged', 'error', 'error', 'error', 'error']
+    assert [result['error'] for result in results[2:]] == [
+        'Access forbidden: Students can only assign themselves', 'Project not found',
+        'project_id must be an integer', 'Item must be an object']
+
+    with app.app_context():
+        members = {(p, u) for p, u in db.session.execute(select(ProjectMember.project_id, ProjectMember.user_id))}
+    assert members == {(project_id, 1), (project_id, 2)}
+    assert results[0]['id'] is not None
+
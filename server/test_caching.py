@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from werkzeug.http import http_date
+
+from app import db
+import caching
+from models import Cohort, CollectionVersion
+from conftest import DB_PATH, add_class, token_for
+
+
+def version(table):
+    row = db.session.get(CollectionVersion, table)
+    return row.version if row else 0
+
+
+def test_unchanged_collection_answers_304(client, admin):
+    r = client.get('/api/cohorts', headers=admin)
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    assert 'no-cache' in r.headers['Cache-Control']
+
+    r = client.get('/api/cohorts', headers=dict(admin, **{'If-None-Match': etag}))
+    assert r.status_code == 304
+    assert r.headers['ETag'] == etag
+    assert r.get_data() == b''
+
+
+def test_etag_depends_on_the_query_string(client, admin):
+    plain = client.get('/api/cohorts', headers=admin).headers['ETag']
+    paged = client.get('/api/cohorts?limit=1', headers=admin).headers['ETag']
+    assert plain != paged
+
+
+def test_route_write_changes_the_etag(client, admin):
+    etag = client.get('/api/cohorts', headers=admin).headers['ETag']
+    r = client.post('/api/cohorts', json={'name': 'New', 'description': 'Fresh'}, headers=admin)
+    assert r.status_code == 201
+
+    r = client.get('/api/cohorts', headers=dict(admin, **{'If-None-Match': etag}))
+    assert r.status_code == 200
+    assert r.headers['ETag'] != etag
+    assert [c['name'] for c in r.get_json()] == ['New']
+
+
+def test_flushes_and_bulk_statements_bump_versions(ctx):
+    before = version('cohort')
+    add_class()
+    assert version('cohort') == before + 1
+    assert version('class') >= 1
+
+    db.session.execute(update(Cohort).values(description='Changed'))
+    db.session.commit()
+    assert version('cohort') == before + 2
+
+
+def test_unrelated_write_keeps_the_etag(client, admin):
+    etag = client.get('/api/cohorts', headers=admin).headers['ETag']
+    r = client.post('/auth/register', json={'username': 'new', 'email': 'new@example.com', 'password': 'pw'})
+    assert r.status_code == 201
+
+    r = client.get('/api/cohorts', headers=dict(admin, **{'If-None-Match': etag}))
+    assert r.status_code == 304
+
+
+def test_cli_write_bumps_versions(app):
+    with app.app_context():
+        before = version('cohort')
+    result = app.test_cli_runner().invoke(args=['create-cohort', 'From CLI', 'Made by a command', token_for(app, 1)])
+    assert 'created successfully' in result.output
+    with app.app_context():
+        assert version('cohort') == before + 1
+
+
+def age_versions(seconds):
+    db.session.execute(update(CollectionVersion).values(
+        updated_at=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=seconds)))
+    db.session.commit()
+
+
+def test_if_modified_since_answers_304(app, client, admin):
+    with app.app_context():
+        add_class()
+        age_versions(2)
+    r = client.get('/api/cohorts', headers=admin)
+    last_modified = r.headers['Last-Modified']
+    r = client.get('/api/cohorts', headers=dict(admin, **{'If-Modified-Since': last_modified}))
+    assert r.status_code == 304
+
+
+def test_same_second_write_is_not_hidden_by_if_modified_since(app, client, admin, monkeypatch):
+    clock = [datetime(2026, 1, 1, 12, 0, 0, 300000, tzinfo=timezone.utc)]
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock[0]
+
+    monkeypatch.setattr(caching, 'datetime', Clock)
+    with app.app_context():
+        add_class()
+    # No Last-Modified while a later write could still share its second
+    r = client.get('/api/cohorts', headers=admin)
+    assert 'Last-Modified' not in r.headers
+    same_second = {'If-Modified-Since': http_date(clock[0])}
+    assert client.get('/api/cohorts', headers=dict(admin, **same_second)).status_code == 200
+
+    clock[0] += timedelta(seconds=1)
+    r = client.get('/api/cohorts', headers=admin)
+    assert r.headers['Last-Modified'] == 'Thu, 01 Jan 2026 12:00:00 GMT'
+    assert client.get('/api/cohorts', headers=dict(admin, **same_second)).status_code == 304
+
+
+def test_if_none_match_takes_precedence(app, client, admin):
+    with app.app_context():
+        add_class()
+        age_versions(2)
+    r = client.get('/api/cohorts', headers=admin)
+    stale = {'If-None-Match': '"stale"', 'If-Modified-Since': r.headers['Last-Modified']}
+    assert client.get('/api/cohorts', headers=dict(admin, **stale)).status_code == 200
+
+
+def test_cli_build_registers_the_listeners():
+    # A fresh process, so nothing the full build imported can stand in
+    script = (
+        'from app import create_app, db\n'
+        'from models import Cohort, CollectionVersion\n'
+        'app = create_app("cli")\n'
+        'with app.app_context():\n'
+        '    db.session.add(Cohort(name="c", description="d"))\n'
+        '    db.session.commit()\n'
+        '    print(db.session.get(CollectionVersion, "cohort").version)\n'
+    )
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{DB_PATH}')
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    assert result.stdout.split() == ['1']
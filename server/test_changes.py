@@ -0,0 +1,86 @@
+from conftest import add_class, add_projects
+
+
+def poll(client, headers, since=0, limit=100):
+    r = client.get(f'/api/changes?since={since}&limit={limit}', headers=headers)
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_inserts_arrive_in_write_order(app, client, student):
+    with app.app_context():
+        class_id = add_class()
+        project_id, = add_projects(class_id, 2, 1, members=[2])
+    page = poll(client, student)
+    assert [(c['entity'], c['op']) for c in page['items']] == [
+        ('cohort', 'upsert'), ('class', 'upsert'), ('project', 'upsert'), ('project_member', 'upsert')]
+    seqs = [c['seq'] for c in page['items']]
+    assert seqs == sorted(seqs) and len(set(seqs)) == 4
+    assert page['next'] == seqs[-1] and page['more'] is False
+    assert page['items'][2]['data']['id'] == project_id
+    assert page['items'][2]['data']['class_id'] == class_id
+
+
+def test_cursor_pages_through_every_change_once(app, client, student):
+    with app.app_context():
+        add_projects(add_class(), 2, 7)
+    seen, since = [], 0
+    while True:
+        page = poll(client, student, since, limit=3)
+        seen += page['items']
+        since = page['next']
+        if not page['more']:
+            break
+    assert [c['seq'] for c in seen] == sorted({c['seq'] for c in seen})
+    assert len(seen) == 9
+    # A caught-up client keeps its cursor
+    assert poll(client, student, since) == {'items': [], 'next': since, 'more': False}
+
+
+def test_updates_move_a_row_to_the_end(app, client, student):
+    with app.app_context():
+        first, second = add_projects(add_class(), 2, 2)
+    since = poll(client, student)['next']
+
+    r = client.put(f'/api/projects/{first}', json={'name': 'A new name for it'}, headers=student)
+    assert r.status_code == 200
+    page = poll(client, student, since)
+    assert [(c['entity'], c['id']) for c in page['items']] == [('project', first)]
+    assert page['items'][0]['data']['name'] == 'A new name for it'
+    assert page['items'][0]['seq'] > since
+
+
+def test_deletes_leave_tombstones(app, client, admin):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 2, 1, members=[1, 2])
+    since = poll(client, admin)['next']
+
+    assert client.delete(f'/api/projects/{project_id}', headers=admin).status_code == 200
+    page = poll(client, admin, since)
+    assert sorted((c['entity'], c['op']) for c in page['items']) == [
+        ('project', 'delete'), ('project_member', 'delete'), ('project_member', 'delete')]
+    assert [c for c in page['items'] if c['entity'] == 'project'][0]['id'] == project_id
+
+
+def test_deleting_a_user_reports_reassigned_projects(app, client, admin):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 2, 1, members=[2])
+    since = poll(client, admin)['next']
+
+    assert client.delete('/api/users/2', headers=admin).status_code == 200
+    page = poll(client, admin, since)
+    changes = {(c['entity'], c['op']): c for c in page['items']}
+    assert set(changes) == {('project', 'upsert'), ('project_member', 'delete')}
+    assert changes['project', 'upsert']['data']['owner_id'] == 1
+
+
+def test_empty_poll_is_answered_from_the_etag(client, student):
+    r = client.get('/api/changes?since=0', headers=student)
+    r = client.get('/api/changes?since=0', headers=dict(student, **{'If-None-Match': r.headers['ETag']}))
+    assert r.status_code == 304
+
+
+def test_bad_since_is_rejected(client, student):
+    assert client.get('/api/changes?since=-1', headers=student).status_code == 400
+    assert client.get('/api/changes?since=abc', headers=student).status_code == 400
+
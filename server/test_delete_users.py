@@ -0,0 +1,76 @@
+from sqlalchemy import select
+
+from app import db
+from models import User, Project, ProjectMember
+from conftest import add_class, add_projects, token_for
+
+
+def add_user(user_id, role_id=1):
+    db.session.add(User(id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com',
+                        password_hash='x', role_id=role_id))
+    db.session.commit()
+
+
+def test_deleted_users_hand_projects_to_the_admin(app, client, admin):
+    with app.app_context():
+        class_id = add_class()
+        add_user(3)
+        owned = add_projects(class_id, 2, 2, members=[3])
+        add_projects(class_id, 3, 1, members=[1, 2])
+
+    r = client.delete('/api/users', json={'ids': [2, 3, 1, 9999]}, headers=admin)
+    assert r.status_code == 200
+    assert r.get_json() == {'deleted': [2, 3], 'not_deleted': [1, 9999]}
+
+    with app.app_context():
+        assert {p.owner_id for p in Project.query} == {1}
+        assert set(db.session.scalars(select(ProjectMember.user_id))) == {1}
+        assert db.session.scalars(select(User.id)).all() == [1]
+        assert all(db.session.get(Project, i) for i in owned)
+
+
+def test_batch_request_shape_is_checked(client, admin):
+    assert client.delete('/api/users', json={'ids': 'all'}, headers=admin).status_code == 400
+    assert client.delete('/api/users', json={'ids': [1, '2']}, headers=admin).status_code == 400
+    assert client.delete('/api/users', headers=admin).status_code == 400
+
+
+def test_students_cannot_delete_users(client, student):
+    assert client.delete('/api/users', json={'ids': [1]}, headers=student).status_code == 403
+    assert client.delete('/api/users/1', headers=student).status_code == 403
+
+
+def test_single_delete(app, client, admin):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 2, 1, members=[2])
+
+    assert client.delete('/api/users/1', headers=admin).status_code == 400
+    assert client.delete('/api/users/2', headers=admin).status_code == 200
+    r = client.delete('/api/users/2', headers=admin)
+    assert r.status_code == 404
+    assert r.get_json() == {'message': 'User not found'}
+    with app.app_context():
+        assert db.session.get(Project, project_id).owner_id == 1
+        assert db.session.scalars(select(ProjectMember.id)).all() == []
+
+
+def test_cli_delete_uses_the_same_admin(app):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 2, 1)
+    result = app.test_cli_runner().invoke(args=['delete-user', '2', token_for(app, 1)])
+    assert 'User deleted successfully' in result.output
+    with app.app_context():
+        assert db.session.get(Project, project_id).owner_id == 1
+
+
+def test_reassignment_follows_the_configured_email(app, client, admin, monkeypatch):
+    with app.app_context():
+        db.session.add(User(id=3, username='admin2', email='admin2@example.com', password_hash='x', role_id=2))
+        db.session.commit()
+        project_id, = add_projects(add_class(), 2, 1)
+    monkeypatch.setitem(app.config, 'REASSIGN_ADMIN_EMAIL', 'admin2@example.com')
+
+    assert client.delete('/api/users/3', headers=admin).status_code == 400
+    assert client.delete('/api/users/2', headers=admin).status_code == 200
+    with app.app_context():
+        assert db.session.get(Project, project_id).owner_id == 3
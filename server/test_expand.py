@@ -0,0 +1,66 @@
+from app import db
+from models import User
+from conftest import add_class, add_projects, statements
+
+INCLUDE_ALL = 'owner,members,class,cohort'
+
+
+def add_members(count):
+    users = [User(id=10 + i, username=f'member{i}', email=f'member{i}@example.com', password_hash='x', role_id=1)
+             for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def test_includes_expand_each_project(app, client, student):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1, members=[2])
+    r = client.get(f'/api/projects/{project_id}?include={INCLUDE_ALL}', headers=student)
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data['owner'] == {'id': 1, 'username': 'adminuser1'}
+    assert data['members'] == [{'id': 2, 'username': 'student1'}]
+    assert data['class']['name'] == 'Class A'
+    assert data['cohort']['name'] == 'Cohort A'
+    # Emails stay behind the admin-only /api/users
+    assert 'example.com' not in r.get_data(as_text=True)
+
+
+def test_includes_apply_to_lists(app, client, student):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+    projects = client.get('/api/projects?include=owner,class,cohort', headers=student).get_json()
+    assert len(projects) == 3
+    assert all(p['owner'] == {'id': 1, 'username': 'adminuser1'} for p in projects)
+    assert all(p['cohort']['name'] == 'Cohort A' for p in projects)
+    assert all('members' not in p for p in projects)
+
+
+def test_query_count_does_not_grow_with_rows(app, client, student):
+    def queries_for_listing():
+        # Resolve the caller first, so only the listing itself is counted
+        client.get('/api/cohorts', headers=student)
+        with statements(app) as sent:
+            r = client.get(f'/api/projects?include={INCLUDE_ALL}', headers=student)
+            assert r.status_code == 200
+        return len(sent), len(r.get_json())
+
+    with app.app_context():
+        class_id = add_class()
+        members = add_members(4)
+        add_projects(class_id, 1, 2, members=members[:1])
+    few, listed = queries_for_listing()
+    assert listed == 2
+
+    with app.app_context():
+        add_projects(add_class('Class B', 'Cohort B'), 2, 40, members=members)
+    many, listed = queries_for_listing()
+    assert listed == 42
+    assert many == few
+
+
+def test_unknown_include_is_rejected(client, student):
+    r = client.get('/api/projects?include=owner,password', headers=student)
+    assert r.status_code == 400
+    assert r.get_json() == {'message': 'Unknown include(s): password'}
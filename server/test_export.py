@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+
+from app import db
+from models import Project
+from conftest import add_class, add_projects, token_for
+
+
+def export(client, headers, url):
+    r = client.get(url, headers=headers)
+    body = r.get_data()
+    r.close()
+    return r, body
+
+
+def ndjson(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def test_ndjson_export_streams_every_row(app, client, admin):
+    with app.app_context():
+        ids = add_projects(add_class(), 1, 5)
+    r, body = export(client, admin, '/api/export/projects')
+    assert r.status_code == 200
+    assert r.mimetype == 'application/x-ndjson'
+    assert r.headers['Content-Disposition'] == 'attachment; filename="projects.ndjson"'
+    assert [row['id'] for row in ndjson(body)] == ids
+    assert 'password_hash' not in ndjson(export(client, admin, '/api/export/users')[1])[0]
+
+
+def test_csv_and_gzip_carry_the_same_rows(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+    _, plain = export(client, admin, '/api/export/projects?format=csv')
+    rows = list(csv.reader(io.StringIO(plain.decode())))
+    assert rows[0][:2] == ['id', 'name']
+    assert [row[1] for row in rows[1:]] == ['Project 0000', 'Project 0001', 'Project 0002']
+
+    r, compressed = export(client, admin, '/api/export/projects?format=csv&gzip=1')
+    assert r.mimetype == 'application/gzip'
+    assert gzip.decompress(compressed) == plain
+
+
+def test_incremental_export_includes_updated_rows(app, client, admin):
+    with app.app_context():
+        first, second = add_projects(add_class(), 1, 2)
+    r, body = export(client, admin, '/api/export/projects')
+    assert [row['id'] for row in ndjson(body)] == [first, second]
+    since = r.headers['X-Export-Since']
+
+    with app.app_context():
+        db.session.get(Project, first).name = 'Renamed project'
+        db.session.commit()
+    r, body = export(client, admin, f'/api/export/projects?since={since}')
+    assert [(row['id'], row['name']) for row in ndjson(body)] == [(first, 'Renamed project')]
+    assert int(r.headers['X-Export-Since']) > int(since)
+
+
+def test_users_since_is_an_id_cursor(client, admin):
+    _, body = export(client, admin, '/api/export/users?since=1')
+    assert [row['id'] for row in ndjson(body)] == [2]
+
+
+def test_arguments_and_roles_are_checked(client, admin, student):
+    assert client.get('/api/export/users', headers=student).status_code == 403
+    assert client.get('/api/export/passwords', headers=admin).status_code == 404
+    assert client.get('/api/export/projects?format=xml', headers=admin).status_code == 400
+    assert client.get('/api/export/projects?since=-1', headers=admin).status_code == 400
+
+
+def test_streamed_export_returns_its_connection(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+        pool = db.engine.pool
+    for _ in range(pool.size() + 5):
+        export(client, admin, '/api/export/projects')
+    assert pool.checkedout() == 0
+
+
+def test_export_command_writes_a_file(app, tmp_path):
+    with app.app_context():
+        ids = add_projects(add_class(), 1, 2)
+    path = tmp_path / 'projects.ndjson.gz'
+    result = app.test_cli_runner().invoke(args=['export', 'projects', token_for(app, 1), '--gzip', '-o', str(path)])
+    assert result.exit_code == 0, result.output
+    assert [row['id'] for row in ndjson(gzip.decompress(path.read_bytes()))] == ids
@@ -0,0 +1,41 @@
+import pytest
+
+from serialization import OrjsonProvider
+from conftest import add_class, add_projects
+
+
+def test_fields_select_and_order_keys(app, client, student):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+    projects = client.get('/api/projects?fields=name,id', headers=student).get_json()
+    assert [list(p) for p in projects] == [['name', 'id']] * 3
+
+
+def test_fields_are_applied_to_pages(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+    page = client.get('/api/projects?limit=2&fields=name', headers=admin).get_json()
+    assert page['items'] == [{'name': 'Project 0000'}, {'name': 'Project 0001'}]
+    assert page['next'] is not None
+
+
+def test_only_public_fields_can_be_selected(client, admin):
+    r = client.get('/api/users?fields=id,password_hash', headers=admin)
+    assert r.status_code == 400
+    assert r.get_json() == {'message': 'Unknown field(s): password_hash'}
+    users = client.get('/api/users', headers=admin).get_json()
+    assert set(users[0]) == {'id', 'username', 'email', 'role_id'}
+
+
+def test_fields_trim_expanded_projects(app, client, student):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1)
+    project, = client.get('/api/projects?include=class&fields=id,name', headers=student).get_json()
+    assert project == {'id': project_id, 'name': 'Project 0000', 'class': project['class']}
+    assert project['class']['name'] == 'Class A'
+
+
+def test_orjson_provider_is_used_when_installed(app):
+    pytest.importorskip('orjson')
+    assert isinstance(app.json, OrjsonProvider)
+    assert app.json.loads(app.json.dumps({'b': 1, 'a': [1.5, None]})) == {'b': 1, 'a': [1.5, None]}
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import update
+
+from app import db
+from models import User, Role
+from identity import principal_cache, resolve_token
+from conftest import token_for
+
+
+def test_principals_are_cached(client, student):
+    assert client.get('/api/projects', headers=student).status_code == 200
+    hits = principal_cache.stats()['hits']
+    assert client.get('/api/projects', headers=student).status_code == 200
+    assert principal_cache.stats()['hits'] == hits + 1
+
+
+def test_role_change_applies_to_the_next_request(app, client, student):
+    assert client.get('/api/users', headers=student).status_code == 403
+    with app.app_context():
+        db.session.get(User, 2).role_id = 2
+        db.session.commit()
+    assert client.get('/api/users', headers=student).status_code == 200
+
+
+def test_bulk_role_change_applies_to_the_next_request(app, client, student):
+    assert client.get('/api/users', headers=student).status_code == 403
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == 2).values(role_id=2))
+        db.session.commit()
+    assert client.get('/api/users', headers=student).status_code == 200
+
+
+def test_renamed_role_is_not_served_from_cache(app):
+    token = token_for(app, 2)
+    with app.app_context():
+        assert resolve_token(token).role_name == 'student'
+        db.session.get(Role, 1).name = 'learner'
+        db.session.commit()
+        assert resolve_token(token).role_name == 'learner'
+
+
+def test_deleted_user_token_stops_working(client, admin, student):
+    assert client.get('/api/projects', headers=student).status_code == 200
+    assert client.delete('/api/users/2', headers=admin).status_code == 200
+    r = client.get('/api/projects', headers=student)
+    assert r.status_code == 401
+    assert r.get_json() == {'msg': 'User not found'}
+
+
+def in_another_process(statement):
+    """Run ``statement`` through the ORM in a separate interpreter, like another worker would."""
+    script = (
+        'from sqlalchemy import update, delete\n'
+        'from app import create_app, db\n'
+        'from models import User\n'
+        'app = create_app("cli")\n'
+        'with app.app_context():\n'
+        f'    db.session.execute({statement})\n'
+        '    db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+
+def test_role_change_in_another_process_applies(client, student):
+    assert client.get('/api/users', headers=student).status_code == 403
+    in_another_process('update(User).where(User.id == 2).values(role_id=2)')
+    assert client.get('/api/users', headers=student).status_code == 200
+
+
+def test_user_deleted_by_another_process_is_rejected(client, student):
+    assert client.get('/api/projects', headers=student).status_code == 200
+    in_another_process('delete(User).where(User.id == 2)')
+    assert client.get('/api/projects', headers=student).status_code == 401
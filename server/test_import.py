@@ -0,0 +1,146 @@
+import json
+
+import importer
+from sqlalchemy import select
+
+from app import db
+from models import User, Project, ProjectMember
+from bulk import bulk_create_users
+from importer import import_records, read_records
+from identity import resolve_token
+from conftest import ADMIN_EMAIL, add_class, add_projects, statements, token_for
+
+
+def project_record(i, **fields):
+    record = {'name': f'Imported project {i}', 'description': 'A description long enough to pass',
+              'github_link': f'https://github.com/test/i{i}', 'class_id': 1, 'owner_email': ADMIN_EMAIL}
+    record.update(fields)
+    return record
+
+
+def write_ndjson(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def project_names():
+    return db.session.scalars(select(Project.name).order_by(Project.id)).all()
+
+
+def test_records_are_saved_in_chunks(app, ctx):
+    add_class()
+    records = [project_record(i) for i in range(5)]
+    chunks = []
+    done = import_records('projects', iter(records), resolve_token(token_for(app, 1)), 2,
+                          on_chunk=lambda done, results: chunks.append((done, [r['index'] for r in results])))
+    assert done == 5
+    assert chunks == [(2, [0, 1]), (4, [2, 3]), (5, [4])]
+    assert project_names() == [f'Imported project {i}' for i in range(5)]
+
+
+def test_emails_resolve_with_one_query_per_new_key(app, ctx):
+    add_class()
+    db.session.add(User(id=3, username='owner3', email='owner3@example.com', password_hash='x', role_id=1))
+    db.session.commit()
+    records = [project_record(i, owner_email=['owner3@example.com', ADMIN_EMAIL][i % 2]) for i in range(6)]
+    records.append(project_record(6, owner_email='nobody@example.com'))
+
+    results = []
+    with statements(app) as sent:
+        import_records('projects', iter(records), resolve_token(token_for(app, 1)), 3,
+                       on_chunk=lambda done, chunk: results.extend(chunk))
+    lookups = [s for s in sent if s.startswith('SELECT user.email, user.id')]
+    # The first chunk loads both owners; later chunks only ask for the unknown email
+    assert len(lookups) == 2
+    assert [r['status'] for r in results] == ['created'] * 6 + ['error']
+    assert results[6]['error'] == 'Unknown owner_email'
+    owners = db.session.scalars(select(Project.owner_id).order_by(Project.id)).all()
+    assert owners == [3, 1, 3, 1, 3, 1]
+
+
+def test_csv_values_are_coerced(tmp_path, app, ctx):
+    add_class()
+    path = tmp_path / 'projects.csv'
+    path.write_text('name,description,github_link,class_id,owner_email\n'
+                    f'Imported from CSV,A description long enough to pass,https://github.com/test/c,1,{ADMIN_EMAIL}\n'
+                    f'Bad class id here,A description long enough to pass,https://github.com/test/d,one,{ADMIN_EMAIL}\n')
+    records = list(read_records(str(path)))
+    assert records[0]['class_id'] == 1
+    assert str(records[1]) == 'class_id must be an integer'
+
+
+def test_users_import_with_role_names(tmp_path, app):
+    path = write_ndjson(tmp_path / 'users.ndjson', [
+        {'username': 'imported', 'email': 'imported@example.com', 'password': 'secret', 'role': 'admin'},
+        {'username': 'taken', 'email': 'student1@example.com', 'password': 'secret'},
+        {'username': 'norole', 'email': 'norole@example.com', 'password': 'secret', 'role': 'wizard'},
+        'not json',
+    ])
+    with open(path, 'a') as f:
+        f.write('{broken\n')
+    result = app.test_cli_runner().invoke(args=['import', 'users', path, token_for(app, 1)])
+    assert 'Imported 5 users records (1 created, 4 error)' in result.output
+    with app.app_context():
+        user = db.session.scalar(select(User).filter_by(email='imported@example.com'))
+        assert user.role_id == 2
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+
+
+def test_memberships_skip_existing_pairs(tmp_path, app):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1, members=[2])
+    path = write_ndjson(tmp_path / 'members.ndjson', [
+        {'project_id': project_id, 'user_email': 'student1@example.com'},
+        {'project_id': project_id, 'user_email': ADMIN_EMAIL},
+    ])
+    result = app.test_cli_runner().invoke(args=['import', 'project_members', path, token_for(app, 1)])
+    assert '(1 created, 1 unchanged)' in result.output
+    with app.app_context():
+        assert len(db.session.scalars(select(ProjectMember.id)).all()) == 2
+
+
+def test_failed_import_resumes_from_the_checkpoint(tmp_path, app, monkeypatch):
+    with app.app_context():
+        add_class()
+    path = write_ndjson(tmp_path / 'projects.ndjson', [project_record(i) for i in range(5)])
+    token = token_for(app, 1)
+
+    prepare, save = importer.IMPORTERS['projects']
+    calls = []
+    def crash_on_second_chunk(items, principal):
+        calls.append(len(items))
+        if len(calls) == 2:
+            raise RuntimeError('disk full')
+        return save(items, principal)
+    monkeypatch.setitem(importer.IMPORTERS, 'projects', (prepare, crash_on_second_chunk))
+    result = app.test_cli_runner().invoke(args=['import', 'projects', path, token, '--chunk-size', '2'])
+    assert isinstance(result.exception, RuntimeError)
+    assert json.loads(open(path + '.checkpoint').read()) == {'entity': 'projects', 'records': 2}
+    with app.app_context():
+        assert len(project_names()) == 2
+
+    monkeypatch.setitem(importer.IMPORTERS, 'projects', (prepare, save))
+    result = app.test_cli_runner().invoke(args=['import', 'projects', path, token, '--chunk-size', '2'])
+    assert 'Resuming after record 2' in result.output
+    assert 'Imported 3 projects records (3 created)' in result.output
+    with app.app_context():
+        assert project_names() == [f'Imported project {i}' for i in range(5)]
+    assert not (tmp_path / 'projects.ndjson.checkpoint').exists()
+
+
+def test_checkpoint_of_another_entity_is_refused(tmp_path, app):
+    path = write_ndjson(tmp_path / 'users.ndjson', [])
+    (tmp_path / 'users.ndjson.checkpoint').write_text(json.dumps({'entity': 'projects', 'records': 3}))
+    result = app.test_cli_runner().invoke(args=['import', 'users', path, token_for(app, 1)])
+    assert 'belongs to a projects import' in result.output
+
+
+def test_bulk_users_report_taken_emails(ctx):
+    results = bulk_create_users([
+        {'username': 'fresh', 'email': 'fresh@example.com', 'password': 'pw'},
+        {'username': 'other', 'email': 'student1@example.com', 'password': 'pw'},
+        {'username': 'nopass', 'email': 'nopass@example.com'},
+        {'username': 'typed', 'email': 'typed@example.com', 'password': 1234},
+    ])
+    assert [result['status'] for result in results] == ['created', 'error', 'error', 'error']
+    assert db.session.get(User, results[0]['id']).email == 'fresh@example.com'
@@ -0,0 +1,45 @@
+from sqlalchemy import inspect, select
+
+from app import db
+from models import ProjectMember
+from conftest import add_class, add_projects
+
+
+def test_foreign_keys_are_indexed(ctx):
+    indexes = {table: {tuple(ix['column_names']): bool(ix['unique']) for ix in inspect(db.engine).get_indexes(table)}
+               for table in ('project', 'project_member')}
+    assert indexes['project'][('owner_id',)] is False
+    assert indexes['project'][('class_id',)] is False
+    assert indexes['project_member'][('user_id', 'project_id')] is True
+    assert indexes['project_member'][('project_id', 'user_id')] is True
+
+
+def test_student_joins_a_project(app, client, student):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1)
+    r = client.post('/api/project_members', json={'project_id': project_id, 'user_id': 2}, headers=student)
+    assert r.status_code == 201
+    assert r.get_json() == {'project_id': project_id, 'user_id': 2}
+
+
+def test_students_only_assign_themselves(app, client, student):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1)
+    r = client.post('/api/project_members', json={'project_id': project_id, 'user_id': 1}, headers=student)
+    assert r.status_code == 403
+
+
+def test_duplicate_membership_is_a_400(app, client, admin):
+    with app.app_context():
+        project_id, = add_projects(add_class(), 1, 1, members=[2])
+    r = client.post('/api/project_members', json={'project_id': project_id, 'user_id': 2}, headers=admin)
+    assert r.status_code == 400
+    assert r.get_json() == {'message': 'User is already a member of this project'}
+    with app.app_context():
+        assert len(db.session.scalars(select(ProjectMember.id)).all()) == 1
+
+
+def test_other_integrity_errors_are_not_duplicates(app, client, admin):
+    r = client.post('/api/project_members', json={'user_id': 2}, headers=admin)
+    assert r.status_code == 400
+    assert r.get_json() == {'message': 'project_id and user_id are required'}
@@ -0,0 +1,86 @@
+import pytest
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+from app import create_app
+from config import Config
+from conftest import add_class, add_projects, statements
+
+
+@pytest.fixture
+def metrics_client(monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'scrape-token')
+    app = create_app('api')
+    client = app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    return client
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_counted_by_endpoint_and_status(client, admin, student):
+    ok = sample('http_requests_total', method='GET', endpoint='api.get_users', status='200')
+    forbidden = sample('http_requests_total', method='GET', endpoint='api.get_users', status='403')
+    client.get('/api/users', headers=admin)
+    client.get('/api/users', headers=student)
+    client.get('/api/users', headers=student)
+    assert sample('http_requests_total', method='GET', endpoint='api.get_users', status='200') == ok + 1
+    assert sample('http_requests_total', method='GET', endpoint='api.get_users', status='403') == forbidden + 2
+
+
+def test_unknown_paths_share_one_label(client):
+    before = sample('http_requests_total', method='GET', endpoint='unmatched', status='404')
+    client.get('/no/such/path/1')
+    client.get('/no/such/path/2')
+    assert sample('http_requests_total', method='GET', endpoint='unmatched', status='404') == before + 2
+
+
+def test_latency_and_size_histograms(client, admin):
+    labels = {'method': 'GET', 'endpoint': 'api.get_cohorts'}
+    count = sample('http_request_duration_seconds_count', **labels)
+    size = sample('http_response_size_bytes_sum', **labels)
+    r = client.get('/api/cohorts', headers=admin)
+    assert sample('http_request_duration_seconds_count', **labels) == count + 1
+    assert sample('http_request_duration_seconds_sum', **labels) > 0
+    assert sample('http_response_size_bytes_sum', **labels) == size + len(r.get_data())
+
+
+def test_sql_statements_per_request(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+    client.get('/api/projects', headers=admin)
+    count = sample('http_request_sql_statements_count', endpoint='api.get_projects')
+    total = sample('http_request_sql_statements_sum', endpoint='api.get_projects')
+    seconds = sample('http_request_sql_duration_seconds_sum', endpoint='api.get_projects')
+    with statements(app) as sent:
+        client.get('/api/projects?include=owner,members', headers=admin)
+    assert sample('http_request_sql_statements_count', endpoint='api.get_projects') == count + 1
+    assert sample('http_request_sql_statements_sum', endpoint='api.get_projects') == total + len(sent)
+    assert sample('http_request_sql_duration_seconds_sum', endpoint='api.get_projects') > seconds
+
+
+def test_streamed_bodies_are_not_sized(app, client, admin):
+    labels = {'method': 'GET', 'endpoint': 'api.export'}
+    count = sample('http_request_duration_seconds_count', **labels)
+    sized = sample('http_response_size_bytes_count', **labels)
+    r = client.get('/api/export/projects', headers=admin)
+    r.get_data()
+    r.close()
+    assert sample('http_request_duration_seconds_count', **labels) == count + 1
+    assert sample('http_response_size_bytes_count', **labels) == sized
+
+
+def test_metrics_need_the_token(metrics_client):
+    assert metrics_client.get('/metrics').status_code == 401
+    assert metrics_client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    r = metrics_client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+    assert r.status_code == 200
+    assert r.mimetype == 'text/plain'
+    assert b'# TYPE http_requests_total counter' in r.get_data()
+
+
+def test_metrics_are_not_served_without_a_token(client):
+    assert client.get('/metrics').status_code == 404
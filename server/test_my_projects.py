@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import add_class, add_projects
+
+
+@pytest.fixture
+def projects(app):
+    """Student 2 owns three projects, belongs to two of the admin's and to one of their own."""
+    with app.app_context():
+        class_id = add_class()
+        admin_only = add_projects(class_id, 1, 2)
+        admin_member = add_projects(class_id, 1, 2, members=[2])
+        owned = add_projects(class_id, 2, 3)
+        owned_member = add_projects(class_id, 2, 1, members=[2])
+    return {'owner': owned + owned_member, 'member': admin_member + owned_member, 'other': admin_only}
+
+
+def ids(response):
+    body = response.get_json()
+    return [project['id'] for project in (body['items'] if isinstance(body, dict) else body)]
+
+
+@pytest.mark.parametrize('role', ['owner', 'member', 'any'])
+def test_role_filter(client, student, projects, role):
+    expected = set(projects['owner']) | set(projects['member']) if role == 'any' else set(projects[role])
+    r = client.get(f'/api/me/projects?role={role}', headers=student)
+    assert r.status_code == 200
+    assert ids(r) == sorted(expected)
+
+
+def test_any_is_the_default(client, student, projects):
+    assert ids(client.get('/api/me/projects', headers=student)) == \
+        ids(client.get('/api/me/projects?role=any', headers=student))
+
+
+def test_pages_walk_the_union_without_duplicates(client, student, projects):
+    seen, after = [], None
+    while True:
+        r = client.get('/api/me/projects?limit=2' + (f'&after={after}' if after else ''), headers=student)
+        page = r.get_json()
+        assert len(page['items']) <= 2
+        seen += [project['id'] for project in page['items']]
+        after = page['next']
+        if after is None:
+            break
+    assert seen == sorted(set(projects['owner']) | set(projects['member']))
+
+
+def test_fields_and_bad_role(client, student, projects):
+    r = client.get('/api/me/projects?role=owner&fields=id,name', headers=student)
+    assert r.get_json()[0] == {'id': projects['owner'][0], 'name': 'Project 0000'}
+    r = client.get('/api/me/projects?role=leader', headers=student)
+    assert r.status_code == 400
+    assert r.get_json() == {'message': 'role must be one of owner, member, any'}
+
+
+def test_etags_are_per_caller(client, admin, student, projects):
+    mine = client.get('/api/me/projects', headers=student)
+    theirs = client.get('/api/me/projects', headers=dict(admin, **{'If-None-Match': mine.headers['ETag']}))
+    assert theirs.status_code == 200
+    assert ids(theirs) == sorted(projects['other'] + projects['member'][:2])
+
+
+def test_another_users_projects(client, admin, projects):
+    r = client.get('/api/users/2/projects?role=member', headers=admin)
+    assert ids(r) == sorted(projects['member'])
+    assert client.get('/api/users/2/projects?role=owner&limit=10', headers=admin).get_json()['next'] is None
+    r = client.get('/api/users/9999/projects', headers=admin)
+    assert r.status_code == 404
+    assert r.get_json() == {'message': 'User not found'}
+    # A user without projects is not a missing user
+    assert client.get('/api/users/1/projects?role=member', headers=admin).get_json() == []
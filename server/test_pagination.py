@@ -0,0 +1,68 @@
+from app import db
+from conftest import add_class, add_projects
+
+
+def test_unpaged_list_returns_every_row(app, client, admin):
+    with app.app_context():
+        ids = add_projects(add_class(), 1, 5)
+    r = client.get('/api/projects', headers=admin)
+    assert r.status_code == 200
+    assert [p['id'] for p in r.get_json()] == ids
+
+
+def test_limit_and_after_walk_every_page_once(app, client, admin):
+    with app.app_context():
+        ids = add_projects(add_class(), 1, 25)
+    seen, after = [], None
+    while True:
+        url = '/api/projects?limit=10' + (f'&after={after}' if after is not None else '')
+        page = client.get(url, headers=admin).get_json()
+        assert len(page['items']) <= 10
+        seen += [p['id'] for p in page['items']]
+        after = page['next']
+        if after is None:
+            break
+        assert after == seen[-1]
+    assert seen == ids
+
+
+def test_last_full_page_has_no_next(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 10)
+    page = client.get('/api/projects?limit=10', headers=admin).get_json()
+    assert len(page['items']) == 10
+    assert page['next'] is None
+
+
+def test_stream_matches_the_unpaged_list(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 12)
+    full = client.get('/api/projects', headers=admin).get_json()
+    r = client.get('/api/projects?stream=1', headers=admin)
+    assert r.mimetype == 'application/json'
+    assert r.get_json() == full
+    r.close()
+
+    r = client.get(f"/api/projects?stream=1&after={full[3]['id']}&limit=4", headers=admin)
+    assert r.get_json() == full[4:8]
+    r.close()
+
+
+def test_other_collections_page_too(app, client, admin):
+    page = client.get('/api/users?limit=1', headers=admin).get_json()
+    assert [u['id'] for u in page['items']] == [1]
+    assert page['next'] == 1
+    page = client.get('/api/users?limit=1&after=1', headers=admin).get_json()
+    assert [u['id'] for u in page['items']] == [2]
+    assert page['next'] is None
+
+
+def test_streaming_returns_its_connection(app, client, admin):
+    with app.app_context():
+        add_projects(add_class(), 1, 3)
+        pool = db.engine.pool
+    for _ in range(pool.size() + 5):
+        r = client.get('/api/projects?stream=1', headers=admin)
+        r.get_data()
+        r.close()
+    assert pool.checkedout() == 0
@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine, text
+
+from app import db
+from pragmas import tune_engine
+
+
+def test_app_connections_are_tuned(ctx):
+    pragma = lambda name: db.session.execute(text(f'PRAGMA {name}')).scalar()
+    assert pragma('journal_mode') == 'wal'
+    assert pragma('synchronous') == 1  # NORMAL
+    assert pragma('busy_timeout') == 5000
+    assert pragma('cache_size') == -64000
+
+
+def test_every_new_connection_is_tuned(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "tuned.db"}')
+    tune_engine(engine, {'busy_timeout': 1234})
+    for _ in range(2):
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 1234
+        engine.dispose()
+
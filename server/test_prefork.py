@@ -0,0 +1,85 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='flask serve forks its workers')
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get(port, path='/api/test'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path, headers={'X-Forwarded-Proto': 'https'})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def workers(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return set(f.read().split())
+
+
+@pytest.fixture
+def server(app):
+    """Run flask serve with two workers that each retire after three requests."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'flask', 'serve', '--port', str(port), '--workers', '2', '--threads', '2',
+         '--max-requests', '3', '--max-requests-jitter', '0'],
+        cwd=SERVER_DIR, env=dict(os.environ, FLASK_APP='app:create_app'),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            get(port)
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                pytest.fail(f'flask serve did not start: {process.stderr.read().decode()}')
+            time.sleep(0.1)
+    yield process, port
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+def test_workers_are_recycled_without_dropping_requests(server):
+    process, port = server
+    seen = workers(process.pid)
+    for _ in range(12):
+        assert get(port) == (200, b'{"message":"API is working!"}')
+        seen |= workers(process.pid)
+
+    deadline = time.monotonic() + 5
+    while len(workers(process.pid)) != 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    seen |= workers(process.pid)
+    assert len(workers(process.pid)) == 2
+    # Thirteen requests, three per worker, at most two left unfinished on each
+    # of the two current workers: at least three workers have been replaced
+    assert len(seen) >= 5
+
+
+def test_sigterm_drains_and_stops(server):
+    process, port = server
+    children = workers(process.pid)
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+    for pid in children:
+        assert not os.path.exists(f'/proc/{pid}')
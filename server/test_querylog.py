@@ -0,0 +1,68 @@
+import logging
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app, db
+from config import Config
+from models import User
+import querylog
+
+
+@pytest.fixture
+def debug_app(app, monkeypatch):
+    """A second app built with QUERY_DEBUG on; the engine hooks are removed afterwards."""
+    monkeypatch.setattr(Config, 'QUERY_DEBUG', True)
+    monkeypatch.setattr(Config, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    monkeypatch.setattr(Config, 'N_PLUS_ONE_THRESHOLD', 3)
+    debug_app = create_app()
+    debug_app.config.update(TESTING=True, JWT_VERIFY_SUB=False)
+
+    @debug_app.route('/users-one-by-one')
+    def users_one_by_one():
+        for user_id in (1, 2, 1, 2):
+            db.session.expire_all()
+            db.session.get(User, user_id)
+        return 'ok'
+
+    yield debug_app
+    event.remove(Engine, 'before_cursor_execute', querylog._before_cursor_execute)
+    event.remove(Engine, 'after_cursor_execute', querylog._after_cursor_execute)
+    querylog._logger = None
+    querylog._settings.clear()
+
+
+@pytest.fixture
+def logged(caplog):
+    caplog.set_level(logging.WARNING, logger='app.sql')
+    return lambda: [record.getMessage() for record in caplog.records if record.name == 'app.sql']
+
+
+def test_slow_queries_are_logged_with_plan_and_call_site(debug_app, admin, logged):
+    client = debug_app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    assert client.get('/api/projects/1', headers=admin).status_code == 404
+
+    message, = [m for m in logged() if 'FROM project' in m.split('\n')[1]]
+    assert message.startswith('Slow query (')
+    assert '[GET api.get_project]' in message
+    assert 'routes.py:' in message
+    assert 'parameters: (1,)' in message
+    assert 'USING INTEGER PRIMARY KEY' in message
+
+
+def test_repeated_statements_are_flagged(debug_app, logged):
+    with debug_app.test_client() as client:
+        client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+        assert client.get('/users-one-by-one').status_code == 200
+
+    flagged = [m for m in logged() if m.startswith('Possible N+1')]
+    assert len(flagged) == 1
+    assert 'GET /users-one-by-one (users_one_by_one) ran the same statement 4 times' in flagged[0]
+    assert 'test_querylog.py:' in flagged[0]
+
+
+def test_nothing_is_logged_when_disabled(client, admin, logged):
+    assert client.get('/api/projects', headers=admin).status_code == 200
+    assert logged() == []
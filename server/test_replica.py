@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import create_app, db
+from config import Config
+from models import Cohort
+from replica import use_replica, sync_replica
+
+
+@pytest.fixture
+def replica_app(app, tmp_path, monkeypatch):
+    """A second app with a replica bind, synced from the primary before the test."""
+    monkeypatch.setattr(Config, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{tmp_path / "replica.db"}'})
+    replica_app = create_app()
+    replica_app.config.update(TESTING=True, JWT_VERIFY_SUB=False)
+    with replica_app.app_context():
+        sync_replica(db)
+    yield replica_app
+    with replica_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app registered a metadata for the bind, which the main app does not have
+    db.metadatas.pop('replica', None)
+
+
+@pytest.fixture
+def replica_client(replica_app):
+    client = replica_app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    return client
+
+
+def add_cohort(name):
+    db.session.add(Cohort(name=name, description='Added after the sync'))
+    db.session.commit()
+
+
+def cohort_count():
+    return db.session.scalar(select(func.count()).select_from(Cohort))
+
+
+def test_get_requests_read_from_the_replica(replica_app, replica_client, admin):
+    with replica_app.app_context():
+        add_cohort('Primary only')
+    assert replica_client.get('/api/cohorts', headers=admin).get_json() == []
+
+    with replica_app.app_context():
+        sync_replica(db)
+    assert [c['name'] for c in replica_client.get('/api/cohorts', headers=admin).get_json()] == ['Primary only']
+
+
+def test_writes_go_to_the_primary(replica_app, replica_client, admin):
+    r = replica_client.post('/api/cohorts', json={'name': 'New', 'description': 'Fresh'}, headers=admin)
+    assert r.status_code == 201
+    with replica_app.app_context():
+        assert cohort_count() == 1
+        use_replica(db.session)
+        assert cohort_count() == 0
+
+
+def test_a_session_reads_its_own_writes(replica_app):
+    with replica_app.app_context():
+        add_cohort('Not replicated yet')
+    with replica_app.app_context():
+        use_replica(db.session)
+        assert cohort_count() == 0
+        add_cohort('Mine')
+        # After its first write the session reads from the primary
+        assert cohort_count() == 2
+
+
+def test_reads_stay_on_the_primary_without_a_replica(ctx):
+    use_replica(db.session)
+    add_cohort('Primary')
+    db.session.info.clear()
+    use_replica(db.session)
+    assert cohort_count() == 1
+
+
+def test_sync_needs_a_replica(ctx):
+    with pytest.raises(RuntimeError, match='No replica bind configured'):
+        sync_replica(db)
@@ -0,0 +1,83 @@
+import pytest
+
+from app import db
+from models import Project
+from conftest import add_class
+
+
+@pytest.fixture
+def projects(app):
+    """Add projects with chosen names and descriptions; return their ids by name."""
+    def add(*rows):
+        with app.app_context():
+            class_id = add_class()
+            added = [Project(name=name, description=description, github_link='https://github.com/test/p',
+                             class_id=class_id, owner_id=1) for name, description in rows]
+            db.session.add_all(added)
+            db.session.commit()
+            return {project.name: project.id for project in added}
+    return add
+
+
+def search(client, headers, q, **args):
+    r = client.get('/api/projects/search', query_string=dict(args, q=q), headers=headers)
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_better_matches_rank_first(client, student, projects):
+    ids = projects(
+        ('Weather station dashboard', 'Charts for a garden weather station and its weather history'),
+        ('Recipe planner app', 'Plans meals; mentions the weather once'),
+        ('Chess engine in Rust', 'Alpha-beta search with no relation to forecasts'),
+    )
+    items = search(client, student, 'weather')['items']
+    assert [item['id'] for item in items] == [ids['Weather station dashboard'], ids['Recipe planner app']]
+    assert items[0]['rank'] < items[1]['rank']
+
+
+def test_items_carry_highlighted_snippets(client, student, projects):
+    projects(('Weather station dashboard', 'Charts for a garden weather station and its history'))
+    item, = search(client, student, 'station')['items']
+    assert item['highlights']['name'] == 'Weather <mark>station</mark> dashboard'
+    assert '<mark>station</mark>' in item['highlights']['description']
+    assert item['name'] == 'Weather station dashboard'
+
+
+def test_every_term_must_match_and_the_last_is_a_prefix(client, student, projects):
+    ids = projects(
+        ('Weather station dashboard', 'Charts for a garden weather station'),
+        ('Weather balloon tracker', 'Tracks balloons through the upper atmosphere'),
+    )
+    assert [i['id'] for i in search(client, student, 'weather stat')['items']] == [ids['Weather station dashboard']]
+    assert len(search(client, student, 'weath')['items']) == 2
+
+
+def test_search_syntax_in_q_is_literal(client, student, projects):
+    projects(('Weather station dashboard', 'Charts for a garden weather station'))
+    for q in ('"unbalanced', 'weather OR', 'NEAR(a b)', 'name:weather', '*'):
+        assert search(client, student, q)['items'] == []
+
+
+def test_results_page_by_offset(client, student, projects):
+    projects(*[(f'Weather project {i}', 'Another project about the weather') for i in range(5)])
+    first = search(client, student, 'weather', limit=2)
+    assert len(first['items']) == 2 and first['next'] == 2
+    last = search(client, student, 'weather', limit=2, offset=4)
+    assert len(last['items']) == 1 and last['next'] is None
+
+
+def test_index_follows_updates_and_deletes(app, client, admin, projects):
+    ids = projects(('Weather station dashboard', 'Charts for a garden sensor network'))
+    project_id = ids['Weather station dashboard']
+    r = client.put(f'/api/projects/{project_id}', json={'name': 'Rainfall station dashboard'}, headers=admin)
+    assert r.status_code == 200
+    assert [i['id'] for i in search(client, admin, 'rainfall')['items']] == [project_id]
+    assert search(client, admin, 'weather')['items'] == []
+
+    assert client.delete(f'/api/projects/{project_id}', headers=admin).status_code == 200
+    assert search(client, admin, 'rainfall')['items'] == []
+
+
+def test_q_is_required(client, student):
+    assert client.get('/api/projects/search?q=%20', headers=student).status_code == 400
@@ -0,0 +1,39 @@
+from sqlalchemy import func, select, text
+
+from app import db
+from models import User, Role, Project, Cohort, Class, ProjectMember
+from seed import seed_database
+
+
+def counts():
+    return {model.__name__: db.session.scalar(select(func.count()).select_from(model))
+            for model in (Role, User, Cohort, Class, Project)}
+
+
+def test_seeds_the_requested_scale(ctx):
+    seed_database(num_users=30, num_projects=60, num_cohorts=3, num_classes=4, chunk_size=7)
+    assert counts() == {'Role': 2, 'User': 30, 'Cohort': 3, 'Class': 4, 'Project': 60}
+    assert dict(db.session.execute(select(Role.id, Role.name)).all()) == {1: 'student', 2: 'admin'}
+    members = db.session.execute(select(ProjectMember.project_id, ProjectMember.user_id)).all()
+    assert len(members) == len(set(members)) >= 60
+
+
+def test_same_seed_same_data(ctx):
+    seed_database(num_users=10, num_projects=10, seed=3)
+    first = db.session.scalars(select(User.email).order_by(User.id)).all()
+    seed_database(num_users=10, num_projects=10, seed=3)
+    assert db.session.scalars(select(User.email).order_by(User.id)).all() == first
+    seed_database(num_users=10, num_projects=10, seed=4)
+    assert db.session.scalars(select(User.email).order_by(User.id)).all() != first
+
+
+def test_search_index_is_built_and_kept_in_sync(ctx):
+    seed_database(num_users=5, num_projects=20)
+    indexed = db.session.scalar(text('SELECT COUNT(*) FROM project_fts_docsize'))
+    assert indexed == 20
+
+    # The sync triggers are back after the bulk load
+    db.session.add(Project(name='Zeppelin tracker', description='Follows airships across the sky',
+                           github_link='https://github.com/test/z', class_id=1, owner_id=1))
+    db.session.commit()
+    assert db.session.scalar(text("SELECT rowid FROM project_fts WHERE project_fts MATCH 'zeppelin'")) is not None
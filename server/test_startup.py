@@ -0,0 +1,39 @@
+import pytest
+
+from app import create_app
+from startup import import_times, profile_build
+
+
+def test_builds_register_their_parts():
+    api = create_app('api')
+    assert any(rule.rule == '/api/projects' for rule in api.url_map.iter_rules())
+    assert 'db' not in api.cli.commands
+    assert 'talisman' in [name for name, _ in api.extensions['startup_timings']]
+
+    cli = create_app('cli')
+    assert not any(rule.rule.startswith('/api/') for rule in cli.url_map.iter_rules())
+    assert 'db' in cli.cli.commands
+    assert [name for name, _ in cli.extensions['startup_timings']][-1] == 'querylog'
+
+
+def test_unknown_build_is_refused():
+    with pytest.raises(ValueError, match="Unknown build 'web'"):
+        create_app('web')
+
+
+def test_import_times_are_summed_per_package():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |     sqlalchemy.util',
+        'import time:       250 |        350 |   sqlalchemy',
+        'import time:        50 |         50 | flask',
+        'some other output',
+    ])
+    assert import_times(stderr) == {'sqlalchemy': pytest.approx(350e-6), 'flask': pytest.approx(50e-6)}
+
+
+def test_profile_build_runs_in_a_fresh_interpreter():
+    result = profile_build('cli')
+    assert result['import'] > 0 and result['create_app'] > 0
+    assert 'routes' not in [name for name, _ in result['phases']]
+    assert result['packages']['flask'] > 0
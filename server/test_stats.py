@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import delete, text, update
+
+from app import db
+from models import User, Class, Cohort, Project, ProjectMember, ClassStats, CohortStats
+import stats
+from stats import STATS_FIELDS, rebuild_stats
+from conftest import add_class, add_projects
+
+
+def table_rows(scope):
+    """What /api/stats/<scope> serves: the trigger-maintained summary table."""
+    model = ClassStats if scope == 'class' else CohortStats
+    return sorted(tuple(getattr(row, field) for field in STATS_FIELDS[scope]) for row in db.session.query(model))
+
+
+CONTRIBUTIONS = """SELECT project.class_id, project.owner_id AS user_id FROM project
+    UNION ALL
+    SELECT project.class_id, project_member.user_id FROM project_member JOIN project ON project.id = project_member.project_id"""
+
+
+def live_rows(scope):
+    """The same counts aggregated from the base tables."""
+    classes = 'class.id' if scope == 'class' else 'SELECT id FROM class WHERE cohort_id = cohort.id'
+    return sorted(tuple(row) for row in db.session.execute(text(f"""
+        SELECT {scope}.id,
+            (SELECT COUNT(*) FROM project WHERE class_id IN ({classes})),
+            (SELECT COUNT(*) FROM project_member JOIN project ON project.id = project_member.project_id
+             WHERE project.class_id IN ({classes})),
+            (SELECT COUNT(DISTINCT user_id) FROM ({CONTRIBUTIONS}) WHERE class_id IN ({classes}))
+        FROM {scope}""")))
+
+
+def assert_consistent():
+    for scope in STATS_FIELDS:
+        maintained = table_rows(scope)
+        assert maintained == live_rows(scope)
+        rebuild_stats(db.session)
+        assert table_rows(scope) == maintained
+
+
+def add_student(user_id):
+    db.session.add(User(id=user_id, username=f'student{user_id}', email=f'student{user_id}@example.com',
+                        password_hash='x', role_id=1))
+    db.session.commit()
+
+
+def test_empty_classes_and_cohorts_list_zero_rows(client, admin, ctx):
+    class_id = add_class()
+    cohort_id = db.session.get(Class, class_id).cohort_id
+    assert client.get('/api/stats/classes', headers=admin).get_json() == [
+        {'class_id': class_id, 'project_count': 0, 'member_count': 0, 'contributor_count': 0}]
+    assert client.get('/api/stats/cohorts', headers=admin).get_json() == [
+        {'cohort_id': cohort_id, 'project_count': 0, 'member_count': 0, 'contributor_count': 0}]
+    assert_consistent()
+
+
+def test_counts_follow_projects_and_members(ctx):
+    add_student(3)
+    class_id = add_class()
+    projects = add_projects(class_id, 2, 3, members=[2, 3])
+    # The owner counts once however many projects they own or belong to
+    assert table_rows('class') == [(class_id, 3, 6, 2)]
+
+    db.session.execute(delete(ProjectMember).where(ProjectMember.user_id == 3))
+    db.session.commit()
+    assert table_rows('class') == [(class_id, 3, 3, 1)]
+
+    db.session.delete(db.session.get(Project, projects[0]))
+    db.session.commit()
+    assert table_rows('class') == [(class_id, 2, 2, 1)]
+    assert_consistent()
+
+
+def test_moving_a_project_moves_its_counts(ctx):
+    first = add_class('First', 'Cohort one')
+    second = add_class('Second', 'Cohort two')
+    project_id, = add_projects(first, 2, 1, members=[1])
+
+    db.session.get(Project, project_id).class_id = second
+    db.session.commit()
+    assert table_rows('class') == [(first, 0, 0, 0), (second, 1, 1, 2)]
+    assert [row[1:] for row in table_rows('cohort')] == [(0, 0, 0), (1, 1, 2)]
+    assert_consistent()
+
+
+def test_moving_a_class_moves_its_counts(ctx):
+    class_id = add_class('First', 'Cohort one')
+    add_projects(class_id, 2, 2, members=[1])
+    other = Cohort(name='Cohort two', description='Another cohort')
+    db.session.add(other)
+    db.session.commit()
+
+    db.session.execute(update(Class).where(Class.id == class_id).values(cohort_id=other.id))
+    db.session.commit()
+    assert dict((row[0], row[1:]) for row in table_rows('cohort'))[other.id] == (2, 2, 2)
+    assert_consistent()
+
+
+def test_deleting_a_class_drops_its_row(ctx):
+    class_id = add_class()
+    cohort_id = db.session.get(Class, class_id).cohort_id
+    db.session.delete(db.session.get(Class, class_id))
+    db.session.commit()
+    assert table_rows('class') == []
+    assert table_rows('cohort') == [(cohort_id, 0, 0, 0)]
+    assert_consistent()
+
+
+def test_bulk_route_writes_update_the_counts(client, student, ctx):
+    class_id = add_class()
+    items = [{'name': f'Project number {i}', 'description': 'A description long enough to pass',
+              'github_link': 'https://github.com/test/p', 'class_id': class_id} for i in range(4)]
+    results = client.post('/api/projects/bulk', json=items, headers=student).get_json()['results']
+    client.post('/api/project_members/bulk', headers=student,
+                json=[{'project_id': result['id']} for result in results])
+    assert client.get('/api/stats/classes', headers=student).get_json() == [
+        {'class_id': class_id, 'project_count': 4, 'member_count': 4, 'contributor_count': 1}]
+    assert_consistent()
+
+
+def test_rebuild_command(app, ctx):
+    add_projects(add_class(), 2, 2, members=[1])
+    db.session.execute(delete(ClassStats))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['rebuild-stats'])
+    assert 'rebuilt successfully' in result.output
+    assert table_rows('class')[0][1:] == (2, 2, 2)
+
+
+def test_startup_needs_sqlite(app, ctx, monkeypatch):
+    monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+    with pytest.raises(RuntimeError, match='must be a SQLite database'):
+        stats.init_app(app)
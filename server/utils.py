@@ -1,14 +1,65 @@
-from flask_jwt_extended import get_jwt_identity
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, request, Response, stream_with_context, current_app
+from app import db
+from identity import current_identity
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
 
 def role_required(role):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            current_user = get_jwt_identity()
-            if current_user['role_id'] != role:
-                return jsonify({"message": "Access forbidden: incorrect role"}), 403
+            if current_identity().role_id != role:
+                return jsonify({'message': 'Access forbidden: Insufficient role'}), 403
             return func(*args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def stream_json(query, serialize):
+    """Write a query out as a JSON array, one row at a time."""
+    def generate():
+        dumps = current_app.json.dumps
+        # The view's session is closed by the time the body streams; a query
+        # still bound to it would check out a connection nobody returns
+        rows = query.with_session(db.session()).yield_per(STREAM_CHUNK_SIZE)
+        yield '['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + dumps(serialize(row))
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def list_response(query, key, serialize):
+    """Serve a collection query, ordered by the unique column ``key``.
+
+    Without paging arguments the whole collection is returned as a list.
+    ``?limit=`` / ``?after=`` switch to keyset pagination and return
+    ``{'items': [...], 'next': <cursor>}``; pass ``next`` back as ``after`` to
+    fetch the following page. ``?stream=1`` streams the rows instead of
+    building the list in memory.
+    """
+    limit = request.args.get('limit', type=int)
+    after = request.args.get('after', type=int)
+
+    query = query.order_by(key)
+    if after is not None:
+        query = query.filter(key > after)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if request.args.get('stream') in ('1', 'true'):
+        if limit is not None:
+            query = query.limit(limit)
+        return stream_json(query, serialize)
+
+    if limit is None and after is None:
+        return jsonify([serialize(row) for row in query]), 200
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    rows = query.limit(limit + 1).all()
+    next_cursor = getattr(rows[limit - 1], key.key) if len(rows) > limit else None
+    return jsonify({
+        'items': [serialize(row) for row in rows[:limit]],
+        'next': next_cursor
+    }), 200